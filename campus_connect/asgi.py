@@ -2,6 +2,11 @@
 ASGI config for campus_connect project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with e.g. ``uvicorn campus_connect.asgi:application`` to hold the
+notification stream (``/notifications/stream/``) open without a thread per
+connection.
+The busiest views are served by their async versions (ASYNC_SERVING) unless
+the environment turns that off.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -11,6 +16,11 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from campus_connect import startup
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'campus_connect.settings')
+os.environ.setdefault('ASYNC_SERVING', 'True')
 
 application = get_asgi_application()
+startup.drain_on_exit()
+startup.load_search_index()
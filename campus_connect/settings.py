@@ -1,13 +1,15 @@
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
-import environ
-
-load_dotenv()
-env = environ.Env()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Only read .env when there is one; on Vercel the variables come from the
+# environment and searching for the file is wasted cold-start time.
+if (BASE_DIR / '.env').exists():
+    load_dotenv(BASE_DIR / '.env')
+
 SECRET_KEY = os.getenv('SECRET_KEY', 'django-insecure-test-key-12345')
 
 # Debug mode
@@ -25,6 +27,16 @@ ALLOWED_HOSTS = [
 if os.getenv('VERCEL_URL'):
     ALLOWED_HOSTS.append(os.getenv('VERCEL_URL'))
 
+# Lean serving mode for serverless cold starts: no admin, static file index
+# built on first use, cached template loader even with DEBUG on, hot
+# templates compiled at startup.
+LEAN_SERVING = os.getenv('LEAN_SERVING', 'False').lower() in ('true', '1', 'yes')
+
+# Async serving mode: the busiest views are routed to their async versions in
+# core.async_views. On by default under campus_connect.asgi; leave it off
+# under WSGI, where async views cost a thread hop per request.
+ASYNC_SERVING = os.getenv('ASYNC_SERVING', 'False').lower() in ('true', '1', 'yes')
+
 # Rest of your settings...
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -40,17 +52,36 @@ INSTALLED_APPS = [
 
 AUTH_USER_MODEL = 'core.User'
 
+# Users are served from the 'users' cache (core.backends) only when that
+# cache is shared between processes; see USER_CACHE_BACKEND below.
+USER_CACHE_BACKEND = os.getenv('USER_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+AUTHENTICATION_BACKENDS = [
+    'django.contrib.auth.backends.ModelBackend' if USER_CACHE_BACKEND.endswith('LocMemCache')
+    else 'core.backends.CachedModelBackend'
+]
+
+# The core.middleware versions of Django's middleware behave the same, but
+# under ASGI run in the event loop rather than in a thread per hook.
 MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.SecurityMiddleware',
+    'core.middleware.WhiteNoiseMiddleware',
+    'core.middleware.SessionMiddleware',
+    'core.middleware.CommonMiddleware',
+    'core.middleware.CsrfViewMiddleware',
+    'core.middleware.AuthenticationMiddleware',
+    'core.middleware.MessageMiddleware',
+    'core.middleware.XFrameOptionsMiddleware',
 ]
 
+# Request metrics (see core.metrics). /metrics needs this bearer token, or a
+# staff session when it is unset. Requests slower than the threshold (seconds)
+# are logged with their SQL to the 'campus_connect.slow_requests' logger.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+SLOW_REQUEST_THRESHOLD = float(os.getenv('SLOW_REQUEST_THRESHOLD', 1.0))
+
 ROOT_URLCONF = 'campus_connect.urls'
 
 TEMPLATES = [
@@ -64,14 +95,104 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.notifications',
             ],
         },
     },
 ]
 
+PREWARM_TEMPLATES = ['home.html', 'mentors.html', 'notifications.html', 'profile.html', 'login.html', 'signup.html']
+
+if LEAN_SERVING:
+    INSTALLED_APPS.remove('django.contrib.admin')
+    MIDDLEWARE[MIDDLEWARE.index('core.middleware.WhiteNoiseMiddleware')] = 'core.middleware.LazyWhiteNoiseMiddleware'
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'campus_connect.wsgi.application'
+ASGI_APPLICATION = 'campus_connect.asgi.application'
+
+# Pub/sub for the notification stream. LocalBackend only reaches streams in the
+# same process; use core.broker.RedisBackend when running several workers.
+NOTIFICATION_BROKER = {
+    'BACKEND': os.getenv('NOTIFICATION_BROKER_BACKEND', 'core.broker.LocalBackend'),
+    'OPTIONS': {'url': os.getenv('REDIS_URL')} if os.getenv('REDIS_URL') else {},
+    'MAX_QUEUE_SIZE': 100,
+}
+
+# Contact form submissions are saved on the request; their acknowledgement
+# emails are queued and sent by a background thread. MemoryBackend is per
+# process, so acknowledgements queued in a process that is frozen or
+# reclaimed (Vercel) are sent by `manage.py send_contact_acknowledgements`,
+# which should run from cron. core.contact_queue.SQLiteBackend spools to a
+# local file instead (set CONTACT_QUEUE_PATH). CONTACT_QUEUE_BATCH_WRITES
+# queues the database writes too, for long-running servers.
+CONTACT_QUEUE = {
+    'BACKEND': os.getenv('CONTACT_QUEUE_BACKEND', 'core.contact_queue.MemoryBackend'),
+    'OPTIONS': {'path': os.getenv('CONTACT_QUEUE_PATH')} if os.getenv('CONTACT_QUEUE_PATH') else {},
+    'WRITE_ON_SUBMIT': os.getenv('CONTACT_QUEUE_BATCH_WRITES', 'False').lower() not in ('true', '1', 'yes'),
+}
+
+# Logins (last_login) and the audit trail (core.models.AuditEvent) are
+# buffered in memory and written in batches by core.activity when a request
+# finishes and BATCH_SIZE entries or FLUSH_INTERVAL seconds have built up, and
+# when the server exits. A crash loses up to one batch. Vercel can reclaim a
+# frozen instance without it exiting, so there each request's entries are
+# written when it finishes. Run `manage.py audit_partitions` monthly (cron)
+# on PostgreSQL to add partitions ahead and drop months past retention.
+ACTIVITY_BUFFER = {
+    'BATCH_SIZE': int(os.getenv('ACTIVITY_BATCH_SIZE', 1 if os.getenv('VERCEL') else 500)),
+    'FLUSH_INTERVAL': float(os.getenv('ACTIVITY_FLUSH_INTERVAL', 5.0)),
+}
+
+# Site search (/search/) ranks against an in-memory index in each process
+# (core.search). It starts from the snapshot when there is a fresh one,
+# otherwise builds from the database and writes it; `manage.py
+# build_search_index` (cron, or on deploy) keeps it current. Web servers
+# start loading a fresh snapshot in the background at start-up. The snapshot
+# must be writable: on Vercel only the temporary directory is, so it
+# defaults there. That directory is per instance and a frozen instance's
+# background thread may never finish, so on Vercel the index is loaded by the
+# first search instead. Set SEARCH_INDEX_SNAPSHOT to '' to keep the index in
+# memory only.
+SEARCH_INDEX = {
+    'SNAPSHOT': os.getenv(
+        'SEARCH_INDEX_SNAPSHOT',
+        os.path.join(tempfile.gettempdir() if os.getenv('VERCEL') else BASE_DIR, 'search-index.npz'),
+    ) or None,
+    'SNAPSHOT_MAX_AGE': int(os.getenv('SEARCH_INDEX_SNAPSHOT_MAX_AGE', 24 * 60 * 60)),
+    'LOAD_AT_STARTUP': os.getenv(
+        'SEARCH_INDEX_LOAD_AT_STARTUP', 'False' if os.getenv('VERCEL') else 'True',
+    ).lower() in ('true', '1', 'yes'),
+}
+
+# Email. For offline development use the file backend:
+# EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend EMAIL_FILE_PATH=/tmp/mail
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = os.getenv('EMAIL_FILE_PATH', os.path.join(BASE_DIR, 'sent-mail'))
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False').lower() in ('true', '1', 'yes')
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'amal.campusconnect@gmail.com')
 
 # Database
+# Serverless instances are frozen between invocations and many run at once,
+# so a long CONN_MAX_AGE mostly holds Postgres connection slots that have gone
+# stale by the next invocation. On Vercel the primary closes its connection
+# after each request (point DB_HOST at a pooler such as PgBouncer); replicas,
+# which take most queries, keep theirs for a short burst. Health checks
+# replace a reused connection that died while the instance was frozen.
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 0 if os.getenv('VERCEL') else 60))
+DB_REPLICA_CONN_MAX_AGE = int(os.getenv('DB_REPLICA_CONN_MAX_AGE', 60))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -80,13 +201,103 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
-        'CONN_MAX_AGE': 600,
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
         'OPTIONS': {
             'connect_timeout': 10,
         }
     }
 }
 
+# Read replicas (core.routers): DB_REPLICA_HOSTS is a comma-separated list of
+# host[:port] serving streaming replicas of the primary with its credentials.
+# Reads go to them round-robin, except for clients that wrote within the last
+# DB_STICKY_SECONDS; a replica that refuses connections is skipped for
+# DB_REPLICA_RETRY_AFTER seconds.
+for number, address in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), 1):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or os.getenv('DB_PORT'),
+        'CONN_MAX_AGE': DB_REPLICA_CONN_MAX_AGE,
+        'OPTIONS': {'connect_timeout': 3},
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = {
+    'ALIASES': [alias for alias in DATABASES if alias != 'default'],
+    'STICKY_SECONDS': int(os.getenv('DB_STICKY_SECONDS', 10)),
+    'RETRY_AFTER': int(os.getenv('DB_REPLICA_RETRY_AFTER', 30)),
+}
+
+# Caches
+# The 'users' cache holds authenticated users between requests once
+# USER_CACHE_BACKEND and USER_CACHE_LOCATION point at a backend every worker
+# and instance shares (e.g. Redis). Saves and logouts invalidate it; a
+# per-process cache would miss invalidations made elsewhere, so with the
+# local-memory default users are read from the database on every request.
+#
+# The 'default' cache holds unread notification counts (core.notifications),
+# invalidated when a notification is created or read. Invalidation only
+# reaches other workers through a shared backend (DEFAULT_CACHE_BACKEND and
+# DEFAULT_CACHE_LOCATION); with the local-memory default a badge can lag by
+# up to UNREAD_CACHE_TIMEOUT seconds, so that default stays short.
+DEFAULT_CACHE_BACKEND = os.getenv('DEFAULT_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': DEFAULT_CACHE_BACKEND,
+        'LOCATION': os.getenv('DEFAULT_CACHE_LOCATION', ''),
+    },
+    'users': {
+        'BACKEND': USER_CACHE_BACKEND,
+        'LOCATION': os.getenv('USER_CACHE_LOCATION', 'users'),
+        'TIMEOUT': int(os.getenv('USER_CACHE_TIMEOUT', 300)),
+        'KEY_PREFIX': 'campus_connect',
+    },
+    # Rendered pages for core.page_cache.CachedPageMixin
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pages',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    # Compressed bodies of ETagged responses for core.middleware.CompressionMiddleware
+    'compressed': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'compressed',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+
+UNREAD_CACHE_TIMEOUT = int(os.getenv(
+    'UNREAD_CACHE_TIMEOUT', 15 if DEFAULT_CACHE_BACKEND.endswith('LocMemCache') else 60 * 60,
+))
+
+# Sessions are read through the default cache only when it is shared; a
+# per-process copy would keep a logged-out session alive in other workers.
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.db' if DEFAULT_CACHE_BACKEND.endswith('LocMemCache')
+    else 'django.contrib.sessions.backends.cached_db'
+)
+
+# Login/signup/contact form throttling (core.throttling). Rates come from the
+# LOGIN_IP_RATE, LOGIN_ACCOUNT_RATE, SIGNUP_IP_RATE and CONTACT_IP_RATE
+# environment variables.
+# State is per process unless THROTTLE_CACHE names a shared cache alias, which
+# production needs (`manage.py check` warns otherwise). Set
+# THROTTLE_PROXY_COUNT to the number of reverse proxies in front of the app so
+# client IPs come from X-Forwarded-For.
+AUTH_THROTTLES = {
+    'login': [('ip', os.getenv('LOGIN_IP_RATE', '60/m')), ('account', os.getenv('LOGIN_ACCOUNT_RATE', '10/15m'))],
+    'signup': [('ip', os.getenv('SIGNUP_IP_RATE', '20/h'))],
+    'contact': [('ip', os.getenv('CONTACT_IP_RATE', '10/h'))],
+}
+THROTTLE_CACHE = os.getenv('THROTTLE_CACHE') or None
+THROTTLE_PROXY_COUNT = int(os.getenv('THROTTLE_PROXY_COUNT', 0))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -95,6 +306,10 @@ AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
 ]
 
+# Size of the bounded thread pool that hashes passwords for async signups
+# (ASYNC_SERVING). Defaults to the number of CPUs.
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', 0)) or None
+
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
 USE_I18N = True
@@ -104,7 +319,32 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise's compressed manifest storage, plus responsive image variants
+# (needs Pillow at build time; see core.images). Vercel deploys the committed
+# STATIC_ROOT without running collectstatic, so commit it after running
+# collectstatic (or `manage.py build_image_variants` for new images).
+STATICFILES_STORAGE = 'core.storage.ImageVariantStaticFilesStorage'
+
+# Minified templates and their CSS/JS bundles from `manage.py build_templates`
+# (core.bundling). Used whenever the build exists; rebuild after editing
+# templates/ (`manage.py check` warns when it is out of date). build/ is not
+# committed and Vercel runs no build step, so deployments there serve the
+# source templates. To ship it, run build_templates then collectstatic and
+# commit build/ together with STATIC_ROOT.
+TEMPLATE_BUILD_DIR = BASE_DIR / 'build'
+if (TEMPLATE_BUILD_DIR / 'templates').exists():
+    TEMPLATES[0]['DIRS'].insert(0, TEMPLATE_BUILD_DIR / 'templates')
+    STATICFILES_DIRS.append(os.path.join(TEMPLATE_BUILD_DIR, 'static'))
+
+# Uploaded media (Voice of Experience recordings)
+# MEDIA_ROOT must be persistent and shared by every instance. Vercel's
+# filesystem is neither: there, set DEFAULT_FILE_STORAGE to remote storage
+# (e.g. django-storages' S3 backend, with its own settings) and run `migrate`
+# with it so the bundled recordings are uploaded. VoiceRecordingView
+# redirects to remote storage instead of streaming.
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
+DEFAULT_FILE_STORAGE = os.getenv('DEFAULT_FILE_STORAGE', 'django.core.files.storage.FileSystemStorage')
 
 # CSRF Settings
 CSRF_TRUSTED_ORIGINS = [
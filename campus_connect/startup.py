@@ -0,0 +1,76 @@
+"""
+Cold-start bookkeeping for the serverless entry points.
+
+Set ``STARTUP_PROFILE=1`` to log how long each startup phase took, up to the
+end of the first response. For per-module import times run the
+``profile_startup`` management command (or set ``PYTHONPROFILEIMPORTTIME=1``).
+This module only uses the standard library so importing it costs nothing.
+"""
+import atexit
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger('campus_connect.startup')
+
+ENABLED = os.getenv('STARTUP_PROFILE', '').lower() in ('true', '1', 'yes')
+_started = time.perf_counter()
+_phases = []
+
+
+def mark(phase):
+    if ENABLED:
+        _phases.append((phase, time.perf_counter(), len(sys.modules)))
+
+
+def report():
+    lines = ['Startup profile:']
+    previous = _started
+    for phase, at, modules in _phases:
+        lines.append(f'  {phase:<28} +{(at - previous) * 1000:7.1f} ms  {(at - _started) * 1000:7.1f} ms total  {modules} modules')
+        previous = at
+    logger.warning('\n'.join(lines))
+
+
+def prewarm_templates():
+    """Compile the hot templates into the cached loader before the first request."""
+    from django.conf import settings
+    from django.template.loader import get_template
+
+    for name in getattr(settings, 'PREWARM_TEMPLATES', ()):
+        get_template(name)
+    mark('templates prewarmed')
+
+
+def drain_on_exit():
+    """Write the buffered logins and audit events (core.activity) when the server process exits."""
+    from core import activity
+
+    atexit.register(activity.drain)
+
+
+def load_search_index():
+    """Start loading the site search index (core.search) from its snapshot, if there is a fresh one."""
+    from core import search
+
+    search.load_in_background()
+    mark('search index loading')
+
+
+def wrap_wsgi(application):
+    """Report the startup profile once the first response has been produced."""
+    if not ENABLED:
+        return application
+    reported = False
+
+    def profiled(environ, start_response):
+        nonlocal reported
+        response = application(environ, start_response)
+        if not reported:
+            reported = True
+            mark('first response')
+            report()
+        return response
+
+    return profiled
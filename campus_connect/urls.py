@@ -14,28 +14,46 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
 from core.views import HomeView, SignupView, CustomLoginView, CustomLogoutView, ProfileView, VoiceOfExperienceView, \
-    MentorsView, AboutUsView, ContactUsView, NotificationView
+    VoiceRecordingView, \
+    MentorsView, AboutUsView, ContactUsView, NotificationView, NotificationStreamView, MetricsView, InboxView, \
+    StartThreadView, ThreadView, SearchView
+
+if settings.ASYNC_SERVING:
+    from core.async_views import AsyncHomeView as HomeView, AsyncLoginView as CustomLoginView, \
+        AsyncMentorsView as MentorsView, AsyncNotificationView as NotificationView, AsyncProfileView as ProfileView, \
+        AsyncSignupView as SignupView
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('', HomeView.as_view(), name='home'),
     path('signup/', SignupView.as_view(), name='signup'),
     path('login/', CustomLoginView.as_view(), name='login'),
     path('accounts/profile/', ProfileView.as_view(), name='profile'),
     path('voiceofexperience/', VoiceOfExperienceView.as_view(), name='voiceofexperience'),
+    path('voiceofexperience/<int:pk>/audio/', VoiceRecordingView.as_view(), name='voice-recording'),
     path('mentors/', MentorsView.as_view(), name='mentors'),
+    path('search/', SearchView.as_view(), name='search'),
     path('logout/', CustomLogoutView.as_view(), name='logout'),
     path('about-us/', AboutUsView.as_view(), name='about-us'),
     path('contact-us/', ContactUsView.as_view(), name='contact-us'),
     path('notifications/', NotificationView.as_view(), name='notifications'),
+    path('notifications/stream/', NotificationStreamView.as_view(), name='notification-stream'),
+    path('messages/', InboxView.as_view(), name='messages'),
+    path('messages/<int:pk>/', ThreadView.as_view(), name='thread'),
+    path('messages/with/<int:user_pk>/', StartThreadView.as_view(), name='start-thread'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
 
+# Not installed in LEAN_SERVING mode
+if 'django.contrib.admin' in settings.INSTALLED_APPS:
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
+
 # Static files - only development mein
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
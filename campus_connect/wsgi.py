@@ -1,9 +1,22 @@
 import os
-from django.core.wsgi import get_wsgi_application
+
+from campus_connect import startup
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'campus_connect.settings')
 
+from django.conf import settings  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
+startup.mark('django imported')
 application = get_wsgi_application()
+startup.mark('apps loaded')
+startup.drain_on_exit()
+startup.load_search_index()
+
+if settings.LEAN_SERVING:
+    startup.prewarm_templates()
+
+application = startup.wrap_wsgi(application)
 
 # Vercel ke liye
-app = application
\ No newline at end of file
+app = application
@@ -0,0 +1,177 @@
+"""
+Write-behind buffer for login bookkeeping and the audit trail.
+
+Logins, signups and profile views are collected in memory instead of costing
+the request an UPDATE or INSERT. Repeated logins by one user between flushes
+coalesce into a single ``last_login`` value (the latest). The buffer is
+written with one ``bulk_update`` and one ``bulk_create``:
+
+* when a request finishes (after its response has gone out) and either
+  ``BATCH_SIZE`` entries are waiting or the oldest has waited
+  ``FLUSH_INTERVAL`` seconds;
+* when a server process exits (``campus_connect.startup.drain_on_exit``).
+
+Durability is traded for fewer writes: what a crash loses is at most one
+batch or interval of bookkeeping. A serverless instance may be frozen and
+reclaimed without exiting, losing whatever it still buffers, so on Vercel
+the settings default to ``BATCH_SIZE`` 1, which writes each request's
+entries as it finishes; the request has already been answered, so it costs
+the instance time rather than latency. Entries that fail to write are kept
+for the next flush, up to ``MAX_PENDING``.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import DatabaseError, close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core import metrics
+from core.models import AuditEvent, User
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ACTIVITY_BUFFER = {
+    'BATCH_SIZE': 500,
+    # Longest an entry waits for a request to flush it.
+    'FLUSH_INTERVAL': 5.0,
+    # Beyond this many entries (the database is down) the oldest events are dropped.
+    'MAX_PENDING': 50000,
+}
+
+
+class ActivityBuffer:
+    def __init__(self, batch_size=500, flush_interval=5.0, max_pending=50000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._logins = {}
+        self._events = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def login(self, user, at=None):
+        """Sets ``user.last_login`` now and writes it later."""
+        at = at or timezone.now()
+        user.last_login = at
+        with self._lock:
+            if self._logins.get(user.pk, at) <= at:
+                self._logins[user.pk] = at
+            self._added()
+
+    def record(self, kind, user_id=None, at=None):
+        """Appends an event of ``kind`` (an ``AuditEventKindChoices``) to the trail."""
+        with self._lock:
+            self._events.append((kind, user_id, at or timezone.now()))
+            self._added()
+
+    def _added(self):
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+
+    def pending(self):
+        return len(self._logins) + len(self._events)
+
+    def is_due(self):
+        return self._oldest is not None and (
+            self.pending() >= self.batch_size or time.monotonic() - self._oldest >= self.flush_interval
+        )
+
+    def flush_if_due(self):
+        # Requests finishing meanwhile leave it to the flush under way.
+        if not self.is_due() or not self._flush_lock.acquire(blocking=False):
+            return 0
+        try:
+            return self._flush()
+        finally:
+            self._flush_lock.release()
+
+    def flush(self):
+        """Writes everything buffered; returns the number of entries written."""
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self):
+        # Under _flush_lock, so an older last_login never overwrites a newer one.
+        with self._lock:
+            logins, self._logins = self._logins, {}
+            events, self._events = self._events, []
+            self._oldest = None
+        if not logins and not events:
+            return 0
+        try:
+            with transaction.atomic():
+                self.write(logins, events)
+        except DatabaseError:
+            self._restore(logins, events)
+            raise
+        return len(logins) + len(events)
+
+    def write(self, logins, events):
+        if logins:
+            # In pk order, so concurrent flushes from several processes lock rows in the same order.
+            User.objects.bulk_update(
+                [User(pk=pk, last_login=at) for pk, at in sorted(logins.items())],
+                ['last_login'], batch_size=self.batch_size,
+            )
+        if events:
+            AuditEvent.objects.bulk_create([
+                AuditEvent(month=AuditEvent.month_of(at), kind=kind, user_id=user_id, created_at=at)
+                for kind, user_id, at in events
+            ], batch_size=self.batch_size)
+
+    def _restore(self, logins, events):
+        with self._lock:
+            for pk, at in logins.items():
+                if self._logins.get(pk, at) <= at:
+                    self._logins[pk] = at
+            self._events[:0] = events
+            overflow = self.pending() - self.max_pending
+            if overflow > 0:
+                del self._events[:overflow]
+                metrics.activity_events_dropped.inc(overflow)
+                logger.error('Activity buffer full; dropped %d audit events', overflow)
+            self._added()
+
+    def drain(self):
+        close_old_connections()
+        try:
+            self.flush()
+        except DatabaseError:
+            logger.exception('Could not write %d buffered activity entries', self.pending())
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_activity_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                config = {**DEFAULT_ACTIVITY_BUFFER, **getattr(settings, 'ACTIVITY_BUFFER', {})}
+                _buffer = ActivityBuffer(config['BATCH_SIZE'], config['FLUSH_INTERVAL'], config['MAX_PENDING'])
+    return _buffer
+
+
+def pending():
+    """Entries waiting in this process's buffer; 0 if it has not been used."""
+    return _buffer.pending() if _buffer is not None else 0
+
+
+def drain():
+    """Writes whatever is buffered; for process exit."""
+    if _buffer is not None:
+        _buffer.drain()
+
+
+@receiver(setting_changed)
+def reset_activity_buffer(setting, **kwargs):
+    global _buffer
+    if setting == 'ACTIVITY_BUFFER':
+        _buffer = None
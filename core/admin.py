@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
-from .models import User
+from .models import AuditEvent, Notification, User, VoiceOfExperience
+from .pagination import EstimatedCountPaginator
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -25,5 +26,48 @@ class UserAdmin(BaseUserAdmin):
         }),
     )
 
+    # Shown as the search box hint; the lookup itself is get_search_results.
     search_fields = ('email', 'username', 'first_name', 'last_name')
     ordering = ('email',)
+    paginator = EstimatedCountPaginator
+    # Skip the second, unfiltered COUNT(*) the changelist runs for "N total".
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.search(search_term), False
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('title', 'recipient', 'audience', 'created_at')
+    list_filter = ('audience',)
+    list_select_related = ('recipient',)
+    raw_id_fields = ('recipient',)
+    search_fields = ('title',)
+
+
+@admin.register(VoiceOfExperience)
+class VoiceOfExperienceAdmin(admin.ModelAdmin):
+    list_display = ('speaker_name', 'cohort', 'topic', 'is_published', 'position')
+    list_editable = ('is_published', 'position')
+    search_fields = ('speaker_name', 'topic')
+
+
+@admin.register(AuditEvent)
+class AuditEventAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'kind', 'user_id')
+    list_filter = ('kind',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # The trail is append-only.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,44 @@
+"""
+Helpers for the async views used in ASYNC_SERVING mode.
+
+Django 4.2 has no async session or cache backends of its own: their async
+methods run the sync ones in a worker thread. The local-memory caches this
+project uses by default never block, so they are called directly and only
+network backends pay for the thread hop.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache.backends.locmem import LocMemCache
+
+
+async def aget_user(request):
+    """
+    Resolve ``request.user`` without touching the session store from the
+    event loop. Requests without a session cookie skip the thread hop.
+    """
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        user = AnonymousUser()
+    else:
+        user = await sync_to_async(get_user)(request)
+    request.user = request._cached_user = user
+    return user
+
+
+async def cache_get_many(cache, keys):
+    if isinstance(cache, LocMemCache):
+        return cache.get_many(keys)
+    return await cache.aget_many(keys)
+
+
+async def cache_get(cache, key, default=None):
+    if isinstance(cache, LocMemCache):
+        return cache.get(key, default)
+    return await cache.aget(key, default)
+
+
+async def cache_set(cache, key, value, timeout):
+    if isinstance(cache, LocMemCache):
+        return cache.set(key, value, timeout)
+    return await cache.aset(key, value, timeout)
@@ -0,0 +1,144 @@
+"""
+Async versions of the busiest views, routed in place of the sync ones in
+ASYNC_SERVING mode (see campus_connect/urls.py).
+
+They query with the async ORM and render in the event loop with ``render``,
+so a request holds no thread of its own. ``sync_to_async`` is left for what
+has no async form in Django 4.2: loading the session, hashing a password on
+login, prefetching, row locks and writes that need a transaction.
+"""
+from asgiref.sync import sync_to_async
+from django.db.models import prefetch_related_objects
+from django.http import Http404, JsonResponse
+from django.shortcuts import render
+from django.utils.cache import add_never_cache_headers
+from django.views.generic import TemplateView, View
+
+from core import notifications
+from core.activity import get_activity_buffer
+from core.async_utils import aget_user
+from core.hashing import ahash_password
+from core.enums import AuditEventKindChoices
+from core.forms import LoginForm
+from core.models import NotificationReadState, User
+from core.page_cache import AsyncCachedPageMixin
+from core.pagination import InvalidCursor, KeysetPaginator
+from core.throttling import ThrottleMixin
+from core.views import CustomLoginView, MentorsView, NotificationView, ProfileView, SignupView
+from mentor.models import ExpertiseTag
+
+_login = sync_to_async(CustomLoginView.as_view())
+
+
+class AsyncUserMixin:
+    """Resolves ``request.user`` before dispatch, so nothing after it loads the session from the event loop."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        await aget_user(request)
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncHomeView(AsyncUserMixin, AsyncCachedPageMixin, TemplateView):
+    template_name = "home.html"
+
+    async def get(self, request, *args, **kwargs):
+        return render(request, self.template_name, self.get_context_data(**kwargs))
+
+
+class AsyncProfileView(AsyncUserMixin, ProfileView):
+    async def get(self, request, *args, **kwargs):
+        context = super(ProfileView, self).get_context_data(**kwargs)
+        user = None
+        if request.user.is_authenticated:
+            user = await User.objects.select_related(*self.profile_related).aget(pk=request.user.pk)
+            get_activity_buffer().record(AuditEventKindChoices.PROFILE_VIEW, user.pk)
+            context['unread_notifications_count'] = await notifications.aunread_count(request.user)
+        context.update(self.profile_context(user))
+        return render(request, self.template_name, context)
+
+
+class AsyncMentorsView(AsyncUserMixin, AsyncCachedPageMixin, MentorsView):
+    async def get(self, request, *args, **kwargs):
+        filters = self.get_filters()
+        # Async iteration can't prefetch; the tags are fetched for the page below.
+        paginator = KeysetPaginator(self.get_queryset(filters).prefetch_related(None), self.paginate_by)
+        try:
+            page = await paginator.apage(request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404("Invalid page.")
+        await sync_to_async(prefetch_related_objects)(page.object_list, 'expertise')
+
+        if request.GET.get('format') == 'json':
+            return JsonResponse({
+                'results': [mentor.to_dict() for mentor in page],
+                'next_cursor': page.next_cursor,
+            })
+        context = self.get_context_data(page=page, mentors=page.object_list, filters=filters, **kwargs)
+        context['expertise_tags'] = [tag async for tag in ExpertiseTag.objects.values_list('slug', 'name')]
+        return render(request, self.template_name, context)
+
+
+class AsyncNotificationView(AsyncUserMixin, NotificationView):
+    async def get(self, request, *args, **kwargs):
+        context = super(NotificationView, self).get_context_data(**kwargs)
+        user = request.user
+        paginator = KeysetPaginator(notifications.feed_for(user), self.paginate_by)
+        try:
+            page = await paginator.apage(request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404("Invalid page.")
+
+        state = None
+        if user.is_authenticated:
+            # Reading doesn't need the row get_read_state would create.
+            state = await NotificationReadState.objects.filter(user=user).afirst() or NotificationReadState(user=user)
+        context.update(self.page_context(page, state))
+        return render(request, self.template_name, context)
+
+    async def post(self, request, *args, **kwargs):
+        # Marking read locks the state row in a transaction.
+        return await sync_to_async(super().post)(request, *args, **kwargs)
+
+
+class AsyncLoginView(View):
+    """
+    The form is rendered in the event loop; submitting it runs
+    ``CustomLoginView`` in a thread, since authenticating hashes the password.
+    """
+    template_name = "login.html"
+
+    async def get(self, request, *args, **kwargs):
+        response = render(request, self.template_name, {'form': LoginForm(request)})
+        add_never_cache_headers(response)
+        return response
+
+    async def post(self, request, *args, **kwargs):
+        return await _login(request, *args, **kwargs)
+
+
+class AsyncSignupView(SignupView):
+    """
+    Throttling, validation and the writes run in a thread as in
+    ``SignupView``; the password hash is awaited on core.hashing's bounded
+    pool, so while it runs the request holds neither the event loop nor a
+    thread of its own.
+    """
+    # Without FormView's sync put().
+    http_method_names = ['get', 'post', 'head', 'options']
+
+    async def dispatch(self, request, *args, **kwargs):
+        retry_after = await sync_to_async(self.throttle_check)(request)
+        if retry_after is not None:
+            return self.throttled(request, retry_after)
+        # Past ThrottleMixin.dispatch, which is sync.
+        return await super(ThrottleMixin, self).dispatch(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        return render(request, self.template_name, self.get_context_data())
+
+    async def post(self, request, *args, **kwargs):
+        form = self.get_form()
+        if not await sync_to_async(form.is_valid)():
+            return self.form_invalid(form)
+        password_hash = await ahash_password(form.cleaned_data['password'])
+        return await sync_to_async(self.complete_signup)(form, password_hash)
@@ -0,0 +1,45 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+USER_CACHE_ALIAS = 'users'
+
+
+def _user_key(user_id):
+    return f'user:{user_id}'
+
+
+def invalidate_user(user_id):
+    caches[USER_CACHE_ALIAS].delete(_user_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that serves ``get_user`` - the lookup AuthenticationMiddleware
+    runs on every request - from the ``users`` cache. Entries are dropped when
+    the user is saved, deleted or logs out (see core.signals).
+
+    The cache must be shared by every process serving the site: a process
+    that kept its own copy would go on accepting a deactivated user, or the
+    session of a changed password, until the entry expired.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if isinstance(caches[USER_CACHE_ALIAS], LocMemCache):
+            raise ImproperlyConfigured(
+                f"CachedModelBackend needs a shared '{USER_CACHE_ALIAS}' cache; LocMemCache is per process. "
+                f"Set USER_CACHE_BACKEND or use django.contrib.auth.backends.ModelBackend."
+            )
+
+    def get_user(self, user_id):
+        cache = caches[USER_CACHE_ALIAS]
+        key = _user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user)
+            return user
+        return user if self.user_can_authenticate(user) else None
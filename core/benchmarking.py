@@ -0,0 +1,79 @@
+"""
+Summaries and baseline comparison for ``bench_routes``.
+
+A result is a dict of scenario name to its numbers. Query counts are
+deterministic, so any increase is a regression; latency and allocations are
+compared with a relative tolerance plus a small absolute slack, so noise on
+sub-millisecond routes does not fail the run.
+"""
+import json
+import platform
+import statistics
+
+LATENCY_TOLERANCE = 0.25
+LATENCY_SLACK_MS = 1.0
+ALLOCATION_TOLERANCE = 0.10
+ALLOCATION_SLACK_KB = 16.0
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+
+def summarise(latencies, elapsed, queries, allocations):
+    """
+    ``latencies`` in seconds per request, ``elapsed`` the wall time of the
+    timed loop, ``queries`` the SQL count per request and ``allocations`` the
+    peak traced memory in bytes per request.
+    """
+    latencies = sorted(seconds * 1000 for seconds in latencies)
+    return {
+        'requests': len(latencies),
+        'throughput': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'queries': max(queries, default=0),
+        'alloc_kb': round(statistics.median(allocations) / 1024, 1) if allocations else 0.0,
+    }
+
+
+def compare(results, baseline, latency_tolerance=LATENCY_TOLERANCE, allocation_tolerance=ALLOCATION_TOLERANCE):
+    """Human-readable regressions of ``results`` against ``baseline``; empty if none."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(f"{name}: {current['queries']} queries, baseline {previous['queries']}")
+        # The tail of a few dozen samples is noisier than the median.
+        for key, tolerance in (('p50_ms', latency_tolerance), ('p95_ms', 2 * latency_tolerance)):
+            limit = previous[key] * (1 + tolerance) + LATENCY_SLACK_MS
+            if current[key] > limit:
+                regressions.append(f"{name}: {key} {current[key]:.1f}, baseline {previous[key]:.1f} (limit {limit:.1f})")
+        limit = previous['alloc_kb'] * (1 + allocation_tolerance) + ALLOCATION_SLACK_KB
+        if current['alloc_kb'] > limit:
+            regressions.append(
+                f"{name}: allocates {current['alloc_kb']:.0f} KiB, baseline {previous['alloc_kb']:.0f} (limit {limit:.0f})"
+            )
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['scenarios']
+
+
+def save_baseline(path, results, iterations):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'iterations': iterations,
+            'scenarios': results,
+        }, f, indent=2, sort_keys=True)
+        f.write('\n')
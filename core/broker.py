@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BROKER = {
+    'BACKEND': 'core.broker.LocalBackend',
+    'OPTIONS': {},
+    'MAX_QUEUE_SIZE': 100,
+}
+
+
+class LocalBackend:
+    """
+    Delivers messages only to subscribers in this process. Good enough for
+    development, tests and single-process ASGI deployments.
+    """
+
+    def __init__(self, **options):
+        self._deliver = None
+
+    def start(self, deliver):
+        self._deliver = deliver
+
+    def publish(self, channel, message):
+        self._deliver(channel, message)
+
+
+class RedisBackend:
+    """
+    Relays messages between processes over Redis pub/sub. Each process keeps
+    one listener thread that feeds the in-process broker, so the number of
+    Redis connections does not grow with the number of open streams. When the
+    connection drops the listener subscribes again, backing off exponentially
+    from ``reconnect_backoff`` up to ``max_reconnect_backoff`` seconds;
+    messages published meanwhile are lost, as with any pub/sub subscriber.
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='campus_connect:', reconnect_backoff=0.5,
+                 max_reconnect_backoff=30, **options):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured(
+                'NOTIFICATION_BROKER uses core.broker.RedisBackend, which needs the "redis" package: '
+                'pip install -r requirements.txt (or pip install redis).'
+            )
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._connection_errors = (redis.ConnectionError, redis.TimeoutError)
+        self.reconnect_backoff = reconnect_backoff
+        self.max_reconnect_backoff = max_reconnect_backoff
+
+    def start(self, deliver):
+        thread = threading.Thread(target=self._listen, args=(deliver,), name='notification-broker', daemon=True)
+        thread.start()
+
+    def _listen(self, deliver):
+        attempt = 0
+        while True:
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(f'{self._prefix}*')
+                attempt = 0
+                for item in pubsub.listen():
+                    self._relay(deliver, item)
+            except self._connection_errors as e:
+                delay = min(self.reconnect_backoff * 2 ** attempt, self.max_reconnect_backoff)
+                logger.error('Notification broker lost its Redis connection; resubscribing in %.1fs: %s', delay, e)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+                attempt += 1
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+    def _relay(self, deliver, item):
+        channel = item['channel'].decode()[len(self._prefix):]
+        try:
+            deliver(channel, json.loads(item['data']))
+        except Exception:
+            logger.exception('Dropping malformed broker message on %s', channel)
+
+    def publish(self, channel, message):
+        self._client.publish(f'{self._prefix}{channel}', json.dumps(message))
+
+
+class Subscription:
+    """
+    An asyncio queue bound to the event loop that created it. Publishers on
+    other threads hand messages over with ``call_soon_threadsafe``; when the
+    queue is full the oldest message is dropped rather than blocking them.
+    """
+
+    def __init__(self, broker, channels, maxsize):
+        self.broker = broker
+        self.channels = tuple(channels)
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, message):
+        try:
+            self._loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # The loop has shut down; the stream is gone.
+            self.close()
+
+    def _put(self, message):
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        """Next message, or ``None`` if nothing arrived within ``timeout``."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+class Broker:
+    def __init__(self, backend, max_queue_size=100):
+        self.backend = backend
+        self.max_queue_size = max_queue_size
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        backend.start(self._deliver)
+
+    def publish(self, channel, message):
+        self.backend.publish(channel, message)
+
+    def subscribe(self, channels):
+        """Must be called from inside the event loop that will consume it."""
+        subscription = Subscription(self, channels, self.max_queue_size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({sub for subs in self._subscribers.values() for sub in subs})
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = {**DEFAULT_BROKER, **getattr(settings, 'NOTIFICATION_BROKER', {})}
+                backend = import_string(config['BACKEND'])(**config['OPTIONS'])
+                _broker = Broker(backend, max_queue_size=config['MAX_QUEUE_SIZE'])
+    return _broker
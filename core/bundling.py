@@ -0,0 +1,144 @@
+"""
+Build step for the page templates (see the ``build_templates`` command).
+
+Each ``<style>`` block and inline ``<script>`` moves into a static bundle
+named by the hash of its content, so pages sharing a block share one cached
+file, and the template's HTML is minified. Blocks that contain template
+syntax stay inline: only the template engine can fill them in.
+
+The minifiers are deliberately conservative. Whitespace runs collapse to one
+space rather than disappearing, ``<pre>``, ``<textarea>``, scripts and
+template tags are left byte for byte, and comments that contain template
+syntax are kept so no ``{% if %}`` loses its ``{% endif %}``. Scripts are not
+minified at all; WhiteNoise compresses the bundles.
+"""
+import hashlib
+import json
+import os
+import re
+
+BUNDLE_DIR = 'bundles'
+
+_TEMPLATE_SYNTAX = re.compile(r'{[{%#]')
+_LOAD_STATIC = re.compile(r'{%\s*load\s[^%]*\bstatic\b[^%]*%}')
+_STYLE = re.compile(r'<style(?P<attrs>[^>]*)>(?P<body>.*?)</style\s*>', re.S | re.I)
+_SCRIPT = re.compile(r'<script(?P<attrs>[^>]*)>(?P<body>.*?)</script\s*>', re.S | re.I)
+_JS_TYPES = ('', 'text/javascript', 'application/javascript', 'module')
+_TYPE_ATTR = re.compile(r'''\btype\s*=\s*["']?([^"'\s>]+)''', re.I)
+
+# Left untouched by the HTML minifier: raw-text elements, template tags and
+# variables, and comments.
+_PROTECTED = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>|{%.*?%}|{{.*?}}|{#.*?#}|<!--.*?-->)',
+    re.S | re.I,
+)
+_WHITESPACE = re.compile(r'\s+')
+_CONDITIONAL_COMMENT = re.compile(r'<!--\s*\[if', re.I)
+
+_CSS_STRING = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''')
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+# Not before a colon: "a :hover" and "a:hover" are different selectors.
+_CSS_COLON = re.compile(r':\s+')
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode()).hexdigest()[:12]
+
+
+def minify_css(css):
+    """Drops comments and insignificant whitespace; strings are kept as they are."""
+    parts = _CSS_STRING.split(_CSS_COMMENT.sub('', css))
+    for i in range(0, len(parts), 2):
+        code = _WHITESPACE.sub(' ', parts[i])
+        code = _CSS_COLON.sub(':', _CSS_PUNCTUATION.sub(r'\1', code))
+        parts[i] = code.replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def minify_html(source):
+    """Collapses whitespace and drops comments outside the protected spans."""
+    pieces = []
+
+    def add(text):
+        # Keeps one space where a dropped comment sat between two runs.
+        if text.startswith(' ') and pieces and pieces[-1].endswith(' '):
+            text = text[1:]
+        if text:
+            pieces.append(text)
+
+    position = 0
+    for match in _PROTECTED.finditer(source):
+        add(_WHITESPACE.sub(' ', source[position:match.start()]))
+        protected = match.group(0)
+        if protected.startswith('<!--') and not (
+            _TEMPLATE_SYNTAX.search(protected) or _CONDITIONAL_COMMENT.match(protected)
+        ):
+            protected = ''
+        elif protected.startswith('{#'):
+            protected = ''
+        add(protected)
+        position = match.end()
+    add(_WHITESPACE.sub(' ', source[position:]))
+    return ''.join(pieces).strip()
+
+
+def _extractable_script(attrs, body):
+    # async and defer only take effect once the script has a src.
+    if re.search(r'\b(src|async|defer)\b', attrs, re.I) or not body.strip() or _TEMPLATE_SYNTAX.search(body):
+        return False
+    match = _TYPE_ATTR.search(attrs)
+    return (match.group(1).lower() if match else '') in _JS_TYPES
+
+
+def build_template(source):
+    """
+    ``(html, bundles)`` for one template: the minified template and a dict of
+    bundle path (relative to the static root) to content.
+    """
+    bundles = {}
+
+    def bundle(content, extension):
+        path = f'{BUNDLE_DIR}/{content_hash(content)}.{extension}'
+        bundles[path] = content
+        return path
+
+    def style(match):
+        body = match.group('body')
+        if _TEMPLATE_SYNTAX.search(body) or 'media' in match.group('attrs').lower():
+            return match.group(0)
+        css = minify_css(body)
+        if not css:
+            return ''
+        return f'<link rel="stylesheet" href="{{% static \'{bundle(css, "css")}\' %}}">'
+
+    def script(match):
+        attrs, body = match.group('attrs'), match.group('body')
+        if not _extractable_script(attrs, body):
+            return match.group(0)
+        path = bundle(body.strip() + '\n', 'js')
+        return f'<script{attrs} src="{{% static \'{path}\' %}}"></script>'
+
+    html = _STYLE.sub(style, source)
+    html = _SCRIPT.sub(script, html)
+    if bundles and not _LOAD_STATIC.search(html):
+        html = '{% load static %}' + html
+    return minify_html(html), bundles
+
+
+def read_sources(source_dir):
+    for name in sorted(os.listdir(source_dir)):
+        if name.endswith('.html'):
+            with open(os.path.join(source_dir, name), encoding='utf-8') as f:
+                yield name, f.read()
+
+
+def stale_templates(source_dir, build_dir):
+    """Templates added, changed or removed since the last build; empty if it is current."""
+    try:
+        with open(os.path.join(build_dir, 'manifest.json'), encoding='utf-8') as f:
+            built = json.load(f)['templates']
+    except FileNotFoundError:
+        built = {}
+    current = {name: content_hash(source) for name, source in read_sources(source_dir)}
+    return sorted(name for name in current.keys() | built.keys() if current.get(name) != built.get(name))
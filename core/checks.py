@@ -0,0 +1,39 @@
+import os
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+from core.bundling import stale_templates
+
+
+@register(Tags.templates)
+def check_template_build(app_configs, **kwargs):
+    build_dir = getattr(settings, 'TEMPLATE_BUILD_DIR', None)
+    if not build_dir or not os.path.isdir(os.path.join(build_dir, 'templates')):
+        return []
+    stale = stale_templates(os.path.join(settings.BASE_DIR, 'templates'), build_dir)
+    if not stale:
+        return []
+    return [Warning(
+        f"The built templates in {build_dir} are out of date ({', '.join(stale)}) and are served instead of "
+        f"templates/.",
+        hint="Run `manage.py build_templates`.",
+        id='core.W001',
+    )]
+
+
+@register(Tags.caches)
+def check_throttle_cache(app_configs, **kwargs):
+    if settings.DEBUG:
+        return []
+    alias = getattr(settings, 'THROTTLE_CACHE', None)
+    backend = settings.CACHES.get(alias, {}).get('BACKEND', '') if alias else ''
+    if alias and backend != f'{LocMemCache.__module__}.{LocMemCache.__name__}':
+        return []
+    return [Warning(
+        "Login, signup and contact throttles are kept per process, so each worker and instance allows the full rate "
+        "for every account and IP.",
+        hint="Set THROTTLE_CACHE to the alias of a cache every process shares (e.g. Redis).",
+        id='core.W002',
+    )]
@@ -0,0 +1,384 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core import metrics
+from core.models import ContactMessage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTACT_QUEUE = {
+    'BACKEND': 'core.contact_queue.MemoryBackend',
+    'OPTIONS': {},
+    'BATCH_SIZE': 100,
+    # Longest a submission waits before its batch is written.
+    'FLUSH_INTERVAL': 1.0,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 0.5,
+    # Close the SMTP connection after this many idle seconds instead of
+    # finding out on the next send that the server hung up.
+    'MAIL_IDLE_TIMEOUT': 30,
+    'START_WORKER': True,
+    # Write each submission on the request and queue only its
+    # acknowledgement, so a process that is frozen or reclaimed without
+    # running atexit (serverless) loses no messages. False batches the
+    # writes as well.
+    'WRITE_ON_SUBMIT': True,
+}
+
+
+class QueueFull(Exception):
+    pass
+
+
+class MemoryBackend:
+    """
+    Submissions wait in this process until flushed. Anything still queued is
+    written at interpreter exit, but a crash loses it.
+    """
+
+    def __init__(self, max_size=10000):
+        self._queue = queue.Queue(maxsize=max_size)
+
+    def put(self, job):
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise QueueFull
+
+    def take(self, max_items, timeout):
+        """Up to ``max_items`` jobs, collecting for at most ``timeout`` seconds."""
+        deadline = time.monotonic() + timeout
+        jobs = []
+        while len(jobs) < max_items:
+            remaining = deadline - time.monotonic()
+            try:
+                jobs.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return jobs
+
+    def done(self, jobs):
+        pass
+
+    def release(self, jobs):
+        for job in jobs:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                logger.error('Contact queue full; dropping submission from %s', job['email'])
+
+    def depth(self):
+        return self._queue.qsize()
+
+
+class SQLiteBackend:
+    """
+    Spools submissions to a local SQLite file, so they survive a restart and
+    several worker processes on one host can share the queue. Needs nothing
+    beyond the standard library, which also makes it a stand-in for a real
+    broker when developing offline.
+
+    Jobs are claimed before they are written to the database and deleted
+    after; a claim older than ``claim_timeout`` (a worker died mid-batch) is
+    handed out again.
+    """
+
+    def __init__(self, path='contact-queue.sqlite3', max_size=100000, claim_timeout=300, poll_interval=0.1):
+        self.path = path
+        self.max_size = max_size
+        self.claim_timeout = claim_timeout
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        with self._connection() as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                'id INTEGER PRIMARY KEY, payload TEXT NOT NULL, claimed_at REAL)'
+            )
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+        return _Transaction(db)
+
+    def put(self, job):
+        with self._connection() as db:
+            # The id span bounds the depth without a COUNT(*) scan.
+            span = db.execute('SELECT COALESCE(MAX(id) - MIN(id) + 1, 0) FROM jobs').fetchone()[0]
+            if self.max_size and span >= self.max_size:
+                raise QueueFull
+            db.execute('INSERT INTO jobs (payload) VALUES (?)', (json.dumps(job),))
+
+    def _claim(self, limit):
+        now = time.time()
+        with self._connection() as db:
+            rows = db.execute(
+                'UPDATE jobs SET claimed_at = ? WHERE id IN ('
+                'SELECT id FROM jobs WHERE claimed_at IS NULL OR claimed_at < ? ORDER BY id LIMIT ?'
+                ') RETURNING id, payload',
+                (now, now - self.claim_timeout, limit),
+            ).fetchall()
+        return [{**json.loads(payload), 'spool_id': job_id} for job_id, payload in rows]
+
+    def take(self, max_items, timeout):
+        deadline = time.monotonic() + timeout
+        jobs = self._claim(max_items)
+        while len(jobs) < max_items and time.monotonic() < deadline:
+            time.sleep(min(self.poll_interval, max(deadline - time.monotonic(), 0)))
+            jobs += self._claim(max_items - len(jobs))
+        return jobs
+
+    def done(self, jobs):
+        with self._connection() as db:
+            db.executemany('DELETE FROM jobs WHERE id = ?', [(job['spool_id'],) for job in jobs])
+
+    def release(self, jobs):
+        with self._connection() as db:
+            db.executemany('UPDATE jobs SET claimed_at = NULL WHERE id = ?', [(job['spool_id'],) for job in jobs])
+
+    def depth(self):
+        with self._connection() as db:
+            return db.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+
+
+class _Transaction:
+    """``BEGIN IMMEDIATE`` ... ``COMMIT`` around a block, on a reused connection."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute('BEGIN IMMEDIATE')
+        return self.db
+
+    def __exit__(self, exc_type, *exc_info):
+        self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+
+class ContactQueue:
+    """
+    Keeps SMTP off the request thread. With ``write_on_submit`` a submission
+    is saved at once and only its acknowledgement is queued; otherwise the
+    database write is queued too and the worker makes it in batches with
+    ``bulk_create``. The background worker sends acknowledgements over one
+    SMTP connection that stays open between batches, retrying with
+    exponential backoff. Messages whose acknowledgement failed, or was lost
+    with the process, keep ``acknowledged_at`` empty for
+    ``send_contact_acknowledgements``.
+
+    Each message is claimed (``acknowledgement_claimed_at``) before its email
+    is sent and released if sending fails, so the worker and the command never
+    both send one. A message whose send was interrupted stays claimed and is
+    not retried, as its email may already have gone out.
+    """
+
+    def __init__(self, backend, batch_size=100, flush_interval=1.0, max_attempts=5, retry_backoff=0.5,
+                 mail_idle_timeout=30, start_worker=True, write_on_submit=True, connection_factory=get_connection):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.mail_idle_timeout = mail_idle_timeout
+        self.start_worker = start_worker
+        self.write_on_submit = write_on_submit
+        self.connection_factory = connection_factory
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._mail_connection = None
+        self._mail_used_at = 0.0
+
+    def submit(self, name, email, message):
+        """
+        Queue a submission. Raises ``QueueFull`` when the backend is at
+        capacity, unless it was already written.
+        """
+        job = {'name': name, 'email': email, 'message': message, 'enqueued_at': time.time()}
+        if self.write_on_submit:
+            job['contact_id'] = ContactMessage.objects.create(name=name, email=email, message=message).pk
+        try:
+            self.backend.put(job)
+        except QueueFull:
+            if not self.write_on_submit:
+                raise
+            # Saved; send_contact_acknowledgements will acknowledge it.
+            return
+        if self.start_worker and self._worker is None:
+            self._start_worker()
+
+    def _start_worker(self):
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='contact-queue', daemon=True)
+                self._worker.start()
+                atexit.register(self.drain)
+
+    def _run(self):
+        while True:
+            try:
+                self.flush(timeout=self.flush_interval)
+            except Exception:
+                logger.exception('Contact queue flush failed')
+                time.sleep(self.flush_interval)
+
+    def flush(self, timeout=0, attempts=None):
+        """
+        Take one batch, write the submissions not yet saved and acknowledge
+        them all, trying each email up to ``attempts`` times (default
+        ``max_attempts``). Returns the number of jobs taken.
+        """
+        jobs = self.backend.take(self.batch_size, timeout)
+        if not jobs:
+            self._close_idle_mail_connection()
+            return 0
+        close_old_connections()
+        unsaved = [job for job in jobs if 'contact_id' not in job]
+        try:
+            contacts = ContactMessage.objects.bulk_create([
+                ContactMessage(name=job['name'], email=job['email'], message=job['message']) for job in unsaved
+            ])
+            saved = [job['contact_id'] for job in jobs if 'contact_id' in job]
+            if saved:
+                contacts += ContactMessage.objects.filter(
+                    pk__in=saved, acknowledged_at__isnull=True, acknowledgement_claimed_at__isnull=True,
+                )
+        except Exception:
+            self.backend.release(jobs)
+            raise
+        self.backend.done(jobs)
+        stored_at = time.time()
+        for job in jobs:
+            metrics.contact_queue_latency.observe((), stored_at - job['enqueued_at'])
+        self.acknowledge(contacts, attempts)
+        return len(jobs)
+
+    def drain(self):
+        """
+        Flush everything still queued at exit, trying each acknowledgement
+        once; ``send_contact_acknowledgements`` retries the rest.
+        """
+        while self.flush(attempts=1):
+            pass
+
+    def acknowledge(self, contacts, attempts=None):
+        """Send the acknowledgements for ``contacts`` that nobody else has claimed; returns how many were sent."""
+        sent, failed = [], []
+        for contact in self._claim(contacts):
+            (sent if self._send(acknowledgement(contact), attempts) else failed).append(contact.pk)
+        if sent:
+            ContactMessage.objects.filter(pk__in=sent).update(acknowledged_at=timezone.now())
+        if failed:
+            ContactMessage.objects.filter(pk__in=failed).update(acknowledgement_claimed_at=None)
+        return len(sent)
+
+    @staticmethod
+    def _claim(contacts):
+        """The ``contacts`` this call claimed: unacknowledged and not claimed by another run."""
+        if not contacts:
+            return []
+        pks = [contact.pk for contact in contacts]
+        claimed_at = timezone.now()
+        ContactMessage.objects.filter(
+            pk__in=pks, acknowledged_at__isnull=True, acknowledgement_claimed_at__isnull=True,
+        ).update(acknowledgement_claimed_at=claimed_at)
+        claimed = set(ContactMessage.objects.filter(
+            pk__in=pks, acknowledgement_claimed_at=claimed_at,
+        ).values_list('pk', flat=True))
+        return [contact for contact in contacts if contact.pk in claimed]
+
+    def _send(self, email, attempts=None):
+        attempts = attempts or self.max_attempts
+        for attempt in range(attempts):
+            try:
+                if self._get_mail_connection().send_messages([email]):
+                    self._mail_used_at = time.monotonic()
+                    return True
+            except (smtplib.SMTPException, OSError) as e:
+                logger.warning('Acknowledgement to %s failed (attempt %d): %s', email.to[0], attempt + 1, e)
+            self._close_mail_connection()
+            if attempt + 1 < attempts:
+                time.sleep(self.retry_backoff * 2 ** attempt * random.uniform(0.5, 1.0))
+        metrics.contact_acknowledgement_failures.inc()
+        return False
+
+    def _get_mail_connection(self):
+        if self._mail_connection is None:
+            self._mail_connection = self.connection_factory()
+            self._mail_connection.open()
+        return self._mail_connection
+
+    def _close_mail_connection(self):
+        if self._mail_connection is not None:
+            try:
+                self._mail_connection.close()
+            except Exception:
+                pass
+            self._mail_connection = None
+
+    def _close_idle_mail_connection(self):
+        if self._mail_connection is not None and time.monotonic() - self._mail_used_at > self.mail_idle_timeout:
+            self._close_mail_connection()
+
+
+def acknowledgement(contact):
+    return EmailMessage(
+        subject='We received your message',
+        body=(
+            f"Hi {contact.name},\n\n"
+            "Thanks for contacting Campus Connect. We have received your message and will get back to you "
+            "as soon as possible.\n\n— The Campus Connect team"
+        ),
+        to=[contact.email],
+    )
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_contact_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                config = {**DEFAULT_CONTACT_QUEUE, **getattr(settings, 'CONTACT_QUEUE', {})}
+                _queue = ContactQueue(
+                    import_string(config['BACKEND'])(**config['OPTIONS']),
+                    batch_size=config['BATCH_SIZE'],
+                    flush_interval=config['FLUSH_INTERVAL'],
+                    max_attempts=config['MAX_ATTEMPTS'],
+                    retry_backoff=config['RETRY_BACKOFF'],
+                    mail_idle_timeout=config['MAIL_IDLE_TIMEOUT'],
+                    start_worker=config['START_WORKER'],
+                    write_on_submit=config['WRITE_ON_SUBMIT'],
+                )
+    return _queue
+
+
+def queue_depth():
+    """Jobs waiting in this process's queue; 0 if it has not been used."""
+    return _queue.backend.depth() if _queue is not None else 0
+
+
+@receiver(setting_changed)
+def reset_contact_queue(setting, **kwargs):
+    global _queue
+    if setting == 'CONTACT_QUEUE':
+        _queue = None
@@ -0,0 +1,11 @@
+from django.utils.functional import SimpleLazyObject
+
+from core.notifications import unread_count
+
+
+def notifications(request):
+    """Lazy so pages that do not render the badge never touch the cache."""
+    user = getattr(request, 'user', None)
+    if user is None:
+        return {}
+    return {'unread_notifications_count': SimpleLazyObject(lambda: unread_count(user))}
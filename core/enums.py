@@ -10,3 +10,21 @@ class UserTypeChoices(models.TextChoices):
 class GenericStatusChoices(models.TextChoices):
     ACTIVE = 'ACTIVE', _('Active')
     INACTIVE = 'INACTIVE', _('In-Active')
+
+
+class AvailabilityChoices(models.TextChoices):
+    AVAILABLE = 'AVAILABLE', _('Available')
+    LIMITED = 'LIMITED', _('Limited')
+    UNAVAILABLE = 'UNAVAILABLE', _('Unavailable')
+
+
+class NotificationAudienceChoices(models.TextChoices):
+    ALL = 'ALL', _('Everyone')
+    STUDENT = 'STUDENT', _('Students')
+    MENTOR = 'MENTOR', _('Mentors')
+
+
+class AuditEventKindChoices(models.IntegerChoices):
+    LOGIN = 1, _('Login')
+    SIGNUP = 2, _('Signup')
+    PROFILE_VIEW = 3, _('Profile View')
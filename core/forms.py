@@ -1,16 +1,30 @@
 from django import forms
 from django.contrib.auth.forms import AuthenticationForm
 from django.core.exceptions import ValidationError
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
-from core.models import User
+from django.db import transaction
+from django.db.models import Q
+from core.profiles import create_profile
+from core.models import ContactMessage, User
 from core.enums import UserTypeChoices
+from mentor.messaging import MAX_MESSAGE_LENGTH
 import re
 
+
+def validate_username(username):
+    # Username validation: 3+ characters, letters, numbers, underscore only
+    if len(username) < 3:
+        raise ValidationError("Username must be at least 3 characters long.")
+
+    if not re.match(r'^[a-zA-Z0-9_]+$', username):
+        raise ValidationError("Username can only contain letters, numbers, and underscores.")
+
+
 class SignupForm(forms.ModelForm):
     password = forms.CharField(
         widget=forms.PasswordInput(attrs={'placeholder': 'Password'}),
         label='Password',
-        validators=[validate_password]  # Add password validation
     )
     confirm_password = forms.CharField(
         widget=forms.PasswordInput(attrs={'placeholder': 'Confirm Password'}),
@@ -36,60 +50,67 @@ class SignupForm(forms.ModelForm):
 
     def clean_username(self):
         username = self.cleaned_data.get('username')
-        
-        # Username validation: 3+ characters, letters, numbers, underscore only
-        if len(username) < 3:
-            raise ValidationError("Username must be at least 3 characters long.")
-        
-        if not re.match(r'^[a-zA-Z0-9_]+$', username):
-            raise ValidationError("Username can only contain letters, numbers, and underscores.")
-        
-        # Check if username already exists
-        if User.objects.filter(username=username).exists():
-            raise ValidationError("This username is already taken.")
-        
+        validate_username(username)
         return username
 
     def clean_email(self):
-        email = self.cleaned_data.get('email')
-        
-        # Check if email already exists
-        if User.objects.filter(email=email).exists():
-            raise ValidationError("This email is already registered.")
-        
-        return email
-
-    def clean_password(self):
-        password = self.cleaned_data.get('password')
-        if password:
-            try:
-                validate_password(password)
-            except ValidationError as e:
-                raise ValidationError(list(e.messages))
-        return password
+        return User.objects.normalize_email(self.cleaned_data.get('email'))
 
     def clean(self):
         cleaned_data = super().clean()
+        username = cleaned_data.get("username")
+        email = cleaned_data.get("email")
         password = cleaned_data.get("password")
         confirm_password = cleaned_data.get("confirm_password")
-        
+
+        self._check_unique(username, email)
+
         if password and confirm_password and password != confirm_password:
             self.add_error("confirm_password", "Passwords do not match.")
-        
+        elif password:
+            # Validated once, here, so the similarity check can see the
+            # username and email.
+            try:
+                validate_password(password, user=User(username=username or '', email=email or ''))
+            except ValidationError as e:
+                self.add_error("password", list(e.messages))
+
         return cleaned_data
 
-    def save(self, commit=True):
+    def _check_unique(self, username, email):
+        """Username and email uniqueness in a single query."""
+        lookup = Q()
+        if username:
+            lookup |= Q(username=username)
+        if email:
+            lookup |= Q(email=email)
+        if not lookup:
+            return
+        for taken_username, taken_email in User.objects.filter(lookup).values_list('username', 'email'):
+            if username and taken_username == username and 'username' not in self._errors:
+                self.add_error("username", "This username is already taken.")
+            if email and taken_email == email and 'email' not in self._errors:
+                self.add_error("email", "This email is already registered.")
+
+    def validate_unique(self):
+        # Already covered by _check_unique; skip the per-field queries the
+        # ModelForm would otherwise run.
+        pass
+
+    def save(self, commit=True, password_hash=None):
         # Save the user but don't commit yet
         user = super().save(commit=False)
         
-        # Set the password properly (this will hash it)
-        user.set_password(self.cleaned_data["password"])
+        # AsyncSignupView hashes on core.hashing's pool and passes the result in
+        user.password = password_hash or make_password(self.cleaned_data["password"])
         
         # Set additional fields if needed
         user.is_active = True
         
         if commit:
-            user.save()
+            with transaction.atomic():
+                user.save()
+                create_profile(user)
         
         return user
 
@@ -101,4 +122,13 @@ class LoginForm(AuthenticationForm):
     password = forms.CharField(
         widget=forms.PasswordInput(attrs={'placeholder': 'Password'}),
         label='Password'
-    )
\ No newline at end of file
+    )
+
+class ContactForm(forms.ModelForm):
+    class Meta:
+        model = ContactMessage
+        fields = ['name', 'email', 'message']
+
+
+class MessageForm(forms.Form):
+    body = forms.CharField(max_length=MAX_MESSAGE_LENGTH, widget=forms.Textarea)
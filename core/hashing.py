@@ -0,0 +1,35 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Bounded pool for password hashing from the event loop. PBKDF2 releases
+    the GIL, so hashes run in parallel up to ``PASSWORD_HASHING_WORKERS`` and
+    queue beyond it instead of oversubscribing the CPU.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or os.cpu_count() or 1
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+    return _executor
+
+
+async def ahash_password(raw_password):
+    """
+    Hash without blocking the event loop when serving under ASGI. Sync views
+    call ``make_password`` directly: handing the hash to a pool and waiting
+    for it would pin the request thread all the same.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), make_password, raw_password)
@@ -0,0 +1,162 @@
+import hashlib
+import io
+import json
+import os
+from functools import lru_cache
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+MANIFEST_NAME = 'image-variants.json'
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+DEFAULT_WIDTHS = (320, 640, 960, 1280)
+# Preferred first: <picture> takes the first <source> the browser supports.
+FORMATS = {
+    'avif': ('AVIF', 'image/avif', {'quality': 50}),
+    'webp': ('WEBP', 'image/webp', {'quality': 75, 'method': 6}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 80, 'optimize': True, 'progressive': True}),
+}
+
+
+def _manifest_path(root):
+    return os.path.join(root, MANIFEST_NAME)
+
+
+def read_manifest(root):
+    try:
+        with open(_manifest_path(root)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'version': 1, 'images': {}}
+
+
+def _supported_formats():
+    from PIL import features
+
+    supported = []
+    for fmt in FORMATS:
+        if fmt == 'jpeg' or features.check(fmt):
+            supported.append(fmt)
+    return supported
+
+
+def _build_one(root, name, source_hash, widths, formats):
+    from PIL import Image
+
+    with Image.open(os.path.join(root, name)) as original:
+        original.load()
+    width, height = original.size
+    has_alpha = original.mode in ('RGBA', 'LA') or 'transparency' in original.info
+
+    stem = PurePosixPath(name)
+    targets = sorted({w for w in widths if w < width} | {min(width, max(widths))})
+    record = {'source_hash': source_hash, 'width': width, 'height': height, 'variants': {}}
+    for fmt in formats:
+        if fmt == 'jpeg' and has_alpha:
+            continue
+        pil_format, _, save_options = FORMATS[fmt]
+        record['variants'][fmt] = []
+        for target in targets:
+            resized = original if target == width else original.resize(
+                (target, round(height * target / width)), Image.LANCZOS,
+            )
+            if fmt == 'jpeg':
+                resized = resized.convert('RGB')
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, **save_options)
+            data = buffer.getvalue()
+            digest = hashlib.md5(data).hexdigest()[:12]
+            variant = str(stem.parent / 'variants' / f'{stem.stem}.{target}w.{digest}.{fmt}')
+            path = os.path.join(root, variant)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+            record['variants'][fmt].append([target, variant])
+    return record
+
+
+def _source_names(root):
+    # Prefer the staticfiles manifest so the hashed copies it writes next to
+    # each original are not processed twice.
+    try:
+        with open(os.path.join(root, 'staticfiles.json')) as f:
+            names = list(json.load(f)['paths'])
+    except (OSError, ValueError, KeyError):
+        names = []
+        for directory, _, files in os.walk(root):
+            if os.path.basename(directory) == 'variants':
+                continue
+            for filename in files:
+                path = os.path.join(directory, filename)
+                names.append(PurePosixPath(os.path.relpath(path, root)).as_posix())
+    return sorted(
+        name for name in names
+        if name.lower().endswith(SOURCE_EXTENSIONS) and 'variants' not in PurePosixPath(name).parts[:-1]
+    )
+
+
+def build_variants(root, widths=DEFAULT_WIDTHS, force=False, log=None):
+    """
+    Write resized AVIF/WebP/JPEG copies of every PNG/JPEG under ``root``
+    (normally STATIC_ROOT) and record them in ``image-variants.json`` next to
+    the staticfiles manifest. Unchanged sources are skipped.
+    """
+    manifest = read_manifest(root)
+    previous = manifest.get('images', {})
+    images = {}
+    formats = _supported_formats()
+
+    for name in _source_names(root):
+        with open(os.path.join(root, name), 'rb') as f:
+            source_hash = hashlib.md5(f.read()).hexdigest()
+
+        record = previous.get(name)
+        if not force and record and record.get('source_hash') == source_hash and all(
+            os.path.exists(os.path.join(root, variant))
+            for variants in record['variants'].values()
+            for _, variant in variants
+        ):
+            images[name] = record
+            continue
+        images[name] = _build_one(root, name, source_hash, widths, formats)
+        if log:
+            log(f'Built variants for {name}')
+
+    manifest = {'version': 1, 'images': images}
+    with open(_manifest_path(root), 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+
+def hashed_names(manifest):
+    """
+    ``{name: hashed name}`` for every variant, for the staticfiles manifest:
+    listed there, WhiteNoise serves them as immutable like other hashed files.
+    """
+    names = {}
+    for record in manifest['images'].values():
+        for variants in record['variants'].values():
+            for _, variant in variants:
+                stem, digest, extension = variant.rsplit('.', 2)
+                names[f'{stem}.{extension}'] = variant
+    return names
+
+
+@lru_cache(maxsize=1)
+def load_manifest():
+    if not settings.STATIC_ROOT:
+        return {}
+    return read_manifest(settings.STATIC_ROOT).get('images', {})
+
+
+def variants_for(name):
+    """The manifest record for a static image, or ``None`` if not built."""
+    return load_manifest().get(name)
+
+
+@receiver(setting_changed)
+def reset_variant_manifest(setting, **kwargs):
+    if setting == 'STATIC_ROOT':
+        load_manifest.cache_clear()
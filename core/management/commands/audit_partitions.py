@@ -0,0 +1,75 @@
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from core.models import AuditEvent
+
+TABLE = AuditEvent._meta.db_table
+PARTITION = re.compile(rf'^{TABLE}_(\d{{6}})$')
+
+
+def add_months(month, months):
+    """``month`` (yyyymm) moved by ``months``."""
+    year, index = divmod(month // 100 * 12 + month % 100 - 1 + months, 12)
+    return year * 100 + index + 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Keep the audit trail partitioned by month. On PostgreSQL, create the partitions for this month and the "
+        "next --ahead months (moving their rows out of the default partition) and drop the partitions of months "
+        "past --keep-months. Elsewhere, delete those months' rows. Safe to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=2, help="Months to create partitions for in advance.")
+        parser.add_argument('--keep-months', type=int, default=13, help="Months kept, counting this one.")
+
+    def handle(self, *args, **options):
+        connection = connections[DEFAULT_DB_ALIAS]
+        current = AuditEvent.month_of(timezone.now())
+        oldest_kept = add_months(current, 1 - options['keep_months'])
+
+        if connection.vendor == 'postgresql':
+            existing = self.partitions(connection)
+            for month in (add_months(current, i) for i in range(options['ahead'] + 1)):
+                if month not in existing:
+                    self.create_partition(connection, month)
+                    self.stdout.write(f"Created {TABLE}_{month}.")
+            for month in sorted(existing):
+                if month < oldest_kept:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f'DROP TABLE "{TABLE}_{month}"')
+                    self.stdout.write(f"Dropped {TABLE}_{month}.")
+
+        # Elsewhere these are all the old rows; on PostgreSQL, the default partition's.
+        deleted, _ = AuditEvent.objects.filter(month__lt=oldest_kept).delete()
+        self.stdout.write(self.style.SUCCESS(f"Keeping {oldest_kept} onwards; deleted {deleted} older events."))
+
+    @staticmethod
+    def partitions(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+                'WHERE i.inhparent = %s::regclass',
+                [TABLE],
+            )
+            names = [name for name, in cursor.fetchall()]
+        return {int(match.group(1)) for match in map(PARTITION.match, names) if match}
+
+    @staticmethod
+    def create_partition(connection, month):
+        name = f'{TABLE}_{month}'
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+            # Attaching fails while the default partition still holds rows of the new range.
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM "{TABLE}_default" WHERE "month" = %s RETURNING *) '
+                f'INSERT INTO "{name}" SELECT * FROM moved',
+                [month],
+            )
+            cursor.execute(
+                f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM ({month}) TO ({month + 1})'
+            )
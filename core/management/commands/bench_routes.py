@@ -0,0 +1,303 @@
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from contextlib import ExitStack
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import URLPattern, get_resolver, reverse
+
+from core import benchmarking
+from core.enums import NotificationAudienceChoices, UserTypeChoices
+from core.middleware import QueryRecorder
+from core.models import Notification, User, VoiceOfExperience
+from mentor import messaging
+from mentor.models import ExpertiseTag, Mentor, Mentorship
+from student.models import StudentProfile
+
+PASSWORD = 'Correct-Horse-42'
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks', 'routes.json')
+# Long-lived responses that never finish on their own.
+SKIPPED_ROUTES = {'notification-stream'}
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    authenticated: bool
+    data: object = None       # callable(iteration) -> POST data
+    before: object = None     # callable(client), untimed
+    after: object = None      # callable(client), untimed
+
+
+def use_sqlite_standin(name=':memory:'):
+    """
+    Point the default alias at a throwaway SQLite database, in memory unless
+    ``name`` is a file, whatever DATABASES says, so runs are comparable
+    between machines and never touch real data.
+    """
+    connections.close_all()
+    connections.settings = connections.configure_settings({
+        DEFAULT_DB_ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': name, 'TEST': {'NAME': name}},
+    })
+    for alias in connections.settings:
+        try:
+            del connections[alias]
+        except AttributeError:
+            pass
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+
+def create_people():
+    """
+    A mentor directory, a student matched with the last mentor and a feed of
+    notifications. Returns the student and their mentor.
+    """
+    tags = ExpertiseTag.objects.bulk_create([
+        ExpertiseTag(name=f'Topic {i}', slug=f'topic-{i}') for i in range(20)
+    ])
+    for i in range(60):
+        user = User.objects.create_user(
+            email=f'mentor{i}@example.com', first_name='Mentor', last_name=str(i),
+            user_type=UserTypeChoices.MENTOR,
+        )
+        mentor = Mentor.objects.create(user=user, department=f'Department {i % 6}', year=2015 + i % 8)
+        mentor.expertise.set(tags[i % 20:i % 20 + 3])
+
+    student = User.objects.create_user(
+        email='student@example.com', first_name='Bench', last_name='Student', password=PASSWORD,
+    )
+    StudentProfile.objects.create(user=student, department='Department 0', year=2)
+    Mentorship.objects.create(student=student, mentor=mentor, score=0.9)
+    Notification.objects.bulk_create(
+        [Notification(title=f'Announcement {i}', audience=NotificationAudienceChoices.ALL) for i in range(40)]
+        + [Notification(recipient=student, title=f'Reminder {i}') for i in range(20)]
+    )
+    return student, mentor
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every named route in campus_connect/urls.py, anonymous and logged in, plus the login and "
+        "signup POST flows, on a throwaway SQLite database. Reports throughput, p50/p95/p99 latency, SQL queries "
+        "and allocations per request and fails if any route regressed against the stored baseline. Latency "
+        "baselines are machine-specific: record one with --save-baseline on the machine that runs the check."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help="Timed requests per scenario and round.")
+        parser.add_argument('--rounds', type=int, default=3,
+                            help="Repeat the timed requests this many times and keep the round with the lowest median.")
+        parser.add_argument('--warmup', type=int, default=5, help="Untimed requests per scenario first.")
+        parser.add_argument('--alloc-iterations', type=int, default=5,
+                            help="Requests per scenario traced for allocations, separately from timing.")
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument('--save-baseline', action='store_true', help="Write the results as the new baseline.")
+        parser.add_argument('--tolerance', type=float, default=benchmarking.LATENCY_TOLERANCE,
+                            help="Allowed relative latency increase over the baseline.")
+        parser.add_argument('--route', action='append', help="Only scenarios for this route name; repeatable.")
+
+    def handle(self, *args, **options):
+        use_sqlite_standin()
+        media_root = tempfile.mkdtemp(prefix='bench-media-')
+        default_cache = tempfile.mkdtemp(prefix='bench-cache-')
+        user_cache = tempfile.mkdtemp(prefix='bench-users-')
+        overrides = {
+            'MEDIA_ROOT': media_root,
+            # Sessions and users served from shared caches, as production is
+            # meant to run.
+            'CACHES': {
+                **settings.CACHES,
+                'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': default_cache},
+                'users': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': user_cache},
+            },
+            'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+            'AUTHENTICATION_BACKENDS': ['core.backends.CachedModelBackend'],
+            # Throttling would turn the POST flows into 429s.
+            'AUTH_THROTTLES': {'login': [], 'signup': []},
+            'SLOW_REQUEST_THRESHOLD': 3600,
+            # Only the stand-in database exists.
+            'DATABASE_REPLICAS': {'ALIASES': []},
+            # The buffered logins and audit events are written once per
+            # BATCH_SIZE requests; the per-request query count is the steady
+            # state without that flush.
+            'ACTIVITY_BUFFER': {'BATCH_SIZE': float('inf'), 'FLUSH_INTERVAL': float('inf')},
+        }
+        try:
+            with override_settings(**overrides):
+                self.create_fixtures()
+                results = {}
+                for scenario in self.scenarios(options['route']):
+                    results[scenario.name] = self.run(scenario, options)
+                    self.report(scenario.name, results[scenario.name])
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+            shutil.rmtree(default_cache, ignore_errors=True)
+            shutil.rmtree(user_cache, ignore_errors=True)
+
+        if options['save_baseline']:
+            os.makedirs(os.path.dirname(options['baseline']), exist_ok=True)
+            benchmarking.save_baseline(options['baseline'], results, options['iterations'])
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['baseline']}."))
+            return
+        if not os.path.exists(options['baseline']):
+            self.stdout.write(f"No baseline at {options['baseline']}; run with --save-baseline to record one.")
+            return
+
+        baseline = benchmarking.load_baseline(options['baseline'])
+        for name in results.keys() - baseline.keys():
+            self.stdout.write(f"{name}: not in the baseline")
+        regressions = benchmarking.compare(results, baseline, latency_tolerance=options['tolerance'])
+        if regressions:
+            raise CommandError("Regressions against the baseline:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}."))
+
+    def create_fixtures(self):
+        self.user, mentor = create_people()
+        for i in range(8):
+            recording = VoiceOfExperience(speaker_name=f'Speaker {i}', topic='Finding a mentor', position=i)
+            recording.audio.save(f'talk{i}.m4a', ContentFile(bytes(range(256)) * 256))
+
+        # A long conversation, so history pages and sends are measured where
+        # they would degrade.
+        thread = messaging.thread_between(self.user, mentor.user)
+        participant = messaging.participation(self.user, thread.pk)
+        for i in range(2000):
+            messaging.send(participant, f'Message {i}')
+        self.route_kwargs = {
+            'voice-recording': {'pk': recording.pk},
+            'thread': {'pk': thread.pk},
+            'start-thread': {'user_pk': mentor.user_id},
+        }
+
+    def scenarios(self, only=None):
+        scenarios = []
+        for pattern in get_resolver().url_patterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name or pattern.name in SKIPPED_ROUTES:
+                continue
+            if only and pattern.name not in only:
+                continue
+            path = reverse(pattern.name, kwargs=self.route_kwargs.get(pattern.name))
+            for authenticated in (False, True):
+                audience = 'user' if authenticated else 'anonymous'
+                if pattern.name == 'logout':
+                    # Logging out ends the session, so log in again before each one.
+                    scenarios.append(Scenario(
+                        f'POST logout [{audience}]', 'POST', path, authenticated,
+                        before=self.log_in if authenticated else None,
+                    ))
+                else:
+                    scenarios.append(Scenario(f'GET {pattern.name} [{audience}]', 'GET', path, authenticated))
+
+        if not only or 'login' in only:
+            scenarios.append(Scenario(
+                'POST login [anonymous]', 'POST', reverse('login'), False,
+                data=lambda i: {'username': self.user.email, 'password': PASSWORD},
+                after=lambda client: client.logout(),
+            ))
+        if not only or 'thread' in only:
+            path = reverse('thread', kwargs=self.route_kwargs['thread'])
+            scenarios.append(Scenario(
+                'POST thread [user]', 'POST', path, True, data=lambda i: {'body': f'Benchmark message {i}'},
+            ))
+        if not only or 'signup' in only:
+            scenarios.append(Scenario(
+                'POST signup [anonymous]', 'POST', reverse('signup'), False,
+                data=self.signup_data,
+                after=lambda client: client.logout(),
+            ))
+        return scenarios
+
+    def log_in(self, client):
+        client.force_login(self.user)
+
+    def signup_data(self, i):
+        self.signups = getattr(self, 'signups', 0) + 1
+        username = f'bench{self.signups}'
+        return {
+            'username': username,
+            'email': f'{username}@example.com',
+            'password': PASSWORD,
+            'confirm_password': PASSWORD,
+            'user_type': UserTypeChoices.STUDENT,
+        }
+
+    def request(self, client, scenario, i):
+        if scenario.method == 'POST':
+            response = client.post(scenario.path, scenario.data(i) if scenario.data else {})
+        else:
+            response = client.get(scenario.path)
+        if response.streaming:
+            b''.join(response.streaming_content)
+            response.close()
+        if response.status_code >= 500:
+            raise CommandError(f"{scenario.name} returned {response.status_code}")
+        return response
+
+    def run(self, scenario, options):
+        client = Client(HTTP_HOST='localhost')
+        if scenario.authenticated:
+            self.log_in(client)
+
+        def one(i, measure):
+            if scenario.before:
+                scenario.before(client)
+            result = measure(lambda: self.request(client, scenario, i))
+            if scenario.after:
+                scenario.after(client)
+            return result
+
+        for i in range(options['warmup']):
+            one(i, lambda call: call())
+
+        rounds, queries = [], []
+
+        def timed(call):
+            recorder = QueryRecorder(keep=0)
+            with ExitStack() as stack:
+                for db in connections.all():
+                    stack.enter_context(db.execute_wrapper(recorder))
+                started = time.perf_counter()
+                call()
+                rounds[-1].append(time.perf_counter() - started)
+            queries.append(recorder.count)
+
+        # Other load on the machine comes in bursts; the quietest round is
+        # the one closest to the code's own cost.
+        for _ in range(options['rounds']):
+            rounds.append([])
+            for i in range(options['iterations']):
+                one(i, timed)
+        latencies = min(rounds, key=lambda latencies: sorted(latencies)[len(latencies) // 2])
+
+        allocations = []
+
+        def traced(call):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            call()
+            allocations.append(tracemalloc.get_traced_memory()[1] - before)
+
+        tracemalloc.start()
+        try:
+            for i in range(options['alloc_iterations']):
+                one(i, traced)
+        finally:
+            tracemalloc.stop()
+        # Requests run back to back, so throughput excludes the untimed hooks.
+        return benchmarking.summarise(latencies, sum(latencies), queries, allocations)
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:<42} {result['throughput']:8.1f} req/s  p50 {result['p50_ms']:7.1f}  p95 {result['p95_ms']:7.1f}  "
+            f"p99 {result['p99_ms']:7.1f} ms  {result['queries']:3d} queries  {result['alloc_kb']:8.1f} KiB"
+        )
@@ -0,0 +1,134 @@
+import os
+import random
+import resource
+import string
+import tempfile
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from core.benchmarking import percentile
+from core.search_index import SearchIndex
+
+KINDS = ('exact', 'two words', 'three words', 'prefix', 'typo')
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the site search index (core.search_index) on synthetic documents, without the database: "
+        "build, freeze, snapshot save and load, query latency per kind of query, and updates on top of a "
+        "loaded snapshot. Words follow a Zipf distribution like natural text."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=1_000_000)
+        parser.add_argument('--vocabulary', type=int, default=200_000, help="Distinct words.")
+        parser.add_argument('--words', type=int, default=40, help="Mean words per document.")
+        parser.add_argument('--queries', type=int, default=300, help="Queries per kind.")
+        parser.add_argument('--updates', type=int, default=10_000, help="Documents added after loading.")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        self.random = random.Random(options['seed'])
+        self.words = self.vocabulary(options['vocabulary'])
+        weights = 1 / np.arange(1, len(self.words) + 1) ** 1.07
+        self.probabilities = weights / weights.sum()
+
+        index = SearchIndex()
+        started = time.perf_counter()
+        for pk, text in enumerate(self.documents(rng, options['documents'], options['words']), 1):
+            index.add(pk % 3, pk, text, pk % 3)
+        added = time.perf_counter()
+        index.freeze()
+        frozen = time.perf_counter()
+        self.stdout.write(
+            f"Indexed {len(index)} documents ({len(self.words)} words, ~{options['words']} per document) "
+            f"in {added - started:.1f}s, froze in {frozen - added:.1f}s."
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'index.npz')
+            started = time.perf_counter()
+            index.save(path)
+            saved = time.perf_counter()
+            del index
+            index = SearchIndex.load(path)
+            loaded = time.perf_counter()
+            self.stdout.write(
+                f"Snapshot {os.path.getsize(path) / 2 ** 20:.0f} MiB: saved in {saved - started:.2f}s, "
+                f"loaded in {loaded - saved:.2f}s."
+            )
+
+        queries = {kind: [self.query(kind) for _ in range(options['queries'])] for kind in KINDS}
+        self.stdout.write("Queries on the loaded snapshot:")
+        self.time_queries(index, queries)
+
+        # First lookup by (group, pk) after a load builds the id map.
+        started = time.perf_counter()
+        index.remove(0, 3)
+        self.stdout.write(f"First update after load: {(time.perf_counter() - started) * 1000:.0f} ms")
+        latencies = []
+        texts = self.documents(rng, options['updates'], options['words'])
+        for pk, text in enumerate(texts, options['documents'] + 1):
+            # Half new documents, half edits of existing ones.
+            started = time.perf_counter()
+            if not pk % 2:
+                pk = self.random.randrange(1, options['documents'])
+            index.add(pk % 3, pk, text, pk % 3)
+            latencies.append(time.perf_counter() - started)
+        self.stdout.write(f"{len(latencies)} updates: {self.latency(latencies)}")
+        self.stdout.write("Queries after the updates (unfrozen postings):")
+        self.time_queries(index, queries)
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(self.style.SUCCESS(f"Peak RSS {peak:.0f} MiB."))
+
+    def vocabulary(self, size):
+        words = set()
+        while len(words) < size:
+            length = min(max(int(self.random.gauss(7, 2)), 3), 14)
+            words.add(''.join(self.random.choices(string.ascii_lowercase, k=length)))
+        return sorted(words, key=lambda word: self.random.random())
+
+    def documents(self, rng, count, mean_words, chunk=10_000):
+        for start in range(0, count, chunk):
+            lengths = rng.poisson(mean_words, min(chunk, count - start)) + 1
+            tokens = rng.choice(len(self.words), size=int(lengths.sum()), p=self.probabilities).tolist()
+            position = 0
+            for length in lengths.tolist():
+                yield ' '.join(self.words[token] for token in tokens[position:position + length])
+                position += length
+
+    def word(self):
+        # Skip the stop-word head of the distribution: people search for rarer words.
+        return self.words[min(int(self.random.paretovariate(0.5)) * 20, len(self.words) - 1)]
+
+    def query(self, kind):
+        if kind == 'exact':
+            return self.word()
+        if kind == 'two words':
+            return f'{self.word()} {self.word()}'
+        if kind == 'three words':
+            return f'{self.word()} {self.word()} {self.word()}'
+        word = self.word()
+        if kind == 'prefix':
+            return word[:max(3, len(word) // 2)]
+        position = self.random.randrange(len(word))
+        return word[:position] + self.random.choice(string.ascii_lowercase.replace(word[position], '')) + word[position + 1:]
+
+    def time_queries(self, index, queries):
+        for kind, texts in queries.items():
+            latencies, hits = [], 0
+            for text in texts:
+                started = time.perf_counter()
+                results = index.search(text, audiences={0, 1}, limit=20)
+                latencies.append(time.perf_counter() - started)
+                hits += bool(results)
+            self.stdout.write(f"  {kind:<12} {self.latency(latencies)}  {hits / len(texts):.0%} with results")
+
+    @staticmethod
+    def latency(latencies):
+        latencies = sorted(seconds * 1000 for seconds in latencies)
+        return '  '.join(f"p{n} {percentile(latencies, n / 100):7.2f} ms" for n in (50, 95, 99))
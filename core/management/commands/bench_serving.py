@@ -0,0 +1,182 @@
+import asyncio
+import importlib.util
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+
+from core import benchmarking
+from core.management.commands.bench_routes import create_people, use_sqlite_standin
+
+DEFAULT_ROUTES = ['/', '/accounts/profile/', '/mentors/', '/notifications/', '/login/']
+
+# Imported by the servers in place of the project settings.
+SETTINGS_TEMPLATE = """
+from {settings_module} import *  # noqa
+
+DATABASES = {{'default': {{'ENGINE': 'django.db.backends.sqlite3', 'NAME': {database!r}}}}}
+DATABASE_REPLICAS = {{'ALIASES': []}}
+DEBUG = False
+SLOW_REQUEST_THRESHOLD = 3600
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent-request throughput of the WSGI deployment (gunicorn) with the ASGI one (uvicorn, "
+        "ASYNC_SERVING on) for the hot routes. Both serve the same SQLite file of fixtures on this machine; a "
+        "keep-alive client holds --concurrency requests in flight for --duration seconds per route."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=32, help="Requests in flight at once.")
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds of load per route and server.")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Server processes.")
+        parser.add_argument('--threads', type=int, default=4, help="Threads per gunicorn worker.")
+        parser.add_argument('--route', action='append', help="Path to load; repeatable. Defaults to the hot views.")
+        parser.add_argument('--anonymous', action='store_true', help="Send no session cookie.")
+
+    def handle(self, *args, **options):
+        for module in ('gunicorn', 'uvicorn'):
+            if importlib.util.find_spec(module) is None:
+                raise CommandError(f"{module} is not installed.")
+
+        workdir = tempfile.mkdtemp(prefix='bench-serving-')
+        try:
+            database = os.path.join(workdir, 'bench.sqlite3')
+            use_sqlite_standin(database)
+            student, _ = create_people()
+            client = Client()
+            client.force_login(student)
+            cookie = '' if options['anonymous'] else f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+            connections.close_all()
+
+            with open(os.path.join(workdir, 'bench_serving_settings.py'), 'w') as f:
+                f.write(SETTINGS_TEMPLATE.format(settings_module=settings.SETTINGS_MODULE, database=database))
+            env = {
+                **os.environ,
+                'DJANGO_SETTINGS_MODULE': 'bench_serving_settings',
+                'PYTHONPATH': os.pathsep.join(filter(None, [workdir, os.environ.get('PYTHONPATH')])),
+            }
+
+            routes = options['route'] or DEFAULT_ROUTES
+            for name, command, extra_env in self.servers(options):
+                port = free_port()
+                server = subprocess.Popen(
+                    [sys.executable, '-m', *(arg.format(port=port) for arg in command)],
+                    env={**env, **extra_env}, cwd=settings.BASE_DIR,
+                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                )
+                try:
+                    wait_for(server, port)
+                    self.stdout.write(self.style.MIGRATE_HEADING(f"{name}:"))
+                    for path in routes:
+                        result = asyncio.run(load(port, path, cookie, options['concurrency'], options['duration']))
+                        self.report(path, result)
+                finally:
+                    server.terminate()
+                    server.wait(10)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def servers(self, options):
+        workers = str(options['workers'])
+        yield (
+            f"WSGI: gunicorn, {workers} worker(s) x {options['threads']} thread(s)",
+            ['gunicorn', 'campus_connect.wsgi:application', '--bind', '127.0.0.1:{port}',
+             '--workers', workers, '--threads', str(options['threads'])],
+            {'ASYNC_SERVING': 'False'},
+        )
+        yield (
+            f"ASGI: uvicorn, {workers} worker(s), async views",
+            ['uvicorn', 'campus_connect.asgi:application', '--host', '127.0.0.1', '--port', '{port}',
+             '--workers', workers, '--no-access-log', '--log-level', 'warning'],
+            {'ASYNC_SERVING': 'True'},
+        )
+
+    def report(self, path, result):
+        self.stdout.write(
+            f"  {path:<22} {result['throughput']:8.1f} req/s  p50 {result['p50_ms']:7.1f}  p99 {result['p99_ms']:7.1f} ms"
+            f"  {result['requests']:6d} ok  {result['errors']:4d} errors"
+        )
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(server, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise CommandError(f"Server exited:\n{server.stderr.read().decode()[-2000:]}")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError(f"Server did not listen on port {port} within {timeout}s.")
+
+
+async def load(port, path, cookie, concurrency, duration):
+    """
+    ``concurrency`` keep-alive connections each sending ``GET path`` back to
+    back for ``duration`` seconds. Non-2xx/3xx answers count as errors.
+    """
+    request = f"GET {path} HTTP/1.1\r\nHost: localhost\r\nCookie: {cookie}\r\n\r\n".encode()
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def connection():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                writer.write(request)
+                status, close = await read_response(reader)
+                if 200 <= status < 400:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+                if close:
+                    writer.close()
+                    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(connection() for _ in range(concurrency)))
+    result = benchmarking.summarise(latencies, time.perf_counter() - started, [], [])
+    result['errors'] = errors
+    return result
+
+
+async def read_response(reader):
+    """Status code and whether the server is closing the connection."""
+    head = await reader.readuntil(b'\r\n\r\n')
+    status_line, *lines = head.decode('latin-1').split('\r\n')
+    headers = {}
+    for line in lines:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    if headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(int(headers.get('content-length', 0)))
+    return int(status_line.split()[1]), headers.get('connection', '').lower() == 'close'
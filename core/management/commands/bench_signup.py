@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.password_validation import validate_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from core.forms import SignupForm
+from core.management.commands.bench_routes import use_sqlite_standin
+from core.models import User
+
+
+def legacy_signup(data):
+    """The signup path before the rework: double validation, two uniqueness
+    queries and hashing on the request thread."""
+    validate_password(data['password'])
+    validate_password(data['password'])
+    User.objects.filter(username=data['username']).exists()
+    User.objects.filter(email=data['email']).exists()
+    user = User(username=data['username'], email=data['email'], user_type=data['user_type'])
+    user.set_password(data['password'])
+    user.save()
+
+
+def pipeline_signup(data):
+    form = SignupForm(data)
+    if not form.is_valid():
+        raise ValueError(form.errors.as_json())
+    form.save()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark signups/sec for the legacy and current signup paths, against a throwaway SQLite database "
+        "whatever DATABASES says."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--signups', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=8)
+
+    def handle(self, *args, **options):
+        # A file rather than memory, so the worker threads' connections share it.
+        directory = tempfile.mkdtemp(prefix='bench-signup-')
+        try:
+            use_sqlite_standin(os.path.join(directory, 'db.sqlite3'))
+            prefix = f"bench_{uuid.uuid4().hex[:6]}"
+            # Only the stand-in database exists.
+            with override_settings(DATABASE_REPLICAS={'ALIASES': []}):
+                for name, signup in (('before', legacy_signup), ('after', pipeline_signup)):
+                    rate = self.run(signup, f"{prefix}_{name[0]}", options['signups'], options['concurrency'])
+                    self.stdout.write(f"{name:>6}: {rate:8.1f} signups/sec")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def run(self, signup, prefix, count, concurrency):
+        def one(i):
+            try:
+                signup({
+                    'username': f"{prefix}_{i}",
+                    'email': f"{prefix}_{i}@example.com",
+                    'password': 'Correct-Horse-42',
+                    'confirm_password': 'Correct-Horse-42',
+                    'user_type': 'STUDENT',
+                })
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(one, range(count)))
+        return count / (time.perf_counter() - started)
@@ -0,0 +1,125 @@
+import random
+import statistics
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.models import User
+from core.throttling import DEFAULT_AUTH_THROTTLES, reset_throttles
+
+PASSWORD = 'Correct-Horse-42'
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test login under a credential-stuffing burst: legitimate users log in while attacker threads post "
+        "wrong passwords from a handful of addresses at a fixed offered rate. Reports legitimate p50/p99 with no attack, with the attack "
+        "and throttling off, and with the attack and throttling on. Creates and then deletes bench_* users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds per scenario.")
+        parser.add_argument('--users', type=int, default=2, help="Legitimate user threads.")
+        parser.add_argument('--attackers', type=int, default=8, help="Attacker threads.")
+        parser.add_argument('--attack-rate', type=float, default=50.0,
+                            help="Attempts per second offered by all attackers together.")
+        parser.add_argument('--attacker-ips', type=int, default=4)
+        parser.add_argument('--think-time', type=float, default=0.5, help="Pause between a user's logins.")
+        parser.add_argument('--ip-rate', help="Per-IP login rate for the throttled run, e.g. 10/m. "
+                                              "Defaults to AUTH_THROTTLES.")
+
+    def handle(self, *args, **options):
+        prefix = f"bench_{uuid.uuid4().hex[:6]}"
+        self.emails = [f"{prefix}_{i}@example.com" for i in range(options['users'])]
+        for email in self.emails:
+            User.objects.create_user(email=email, first_name='Bench', password=PASSWORD, username=email.split('@')[0])
+        self.options = options
+        try:
+            scenarios = (
+                ('no attack', 0, True),
+                ('attack, throttling off', options['attackers'], False),
+                ('attack, throttling on', options['attackers'], True),
+            )
+            rules = {**DEFAULT_AUTH_THROTTLES, **settings.AUTH_THROTTLES}
+            if options['ip_rate']:
+                rules['login'] = [('ip', options['ip_rate']), *[rule for rule in rules['login'] if rule[0] != 'ip']]
+            for name, attackers, throttled in scenarios:
+                overrides = {'AUTH_THROTTLES': rules if throttled else {'login': [], 'signup': []}}
+                # Every request is slow here; keep the slow-request log quiet.
+                with override_settings(SLOW_REQUEST_THRESHOLD=3600, **overrides):
+                    reset_throttles(setting='AUTH_THROTTLES')
+                    legit, attack = self.run(attackers)
+                self.report(name, legit, attack)
+        finally:
+            User.objects.filter(username__startswith=prefix).delete()
+
+    def run(self, attackers):
+        stop = threading.Event()
+        legit, attack = [], []
+
+        def user(index):
+            client = Client(HTTP_HOST='localhost')
+            email = self.emails[index]
+            n = 0
+            try:
+                while not stop.is_set():
+                    n += 1
+                    started = time.perf_counter()
+                    response = client.post(
+                        reverse('login'), {'username': email, 'password': PASSWORD},
+                        REMOTE_ADDR=f'10.1.{index}.{n % 250 + 1}',
+                    )
+                    legit.append((time.perf_counter() - started, response.status_code))
+                    client.logout()
+                    stop.wait(self.options['think_time'])
+            finally:
+                connection.close()
+
+        def attacker(index):
+            client = Client(HTTP_HOST='localhost')
+            rng = random.Random(index)
+            interval = attackers / self.options['attack_rate']
+            next_at = time.perf_counter() + rng.random() * interval
+            try:
+                while not stop.wait(max(next_at - time.perf_counter(), 0)):
+                    next_at += interval
+                    started = time.perf_counter()
+                    # A stuffing list: mostly other accounts, sometimes a real one.
+                    email = rng.choice(self.emails) if rng.random() < 0.2 else f'victim{rng.randrange(10 ** 6)}@example.com'
+                    response = client.post(
+                        reverse('login'), {'username': email, 'password': uuid.uuid4().hex},
+                        REMOTE_ADDR=f'203.0.113.{index % self.options["attacker_ips"] + 1}',
+                    )
+                    attack.append((time.perf_counter() - started, response.status_code))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=user, args=(i,)) for i in range(self.options['users'])]
+        threads += [threading.Thread(target=attacker, args=(i,)) for i in range(attackers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(self.options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return legit, attack
+
+    def report(self, name, legit, attack):
+        latencies = sorted(seconds * 1000 for seconds, _ in legit)
+        ok = sum(1 for _, status in legit if status == 302)
+        line = f"{name:<24} legit logins {ok}/{len(legit)}"
+        if latencies:
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            line += f"  p50 {statistics.median(latencies):7.1f} ms  p99 {p99:7.1f} ms"
+        if attack:
+            rejected = sum(1 for _, status in attack if status == 429)
+            rate = len(attack) / self.options['duration']
+            line += f"  | attack served {rate:6.1f} req/s, {rejected / len(attack):.0%} rejected with 429"
+        self.stdout.write(line)
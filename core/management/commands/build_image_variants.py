@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestFilesMixin
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand, CommandError
+
+from core.images import DEFAULT_WIDTHS, build_variants, hashed_names
+
+
+class Command(BaseCommand):
+    help = (
+        "Build resized AVIF/WebP/JPEG variants of the images in STATIC_ROOT and add them to the staticfiles "
+        "manifest. collectstatic does this; run it after updating a committed STATIC_ROOT by hand."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--widths', default=','.join(map(str, DEFAULT_WIDTHS)),
+                            help="Comma-separated target widths in pixels.")
+        parser.add_argument('--force', action='store_true', help="Rebuild even if the source is unchanged.")
+
+    def handle(self, *args, **options):
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            raise CommandError("Pillow is required to build image variants: pip install Pillow")
+        if not settings.STATIC_ROOT:
+            raise CommandError("STATIC_ROOT is not set.")
+        widths = tuple(int(w) for w in options['widths'].split(',') if w.strip())
+        manifest = build_variants(
+            settings.STATIC_ROOT, widths=widths, force=options['force'],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        storage = storages['staticfiles']
+        if isinstance(storage, ManifestFilesMixin):
+            storage.hashed_files.update(hashed_names(manifest))
+            storage.save_manifest()
+        self.stdout.write(self.style.SUCCESS(f"{len(manifest['images'])} images in the variant manifest."))
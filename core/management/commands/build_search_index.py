@@ -0,0 +1,27 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the site search index from the database and write it to SEARCH_INDEX['SNAPSHOT'], which processes "
+        "start from instead of rebuilding. Run it on deploy and from cron, more often than SNAPSHOT_MAX_AGE."
+    )
+
+    def handle(self, *args, **options):
+        path = search.get_config()['SNAPSHOT']
+        if not path:
+            raise CommandError("SEARCH_INDEX['SNAPSHOT'] is not set.")
+        started = time.perf_counter()
+        index = search.build_index()
+        built = time.perf_counter()
+        index.save(path)
+        saved = time.perf_counter()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(index)} documents in {built - started:.1f}s; wrote {path} "
+            f"({os.path.getsize(path) / 2 ** 20:.1f} MiB) in {saved - built:.1f}s."
+        ))
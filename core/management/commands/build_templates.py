@@ -0,0 +1,62 @@
+import json
+import os
+import shutil
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bundling import build_template, content_hash, read_sources, stale_templates
+
+SOURCE_DIR = os.path.join(settings.BASE_DIR, 'templates')
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the inline CSS and JS of the templates in templates/ into content-hashed static bundles and minify "
+        "the HTML, into TEMPLATE_BUILD_DIR. Settings prefer the built templates whenever that directory exists, "
+        "so rebuild after editing a template and before collectstatic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Only fail if the build is out of date.")
+
+    def handle(self, *args, **options):
+        build_dir = settings.TEMPLATE_BUILD_DIR
+        if options['check']:
+            stale = stale_templates(SOURCE_DIR, build_dir)
+            if stale:
+                raise CommandError(f"Built templates are out of date: {', '.join(stale)}")
+            self.stdout.write(self.style.SUCCESS("Built templates are up to date."))
+            return
+
+        template_dir = os.path.join(build_dir, 'templates')
+        static_dir = os.path.join(build_dir, 'static')
+        for directory in (template_dir, static_dir):
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory)
+
+        manifest, bundles = {}, {}
+        total_before = total_after = 0
+        for name, source in read_sources(SOURCE_DIR):
+            html, template_bundles = build_template(source)
+            bundles.update(template_bundles)
+            manifest[name] = content_hash(source)
+            with open(os.path.join(template_dir, name), 'w', encoding='utf-8') as f:
+                f.write(html)
+            before, after = len(source.encode()), len(html.encode())
+            total_before += before
+            total_after += after
+            self.stdout.write(f"  {name:<28} {before / 1024:7.1f} KiB -> {after / 1024:7.1f} KiB")
+
+        for path, content in bundles.items():
+            os.makedirs(os.path.dirname(os.path.join(static_dir, path)), exist_ok=True)
+            with open(os.path.join(static_dir, path), 'w', encoding='utf-8') as f:
+                f.write(content)
+        with open(os.path.join(build_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump({'templates': manifest}, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(manifest)} templates, {total_before / 1024:.1f} KiB -> {total_after / 1024:.1f} KiB, "
+            f"{len(bundles)} bundles in {build_dir}."
+        ))
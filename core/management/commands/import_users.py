@@ -0,0 +1,255 @@
+import csv
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.backends.base.operations import BaseDatabaseOperations
+from django.db.models import Q
+
+from core.enums import UserTypeChoices
+from core.forms import validate_username
+from core.models import User
+from core.page_cache import invalidate_page
+from core.profiles import new_profile
+from mentor.models import Mentor
+from mentor.signals import invalidate_matching
+
+
+def _init_worker(settings_module):
+    # Needed under the "spawn" start method; a no-op for forked workers.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+class MalformedRow:
+    """A JSONL line that does not parse; rejected like any invalid row."""
+
+    def __init__(self, line, reason):
+        self.line = line
+        self.reason = reason
+
+
+def read_rows(path, fmt):
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield MalformedRow(line.rstrip('\n'), f"Invalid JSON: {e}")
+
+
+def clean_field(field, value, instance):
+    """
+    ``field.clean()``, plus the portable range of integer columns: SQLite
+    reports none, so the field's own validators don't check it there.
+    """
+    value = field.clean(value, instance)
+    low, high = BaseDatabaseOperations.integer_field_ranges.get(field.get_internal_type(), (None, None))
+    if value is not None and low is not None and not low <= value <= high:
+        raise ValidationError(f"Ensure this value is between {low} and {high}.")
+    return value
+
+
+class Command(BaseCommand):
+    help = (
+        "Import students and mentors from a CSV or JSONL file with columns email, first_name, last_name, "
+        "username, password, user_type, department and year. Rows are validated, passwords hashed across a "
+        "process pool and users written with bulk_create, each with the student or mentor profile signup "
+        "would create. Progress is checkpointed after "
+        "every batch so an interrupted import can be resumed with --resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=('csv', 'jsonl'), help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Hashing processes.")
+        parser.add_argument('--validate-passwords', action='store_true',
+                            help="Run AUTH_PASSWORD_VALIDATORS on supplied passwords.")
+        parser.add_argument('--rejects', help="Write rejected rows with the reason to this JSONL file.")
+        parser.add_argument('--resume', action='store_true', help="Skip rows committed by a previous run.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        self.batch_size = options['batch_size']
+        self.validate_passwords = options['validate_passwords']
+        self.workers = options['workers']
+        self.checkpoint = f'{path}.import-progress'
+
+        done = self.read_checkpoint() if options['resume'] else 0
+        rows = islice(read_rows(path, fmt), done, None)
+        rejects = open(options['rejects'], 'a', encoding='utf-8') if options['rejects'] else None
+        self.totals = {'created': 0, 'skipped': 0, 'rejected': 0}
+        started = time.perf_counter()
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'campus_connect.settings'),),
+            ) as pool:
+                while True:
+                    batch = list(islice(rows, self.batch_size))
+                    if not batch:
+                        break
+                    self.import_batch(batch, done, pool, rejects)
+                    done += len(batch)
+                    self.write_checkpoint(done)
+                    rate = done / (time.perf_counter() - started) if done else 0
+                    self.stdout.write(
+                        f"{done} rows: {self.totals['created']} created, {self.totals['skipped']} already existed, "
+                        f"{self.totals['rejected']} rejected ({rate:.0f} rows/sec)"
+                    )
+        finally:
+            if rejects:
+                rejects.close()
+
+        # Nothing was checkpointed if the file had no rows.
+        if os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.totals['created']} users in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.0f} rows/sec)."
+        ))
+
+    def read_checkpoint(self):
+        try:
+            with open(self.checkpoint) as f:
+                return json.load(f)['rows_done']
+        except FileNotFoundError:
+            return 0
+        except (ValueError, KeyError):
+            raise CommandError(f"Unreadable checkpoint {self.checkpoint}; delete it to start over.")
+
+    def write_checkpoint(self, rows_done):
+        temporary = f'{self.checkpoint}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump({'rows_done': rows_done}, f)
+        os.replace(temporary, self.checkpoint)
+
+    def import_batch(self, batch, offset, pool, rejects):
+        valid = []
+        for number, row in enumerate(batch, start=offset + 1):
+            try:
+                valid.append(self.clean_row(row))
+            except ValidationError as e:
+                self.reject(rejects, number, row, ' '.join(e.messages))
+
+        # One query for both unique columns, plus duplicates within the batch.
+        existing = list(User.objects.filter(
+            Q(email__in=[row['email'] for row in valid]) | Q(username__in=[row['username'] for row in valid])
+        ).values_list('email', 'username'))
+        taken_emails = {email for email, _ in existing}
+        taken_usernames = {username for _, username in existing}
+        fresh = []
+        for row in valid:
+            if row['email'] in taken_emails or row['username'] in taken_usernames:
+                self.totals['skipped'] += 1
+                continue
+            taken_emails.add(row['email'])
+            taken_usernames.add(row['username'])
+            fresh.append(row)
+
+        to_hash = [row['password'] for row in fresh if row['password']]
+        hashed = iter(pool.map(make_password, to_hash, chunksize=max(1, len(to_hash) // (self.workers * 4))))
+        users = [
+            User(
+                email=row['email'],
+                username=row['username'],
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+                user_type=row['user_type'],
+                password=next(hashed) if row['password'] else make_password(None),
+            )
+            for row in fresh
+        ]
+
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=self.batch_size)
+            if any(user.pk is None for user in users):
+                by_email = dict(User.objects.filter(
+                    email__in=[user.email for user in users],
+                ).values_list('email', 'pk'))
+                for user in users:
+                    user.pk = by_email[user.email]
+            # Every user gets the profile signup would have given them.
+            profiles = defaultdict(list)
+            for user, row in zip(users, fresh):
+                profile = new_profile(user, department=row['department'], year=row['year'])
+                profiles[type(profile)].append(profile)
+            for model, rows in profiles.items():
+                model.objects.bulk_create(rows, batch_size=self.batch_size)
+            if profiles[Mentor]:
+                # bulk_create sends no signals
+                invalidate_page('mentors.html')
+                invalidate_matching()
+        self.totals['created'] += len(users)
+
+    def clean_row(self, row):
+        if isinstance(row, MalformedRow):
+            raise ValidationError(row.reason)
+        if not isinstance(row, dict):
+            raise ValidationError(f"Expected a JSON object, got {type(row).__name__}.")
+        email = User.objects.normalize_email((row.get('email') or '').strip())
+        validate_email(email)
+        username = (row.get('username') or '').strip() or email.split('@')[0]
+        validate_username(username)
+        first_name = (row.get('first_name') or '').strip()
+        last_name = (row.get('last_name') or '').strip()
+        for label, value in (('username', username), ('first_name', first_name), ('last_name', last_name)):
+            if len(value) > 30:
+                raise ValidationError(f"{label} is longer than 30 characters.")
+
+        user_type = (row.get('user_type') or UserTypeChoices.STUDENT).strip().upper()
+        if user_type not in UserTypeChoices.values:
+            raise ValidationError(f"Unknown user_type {user_type!r}.")
+
+        password = row.get('password') or ''
+        if password and self.validate_passwords:
+            validate_password(password, user=User(email=email, username=username, first_name=first_name))
+
+        # Checked against the profile's columns, so one bad value can't fail
+        # the whole batch's INSERT.
+        profile = new_profile(User(user_type=user_type))
+        profile_fields = {}
+        for name in ('department', 'year'):
+            value = str(row.get(name) or '').strip()
+            if not value:
+                profile_fields[name] = profile._meta.get_field(name).get_default()
+                continue
+            try:
+                profile_fields[name] = clean_field(profile._meta.get_field(name), value, profile)
+            except ValidationError as e:
+                raise ValidationError(f"{name}: {' '.join(e.messages)}")
+        return {
+            'email': email,
+            'username': username,
+            'first_name': first_name,
+            'last_name': last_name,
+            'user_type': user_type,
+            'password': password,
+            **profile_fields,
+        }
+
+    def reject(self, rejects, number, row, reason):
+        self.totals['rejected'] += 1
+        if rejects:
+            if isinstance(row, MalformedRow):
+                row = row.line
+            elif isinstance(row, dict):
+                row = {key: value for key, value in row.items() if key != 'password'}
+            rejects.write(json.dumps({'row': number, 'reason': reason, 'data': row}) + '\n')
@@ -0,0 +1,82 @@
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: import the WSGI app and serve one request.
+FIRST_RESPONSE_SCRIPT = """
+import io, sys, time
+started = time.perf_counter()
+from campus_connect.wsgi import application
+imported = time.perf_counter()
+status = []
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[1], 'QUERY_STRING': '',
+    'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+    'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+}
+body = b''.join(application(environ, lambda s, h, e=None: status.append(s)))
+done = time.perf_counter()
+print(status[0].split()[0], (imported - started) * 1000, (done - started) * 1000)
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile serverless cold starts: the slowest imports behind campus_connect.wsgi, "
+        "and time-to-first-response for the default and LEAN_SERVING modes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters per mode.")
+        parser.add_argument('--path', default='/about-us/', help="Path requested as the first response.")
+        parser.add_argument('--top', type=int, default=15, help="How many imports to list.")
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)}
+        env.pop('STARTUP_PROFILE', None)
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Import time by top-level package (self time):"))
+        for microseconds, name in self.import_times(env)[:options['top']]:
+            self.stdout.write(f"  {microseconds / 1000:8.1f} ms  {name}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Time to first response for {options['path']}:"))
+        for mode, lean in (('default', 'False'), ('lean', 'True')):
+            runs = [self.first_response({**env, 'LEAN_SERVING': lean}, options['path']) for _ in range(options['runs'])]
+            imports = statistics.median(run[0] for run in runs)
+            totals = [run[1] for run in runs]
+            self.stdout.write(
+                f"  {mode:<8} import {imports:7.1f} ms   first response median {statistics.median(totals):7.1f} ms"
+                f"  min {min(totals):7.1f} ms"
+            )
+
+    def import_times(self, env):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import campus_connect.wsgi'],
+            env=env, cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr[-2000:])
+        by_package = defaultdict(int)
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            own, _, name = line[len('import time:'):].split('|')
+            by_package[name.strip().split('.')[0]] += int(own)
+        return sorted(((total, name) for name, total in by_package.items()), reverse=True)
+
+    def first_response(self, env, path):
+        result = subprocess.run(
+            [sys.executable, '-c', FIRST_RESPONSE_SCRIPT, path],
+            env=env, cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr[-2000:])
+        status, imported, total = result.stdout.split()[-3:]
+        if not status.startswith(('2', '3')):
+            raise CommandError(f"{path} answered {status}")
+        return float(imported), float(total)
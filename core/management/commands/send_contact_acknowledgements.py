@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.contact_queue import get_contact_queue
+from core.models import ContactMessage
+
+
+class Command(BaseCommand):
+    help = (
+        "Send acknowledgement emails for contact messages that do not have one yet: those whose delivery failed "
+        "after every retry, or that were written at shutdown or while the queue was full. Safe to run from cron: "
+        "messages are claimed before sending, and one whose send was interrupted is not sent again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        contact_queue = get_contact_queue()
+        pending = ContactMessage.objects.filter(
+            acknowledged_at__isnull=True, acknowledgement_claimed_at__isnull=True,
+        ).order_by('id')
+        sent = failed = 0
+        last_id = 0
+        while True:
+            batch = list(pending.filter(id__gt=last_id)[:options['batch_size']])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            acknowledged = contact_queue.acknowledge(batch)
+            sent += acknowledged
+            failed += len(batch) - acknowledged
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} acknowledgements; {failed} still failing."))
@@ -0,0 +1,162 @@
+import bisect
+import threading
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram keyed by a label tuple. ``observe`` is a bisect and
+    three increments under a lock; buckets are made cumulative only when
+    exported.
+    """
+
+    def __init__(self, name, documentation, label_names, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: ([*counts], total, count) for labels, (counts, total, count) in self._series.items()}
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total, count) in sorted(self.snapshot().items()):
+            label_text = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            prefix = f'{label_text},' if label_text else ''
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            suffix = f'{{{label_text}}}' if label_text else ''
+            lines.append(f'{self.name}_sum{suffix} {total}')
+            lines.append(f'{self.name}_count{suffix} {count}')
+        return '\n'.join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        self._value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def expose(self):
+        return f'# HELP {self.name} {self.documentation}\n# TYPE {self.name} counter\n{self.name} {self._value}'
+
+    def reset(self):
+        with self._lock:
+            self._value = 0
+
+
+class Gauge:
+    """A value read at scrape time by calling ``collect``."""
+
+    def __init__(self, name, documentation, collect):
+        self.name = name
+        self.documentation = documentation
+        self.collect = collect
+
+    def expose(self):
+        return f'# HELP {self.name} {self.documentation}\n# TYPE {self.name} gauge\n{self.name} {self.collect()}'
+
+    def reset(self):
+        pass
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_LABELS = ('route', 'method')
+
+request_duration = Histogram(
+    'campus_connect_request_duration_seconds', 'Time spent handling a request.', REQUEST_LABELS, DURATION_BUCKETS,
+)
+db_queries = Histogram(
+    'campus_connect_db_queries', 'SQL queries executed per request.', REQUEST_LABELS, QUERY_BUCKETS,
+)
+db_duration = Histogram(
+    'campus_connect_db_duration_seconds', 'Time spent in SQL per request.', REQUEST_LABELS, DURATION_BUCKETS,
+)
+template_duration = Histogram(
+    'campus_connect_template_render_seconds', 'Time spent rendering the response template.', REQUEST_LABELS,
+    DURATION_BUCKETS,
+)
+response_size = Histogram(
+    'campus_connect_response_size_bytes', 'Response body size.', REQUEST_LABELS, SIZE_BUCKETS,
+)
+
+
+
+def _contact_queue_depth():
+    from core.contact_queue import queue_depth
+
+    return queue_depth()
+
+
+contact_queue_depth = Gauge(
+    'campus_connect_contact_queue_depth', 'Contact submissions waiting to be written.', _contact_queue_depth,
+)
+contact_queue_latency = Histogram(
+    'campus_connect_contact_queue_latency_seconds', 'Time from submission until the worker has it saved, ready to acknowledge.', (),
+    DURATION_BUCKETS,
+)
+contact_acknowledgement_failures = Counter(
+    'campus_connect_contact_acknowledgement_failures_total', 'Acknowledgement emails given up on after retries.',
+)
+throttled_requests = Counter(
+    'campus_connect_throttled_requests_total', 'Login, signup and contact attempts rejected by core.throttling.',
+)
+replica_failovers = Counter(
+    'campus_connect_db_replica_failovers_total', 'Read replicas found down and skipped by core.routers.',
+)
+
+
+def _activity_pending():
+    from core.activity import pending
+
+    return pending()
+
+
+activity_pending = Gauge(
+    'campus_connect_activity_pending', 'Logins and audit events waiting to be written.', _activity_pending,
+)
+activity_events_dropped = Counter(
+    'campus_connect_activity_events_dropped_total', 'Audit events dropped because the buffer was full.',
+)
+
+REGISTRY = [
+    request_duration, db_queries, db_duration, template_duration, response_size,
+    contact_queue_depth, contact_queue_latency, contact_acknowledgement_failures, throttled_requests,
+    replica_failovers, activity_pending, activity_events_dropped,
+]
+
+
+def expose():
+    """Every metric in the Prometheus text exposition format."""
+    return '\n'.join(metric.expose() for metric in REGISTRY) + '\n'
@@ -0,0 +1,400 @@
+import gzip
+import logging
+import re
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import middleware as auth
+from django.contrib.messages import middleware as messages
+from django.contrib.sessions import middleware as sessions
+from django.core.cache import caches
+from django.middleware import clickjacking, common, csrf, security
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import get_random_string
+from django.utils.deprecation import MiddlewareMixin
+from whitenoise import middleware as whitenoise
+
+from core import metrics, routers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_QUALITY = re.compile(r'\bq\s*=\s*([0-9.]+)')
+
+slow_request_logger = logging.getLogger('campus_connect.slow_requests')
+
+# The QueryRecorder of the request being handled. A context variable follows
+# the request into sync_to_async threads, which a per-connection
+# execute_wrapper does not.
+current_recorder = ContextVar('current_recorder', default=None)
+
+
+def record_queries(execute, sql, params, many, context):
+    """Installed on every connection by core.signals; hands each query to the
+    current request's recorder, if any."""
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+class InlineAsyncMixin:
+    """
+    For Django middleware whose hooks only look at the request and response in
+    memory. Under ASGI, Django 4.2's MiddlewareMixin sends every hook to a
+    thread with sync_to_async, a dozen thread hops per request across the
+    stack; these run them in the event loop instead. Unchanged under WSGI.
+    """
+
+    async def __acall__(self, request):
+        response = None
+        if hasattr(self, 'process_request'):
+            response = self.process_request(request)
+        response = response or await self.get_response(request)
+        if hasattr(self, 'process_response'):
+            if self.response_blocks(request):
+                return await sync_to_async(self.process_response)(request, response)
+            response = self.process_response(request, response)
+        return response
+
+    def response_blocks(self, request):
+        return False
+
+
+class SecurityMiddleware(InlineAsyncMixin, security.SecurityMiddleware):
+    pass
+
+
+class CommonMiddleware(InlineAsyncMixin, common.CommonMiddleware):
+    pass
+
+
+class AuthenticationMiddleware(InlineAsyncMixin, auth.AuthenticationMiddleware):
+    pass
+
+
+class XFrameOptionsMiddleware(InlineAsyncMixin, clickjacking.XFrameOptionsMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(InlineAsyncMixin, csrf.CsrfViewMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(self):
+            # Django only calls process_view inline when it is a coroutine.
+            self.process_view = self.aprocess_view
+
+    async def aprocess_view(self, request, callback, callback_args, callback_kwargs):
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class SessionMiddleware(InlineAsyncMixin, sessions.SessionMiddleware):
+    """Only saving the session touches the store; loading it is left to aget_user or the sync views."""
+
+    def response_blocks(self, request):
+        return request.session.modified or settings.SESSION_SAVE_EVERY_REQUEST
+
+
+class MessageMiddleware(InlineAsyncMixin, messages.MessageMiddleware):
+    """New messages are stored with any earlier ones, which may mean loading the session."""
+
+    def response_blocks(self, request):
+        storage = getattr(request, '_messages', None)
+        return storage is not None and storage.added_new
+
+
+class WhiteNoiseMiddleware(whitenoise.WhiteNoiseMiddleware):
+    """
+    WhiteNoise that can also sit in an async middleware chain. The upstream
+    class is sync-only, which under ASGI costs every request a thread hop even
+    when it is not for a static file.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class LazyWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise without the STATIC_ROOT scan at startup: the file index is
+    built on the first request for a static file instead, so cold starts that
+    only serve pages skip it entirely. Used in LEAN_SERVING mode.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._pending_files = []
+        self._pending_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def add_files(self, root, prefix=None):
+        if self.autorefresh:
+            return super().add_files(root, prefix)
+        self._pending_files.append((root, prefix))
+
+    def __call__(self, request):
+        if self._pending_files and request.path_info.startswith(self.static_prefix):
+            with self._pending_lock:
+                while self._pending_files:
+                    super().add_files(*self._pending_files.pop(0))
+        return super().__call__(request)
+
+
+class ReplicaPinMiddleware:
+    """
+    Scopes read routing to the request (see core.routers) and, when the
+    request wrote to the primary, sets a cookie that keeps the client's reads
+    on the primary for ``STICKY_SECONDS``. Does nothing without replicas.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        replicas = routers.get_replicas()
+        if not replicas.aliases:
+            return self.get_response(request)
+        with routers.request_routing(routers.PIN_COOKIE in request.COOKIES) as state:
+            response = self.get_response(request)
+        return self.pin(response, state, replicas)
+
+    async def __acall__(self, request):
+        replicas = routers.get_replicas()
+        if not replicas.aliases:
+            return await self.get_response(request)
+        with routers.request_routing(routers.PIN_COOKIE in request.COOKIES) as state:
+            response = await self.get_response(request)
+        return self.pin(response, state, replicas)
+
+    @staticmethod
+    def pin(response, state, replicas):
+        if state.wrote:
+            response.set_cookie(
+                routers.PIN_COOKIE, '1', max_age=replicas.sticky_seconds, httponly=True, samesite='Lax',
+                secure=settings.SESSION_COOKIE_SECURE or None,
+            )
+        return response
+
+
+class CompressionMiddleware(InlineAsyncMixin, MiddlewareMixin):
+    """
+    Brotli (when the ``brotli`` package is installed) or gzip for HTML and
+    JSON responses, whichever the client prefers. Responses with an ETag, the
+    page-cached ones, have the same body every time until the ETag changes,
+    so their compressed bodies are kept in the ``compressed`` cache and
+    compressed once at a higher level rather than on every request.
+
+    Against BREACH, responses carrying the CSRF token (those that set its
+    cookie) are sent uncompressed, and other per-request gzip bodies get the
+    random-length header padding of Django's GZipMiddleware.
+    """
+
+    min_length = 200
+    content_types = ('text/html', 'application/json')
+    # (level for one response, level for a cached body)
+    levels = {'br': (4, 11), 'gzip': (6, 9)}
+    max_random_bytes = 100
+
+    def process_response(self, request, response):
+        if response.streaming or len(response.content) < self.min_length:
+            return response
+        if settings.CSRF_COOKIE_NAME in response.cookies:
+            return response
+        # A Content-Range counts bytes of the body as it is.
+        if response.has_header('Content-Encoding') or response.has_header('Content-Range'):
+            return response
+        if response.get('Content-Type', '').partition(';')[0].strip() not in self.content_types:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        etag = response.get('ETag')
+        if etag:
+            key = f'compressed:{encoding}:{etag}'
+            cache = caches['compressed']
+            content = cache.get(key)
+            if content is None:
+                content = self.compress(response.content, encoding, self.levels[encoding][1])
+                cache.set(key, content)
+        else:
+            content = self.compress(response.content, encoding, self.levels[encoding][0], pad=True)
+        if len(content) >= len(response.content):
+            return response
+        if etag and not etag.startswith('W/'):
+            # The compressed body differs byte for byte, so it can't share a strong ETag.
+            response['ETag'] = f'W/{etag}'
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def choose_encoding(accept_encoding):
+        """``br`` or ``gzip`` as the Accept-Encoding header allows, preferring ``br`` on a tie."""
+        weights = {}
+        for item in accept_encoding.lower().split(','):
+            name, _, params = item.partition(';')
+            quality = 1.0
+            match = _QUALITY.search(params)
+            if match:
+                try:
+                    quality = float(match.group(1))
+                except ValueError:
+                    continue
+            weights[name.strip()] = quality
+        wildcard = weights.get('*', 0)
+        candidates = ('br', 'gzip') if brotli is not None else ('gzip',)
+        best = max(candidates, key=lambda name: weights.get(name, wildcard))
+        return best if weights.get(best, wildcard) > 0 else None
+
+    def compress(self, content, encoding, level, pad=False):
+        if encoding == 'br':
+            return brotli.compress(content, quality=level)
+        # mtime=0 keeps the output, and so the cached body, the same for the same input.
+        compressed = gzip.compress(content, compresslevel=level, mtime=0)
+        if not pad:
+            return compressed
+        # A random file name in the header, as django.utils.text.compress_string
+        # does, so the length no longer tracks how well the body compresses.
+        header = bytearray(compressed[:10])
+        header[3] |= gzip.FNAME
+        filename = get_random_string(secrets.randbelow(self.max_random_bytes) + 1).encode() + b'\0'
+        return bytes(header) + filename + compressed[10:]
+
+
+class QueryRecorder:
+    """``execute_wrapper`` that counts and times SQL, keeping the first few
+    statements for the slow-request log."""
+
+    def __init__(self, keep=50):
+        self.keep = keep
+        self.count = 0
+        self.duration = 0.0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if len(self.statements) < self.keep:
+                self.statements.append((elapsed, sql))
+
+
+class RequestMetricsMiddleware:
+    """
+    Records duration, query count, SQL time, template render time and
+    response size per URL name into the histograms in core.metrics, and logs
+    requests slower than ``SLOW_REQUEST_THRESHOLD`` seconds with their SQL.
+    Runs sync or async, whichever the rest of the chain is.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self.record(request, response, time.perf_counter() - started, recorder)
+        return response
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self.record(request, response, time.perf_counter() - started, recorder)
+        return response
+
+    def record(self, request, response, duration, recorder):
+        match = request.resolver_match
+        labels = (match.view_name if match else '<unmatched>', request.method)
+        metrics.request_duration.observe(labels, duration)
+        metrics.db_queries.observe(labels, recorder.count)
+        metrics.db_duration.observe(labels, recorder.duration)
+        render_time = getattr(request, '_template_render_time', None)
+        if render_time is not None:
+            metrics.template_duration.observe(labels, render_time)
+        size = self.response_size(response)
+        if size is not None:
+            metrics.response_size.observe(labels, size)
+
+        if duration >= getattr(settings, 'SLOW_REQUEST_THRESHOLD', 1.0):
+            self.log_slow_request(request, labels[0], duration, recorder)
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+
+        def finished(rendered):
+            request._template_render_time = time.perf_counter() - started
+
+        response.add_post_render_callback(finished)
+        return response
+
+    @staticmethod
+    def response_size(response):
+        if not response.streaming:
+            return len(response.content)
+        if response.has_header('Content-Length'):
+            return int(response['Content-Length'])
+        return None
+
+    @staticmethod
+    def log_slow_request(request, route, duration, recorder):
+        statements = '\n'.join(f'  {elapsed * 1000:8.1f} ms  {sql}' for elapsed, sql in recorder.statements)
+        slow_request_logger.warning(
+            'Slow request: %s %s (%s) took %.0f ms, %d queries in %.0f ms\n%s',
+            request.method, request.path, route, duration * 1000, recorder.count, recorder.duration * 1000,
+            statements,
+        )
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.11 on 2026-10-18 18:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationReadState',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_read_state', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='User')),
+                ('last_read_id', models.BigIntegerField(default=0, verbose_name='Last Read ID')),
+                ('read_ids', models.JSONField(blank=True, default=list, verbose_name='Read IDs')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('audience', models.CharField(choices=[('ALL', 'Everyone'), ('STUDENT', 'Students'), ('MENTOR', 'Mentors')], default='ALL', max_length=20, verbose_name='Audience')),
+                ('title', models.CharField(max_length=200, verbose_name='Title')),
+                ('body', models.TextField(blank=True, verbose_name='Body')),
+                ('link', models.CharField(blank=True, max_length=255, verbose_name='Link')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('recipient', models.ForeignKey(blank=True, help_text='Leave empty to broadcast to the selected audience.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL, verbose_name='Recipient')),
+            ],
+            options={
+                'ordering': ('-id',),
+                'indexes': [models.Index(fields=['recipient', '-id'], name='notification_recipient_idx'), models.Index(condition=models.Q(('recipient__isnull', True)), fields=['audience', '-id'], name='notification_broadcast_idx')],
+            },
+        ),
+    ]
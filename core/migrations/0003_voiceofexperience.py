@@ -0,0 +1,34 @@
+# Generated by Django 4.2.11 on 2026-10-18 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_notificationreadstate_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoiceOfExperience',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('speaker_name', models.CharField(max_length=100, verbose_name='Speaker Name')),
+                ('cohort', models.CharField(blank=True, help_text='e.g. IER 2022', max_length=100, verbose_name='Cohort')),
+                ('topic', models.CharField(blank=True, max_length=200, verbose_name='Topic')),
+                ('intro', models.TextField(blank=True, verbose_name='Intro')),
+                ('photo', models.CharField(blank=True, help_text='Path under static/, e.g. images/speaker.jpg', max_length=255, verbose_name='Photo')),
+                ('audio', models.FileField(upload_to='voices/', verbose_name='Audio')),
+                ('is_published', models.BooleanField(default=True, verbose_name='Is Published')),
+                ('position', models.PositiveIntegerField(default=0, verbose_name='Position')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Voice of Experience',
+                'verbose_name_plural': 'Voices of Experience',
+                'ordering': ('position', '-id'),
+                'indexes': [models.Index(fields=['is_published', 'position', '-id'], name='voice_published_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 4.2.11 on 2026-10-18 18:31
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+# Must match core.models.USER_SEARCH_DOCUMENT and the email__icontains lookup
+# SQL for the planner to use them.
+POSTGRES_SEARCH_INDEXES = [
+    (
+        'user_search_document_idx',
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS user_search_document_idx ON core_user USING gin "
+        "(to_tsvector('simple', username || ' ' || email || ' ' || first_name || ' ' || last_name))",
+    ),
+    (
+        'user_email_trgm_idx',
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS user_email_trgm_idx ON core_user USING gin "
+        "(UPPER(email::text) gin_trgm_ops)",
+    ),
+]
+
+
+class AddIndexConcurrentlyOnPostgres(AddIndexConcurrently):
+    """Builds the index without locking writes on PostgreSQL; a plain AddIndex elsewhere (the tests' SQLite)."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for _, sql in POSTGRES_SEARCH_INDEXES:
+        schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in POSTGRES_SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('core', '0003_voiceofexperience'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name='user',
+            index=models.Index(fields=['user_type', 'is_active', 'is_staff', 'email'], name='user_type_active_staff_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_staff', True)), fields=['email'], name='user_staff_idx'),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
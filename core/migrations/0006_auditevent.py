@@ -0,0 +1,63 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# On PostgreSQL the table is range-partitioned on month. The primary key has
+# to include the partition key; Django still treats id alone as the pk. Rows
+# land in the default partition until `manage.py audit_partitions` has
+# created their month's.
+POSTGRES_PARTITIONED_TABLE = [
+    'CREATE TABLE "core_auditevent" ('
+    '"id" bigserial NOT NULL, '
+    '"month" integer NOT NULL CHECK ("month" >= 0), '
+    '"kind" smallint NOT NULL CHECK ("kind" >= 0), '
+    '"user_id" bigint NULL, '
+    '"created_at" timestamp with time zone NOT NULL, '
+    'PRIMARY KEY ("id", "month")'
+    ') PARTITION BY RANGE ("month")',
+    'CREATE TABLE "core_auditevent_default" PARTITION OF "core_auditevent" DEFAULT',
+    'CREATE INDEX "auditevent_user_idx" ON "core_auditevent" ("user_id", "id" DESC)',
+    'CREATE INDEX "auditevent_month_idx" ON "core_auditevent" ("month", "kind")',
+]
+
+
+def create_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.create_model(apps.get_model('core', 'AuditEvent'))
+        return
+    for sql in POSTGRES_PARTITIONED_TABLE:
+        schema_editor.execute(sql)
+
+
+def drop_table(apps, schema_editor):
+    # Dropping a partitioned table drops its partitions.
+    schema_editor.delete_model(apps.get_model('core', 'AuditEvent'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_contactmessage'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.CreateModel(
+                name='AuditEvent',
+                fields=[
+                    ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('month', models.PositiveIntegerField(verbose_name='Month')),
+                    ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Login'), (2, 'Signup'), (3, 'Profile View')], verbose_name='Kind')),
+                    ('created_at', models.DateTimeField(verbose_name='Created At')),
+                    ('user', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+                ],
+                options={
+                    'ordering': ('-id',),
+                    'indexes': [models.Index(fields=['user', '-id'], name='auditevent_user_idx'), models.Index(fields=['month', 'kind'], name='auditevent_month_idx')],
+                },
+            ),
+        ]),
+        migrations.RunPython(create_table, drop_table),
+    ]
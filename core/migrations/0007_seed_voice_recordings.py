@@ -0,0 +1,72 @@
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.db import migrations
+
+# The recordings the page listed before it was backed by VoiceOfExperience.
+# Their audio ships in static/audios; migrating copies it into the
+# recordings' storage (MEDIA_ROOT, or remote storage when configured).
+RECORDINGS = [
+    {
+        'speaker_name': 'Sarah Ahmed',
+        'cohort': 'IER 2022',
+        'topic': 'Finding your first internship',
+        'intro': (
+            "In this conversation, Sarah shares her journey of landing her very first internship during the final "
+            "year of her degree. We asked her about the challenges she faced while applying, what kind of portfolio "
+            "helped her stand out, and how she overcame the fear of rejection during interviews."
+        ),
+        'photo': 'images/download.png',
+        'audio': 'voice of experience 1.m4a',
+        'position': 1,
+    },
+    {
+        'speaker_name': 'Ali Khan',
+        'cohort': 'BSSE 2023',
+        'topic': 'Dealing with exam pressure',
+        'intro': (
+            "Ali opens up about the stress many students feel during exam seasons and how he managed to build healthy "
+            "study habits. We discussed questions like: How do you stay consistent when overwhelmed? What role do "
+            "breaks and group studies play? And how can students avoid burnout while preparing for finals?"
+        ),
+        'photo': 'images/18148.png',
+        'audio': 'voice of experience huzaifa friend.m4a',
+        'position': 2,
+    },
+]
+
+
+def seed_recordings(apps, schema_editor):
+    VoiceOfExperience = apps.get_model('core', 'VoiceOfExperience')
+    storage = VoiceOfExperience._meta.get_field('audio').storage
+    for fields in RECORDINGS:
+        fields = dict(fields)
+        filename = fields.pop('audio')
+        if VoiceOfExperience.objects.filter(speaker_name=fields['speaker_name'], topic=fields['topic']).exists():
+            continue
+        recording = VoiceOfExperience(**fields)
+        name = f'voices/{storage.get_valid_name(filename)}'
+        if storage.exists(name):
+            recording.audio.name = name
+        else:
+            with open(os.path.join(settings.BASE_DIR, 'static', 'audios', filename), 'rb') as audio:
+                recording.audio.save(filename, File(audio), save=False)
+        recording.save()
+
+
+def remove_recordings(apps, schema_editor):
+    VoiceOfExperience = apps.get_model('core', 'VoiceOfExperience')
+    for fields in RECORDINGS:
+        VoiceOfExperience.objects.filter(speaker_name=fields['speaker_name'], topic=fields['topic']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_auditevent'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_recordings, remove_recordings),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_seed_voice_recordings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactmessage',
+            name='acknowledgement_claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Acknowledgement Claimed At'),
+        ),
+    ]
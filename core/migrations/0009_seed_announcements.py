@@ -0,0 +1,60 @@
+import datetime
+
+from django.db import migrations
+
+# The announcements the notifications page listed before it was backed by
+# Notification, oldest first so the feed (newest id first) keeps their order.
+ANNOUNCEMENTS = [
+    {
+        'title': 'Career Guidance Session with Alumni',
+        'body': (
+            "Don’t miss our virtual event where senior alumni share career tips, portfolio advice, and their "
+            "transition from university to professional life."
+        ),
+        'created_at': datetime.datetime(2025, 10, 5, tzinfo=datetime.timezone.utc),
+    },
+    {
+        'title': 'Workshop: “Navigating University Life”',
+        'body': (
+            "Join our interactive workshop led by alumni to discuss effective study strategies, time management, "
+            "and personal growth during your university journey."
+        ),
+        'created_at': datetime.datetime(2025, 10, 20, tzinfo=datetime.timezone.utc),
+    },
+    {
+        'title': 'New Mentorship Batch Open for Registration',
+        'body': (
+            "Campus Connect has opened a new mentorship batch for freshmen 2025! Register before November 10 to "
+            "connect with experienced mentors from your department."
+        ),
+        'created_at': datetime.datetime(2025, 11, 1, tzinfo=datetime.timezone.utc),
+    },
+]
+
+
+def seed_announcements(apps, schema_editor):
+    Notification = apps.get_model('core', 'Notification')
+    for fields in ANNOUNCEMENTS:
+        fields = dict(fields)
+        created_at = fields.pop('created_at')
+        if Notification.objects.filter(recipient=None, title=fields['title']).exists():
+            continue
+        notification = Notification.objects.create(**fields)
+        # created_at is auto_now_add; keep the date the page showed.
+        Notification.objects.filter(pk=notification.pk).update(created_at=created_at)
+
+
+def remove_announcements(apps, schema_editor):
+    Notification = apps.get_model('core', 'Notification')
+    Notification.objects.filter(recipient=None, title__in=[fields['title'] for fields in ANNOUNCEMENTS]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_contactmessage_acknowledgement_claimed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_announcements, remove_announcements),
+    ]
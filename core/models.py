@@ -1,11 +1,64 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
+from django.db import connections, models
+from django.db.models.expressions import RawSQL
 from django.utils.translation import gettext_lazy as _
 
-from core.enums import UserTypeChoices
+from core.enums import AuditEventKindChoices, NotificationAudienceChoices, UserTypeChoices
 
 
-class UserManager(BaseUserManager):
+# The expression behind the PostgreSQL full-text index created in migration
+# 0004; queries must use it verbatim for the planner to pick the index.
+USER_SEARCH_DOCUMENT = (
+    "to_tsvector('simple', username || ' ' || email || ' ' || first_name || ' ' || last_name)"
+)
+
+
+def _tsquery_prefix(words):
+    # Quoted lexemes so user input cannot inject tsquery operators.
+    lexemes = []
+    for word in words:
+        word = word.replace("'", '').replace('\\', '')
+        if word:
+            lexemes.append(f"'{word}':*")
+    return ' & '.join(lexemes)
+
+
+class UserQuerySet(models.QuerySet):
+    def search(self, term):
+        """
+        Prefix search: every word in ``term`` must start the username, email,
+        first or last name. On PostgreSQL this is a full-text query on the
+        user_search_document index, and words containing ``@`` are substring
+        matches on email backed by a trigram index. Other databases fall back
+        to ``istartswith`` on each column.
+        """
+        words = [word for word in term.split() if any(char.isalnum() for char in word)]
+        if not words:
+            return self
+
+        queryset = self
+        if connections[self.db].vendor == 'postgresql':
+            for word in words:
+                if '@' in word:
+                    queryset = queryset.filter(email__icontains=word)
+            query = _tsquery_prefix(word for word in words if '@' not in word)
+            if query:
+                queryset = queryset.filter(RawSQL(
+                    f"{USER_SEARCH_DOCUMENT} @@ to_tsquery('simple', %s)", [query], output_field=models.BooleanField(),
+                ))
+            return queryset
+
+        for word in words:
+            queryset = queryset.filter(
+                models.Q(email__istartswith=word)
+                | models.Q(username__istartswith=word)
+                | models.Q(first_name__istartswith=word)
+                | models.Q(last_name__istartswith=word)
+            )
+        return queryset
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     def create_user(self, email, first_name, last_name=None, password=None, username=None, **extra_fields):
         """
         Create and save a regular user with the given email and password.
@@ -66,6 +119,15 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name']
 
+    class Meta:
+        indexes = [
+            # The admin's list_filter combinations, in its email ordering so a
+            # filtered page is an index range scan with LIMIT.
+            models.Index(fields=['user_type', 'is_active', 'is_staff', 'email'], name='user_type_active_staff_idx'),
+            # Staff are a handful of rows among millions.
+            models.Index(fields=['email'], name='user_staff_idx', condition=models.Q(is_staff=True)),
+        ]
+
     def __str__(self):
         full_name = f"{self.first_name} {self.last_name}".strip()
         return full_name or self.email
@@ -75,3 +137,162 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     def get_short_name(self):
         return self.first_name or self.email
+
+
+class Notification(models.Model):
+    """
+    A notification is either addressed to one ``recipient`` or, when that is
+    empty, broadcast to an ``audience``. Broadcasts are stored once and fanned
+    out on read, so a campus-wide announcement is a single row.
+    """
+    recipient = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name=_('Recipient'),
+        help_text=_('Leave empty to broadcast to the selected audience.'),
+    )
+    audience = models.CharField(
+        _('Audience'),
+        max_length=20,
+        choices=NotificationAudienceChoices.choices,
+        default=NotificationAudienceChoices.ALL,
+    )
+    title = models.CharField(_('Title'), max_length=200)
+    body = models.TextField(_('Body'), blank=True)
+    link = models.CharField(_('Link'), max_length=255, blank=True)
+    created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
+
+    class Meta:
+        ordering = ('-id',)
+        indexes = [
+            models.Index(fields=['recipient', '-id'], name='notification_recipient_idx'),
+            models.Index(
+                fields=['audience', '-id'],
+                name='notification_broadcast_idx',
+                condition=models.Q(recipient__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def is_broadcast(self):
+        return self.recipient_id is None
+
+    def to_dict(self):
+        return {
+            'id': self.pk,
+            'title': self.title,
+            'body': self.body,
+            'link': self.link,
+            'created_at': self.created_at.isoformat(),
+        }
+
+
+class NotificationReadState(models.Model):
+    """
+    Compact read receipts: every notification with ``id <= last_read_id`` is
+    read, plus the handful of newer ids in ``read_ids`` read out of order.
+    """
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='notification_read_state',
+        verbose_name=_('User'),
+    )
+    last_read_id = models.BigIntegerField(_('Last Read ID'), default=0)
+    read_ids = models.JSONField(_('Read IDs'), default=list, blank=True)
+
+    def __str__(self):
+        return f"{self.user} <= {self.last_read_id}"
+
+    def is_read(self, notification_id):
+        return notification_id <= self.last_read_id or notification_id in self.read_ids
+
+
+class VoiceOfExperience(models.Model):
+    speaker_name = models.CharField(_('Speaker Name'), max_length=100)
+    cohort = models.CharField(_('Cohort'), max_length=100, blank=True, help_text=_('e.g. IER 2022'))
+    topic = models.CharField(_('Topic'), max_length=200, blank=True)
+    intro = models.TextField(_('Intro'), blank=True)
+    photo = models.CharField(_('Photo'), max_length=255, blank=True, help_text=_('Path under static/, e.g. images/speaker.jpg'))
+    audio = models.FileField(_('Audio'), upload_to='voices/')
+    is_published = models.BooleanField(_('Is Published'), default=True)
+    position = models.PositiveIntegerField(_('Position'), default=0)
+    created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
+
+    class Meta:
+        ordering = ('position', '-id')
+        verbose_name = _('Voice of Experience')
+        verbose_name_plural = _('Voices of Experience')
+        indexes = [
+            models.Index(fields=['is_published', 'position', '-id'], name='voice_published_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.speaker_name} – {self.topic}" if self.topic else self.speaker_name
+
+
+class ContactMessage(models.Model):
+    name = models.CharField(_('Name'), max_length=100)
+    email = models.EmailField(_('Email Address'))
+    message = models.TextField(_('Message'))
+    created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
+    acknowledged_at = models.DateTimeField(_('Acknowledged At'), null=True, blank=True)
+    # Set before the acknowledgement is sent, so a run interrupted between
+    # sending and setting acknowledged_at never sends it again.
+    acknowledgement_claimed_at = models.DateTimeField(_('Acknowledgement Claimed At'), null=True, blank=True)
+
+    class Meta:
+        ordering = ('-id',)
+        indexes = [
+            # send_contact_acknowledgements picks up the few that failed.
+            models.Index(fields=['id'], name='contact_unacknowledged_idx', condition=models.Q(acknowledged_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.name} <{self.email}>"
+
+
+class AuditEvent(models.Model):
+    """
+    Append-only activity trail, written in batches by core.activity. Rows
+    carry their ``month`` (yyyymm): on PostgreSQL the table is partitioned on
+    it (migration 0006) and ``audit_partitions`` drops whole months.
+    """
+    month = models.PositiveIntegerField(_('Month'))
+    kind = models.PositiveSmallIntegerField(_('Kind'), choices=AuditEventKindChoices.choices)
+    # No constraint: the trail outlives deleted accounts, and inserts skip the lookup.
+    user = models.ForeignKey(
+        User,
+        null=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name=_('User'),
+    )
+    created_at = models.DateTimeField(_('Created At'))
+
+    class Meta:
+        ordering = ('-id',)
+        indexes = [
+            models.Index(fields=['user', '-id'], name='auditevent_user_idx'),
+            models.Index(fields=['month', 'kind'], name='auditevent_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} by {self.user_id} at {self.created_at:%Y-%m-%d %H:%M}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Audit events are append-only.")
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def month_of(moment):
+        return moment.year * 100 + moment.month
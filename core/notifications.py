@@ -0,0 +1,149 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from core.async_utils import cache_get_many, cache_set
+from core.broker import get_broker
+from core.enums import NotificationAudienceChoices
+from core.models import Notification, NotificationReadState
+
+GENERATION_KEY = 'notifications:generation'
+
+
+def _unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def visible_to(user):
+    """Filter matching personal notifications plus broadcasts for ``user``."""
+    broadcast = Q(recipient__isnull=True)
+    if not user.is_authenticated:
+        return broadcast & Q(audience=NotificationAudienceChoices.ALL)
+    audiences = [NotificationAudienceChoices.ALL, user.user_type]
+    return Q(recipient=user) | (broadcast & Q(audience__in=audiences))
+
+
+def channels_for(user):
+    """Broker channels a user's stream listens on; mirrors ``visible_to``."""
+    channels = [f'broadcast:{NotificationAudienceChoices.ALL}']
+    if user.is_authenticated:
+        channels += [f'broadcast:{user.user_type}', f'user:{user.pk}']
+    return channels
+
+
+def publish(notification):
+    if notification.is_broadcast:
+        channel = f'broadcast:{notification.audience}'
+    else:
+        channel = f'user:{notification.recipient_id}'
+    get_broker().publish(channel, notification.to_dict())
+
+
+def feed_for(user):
+    return Notification.objects.filter(visible_to(user))
+
+
+def get_read_state(user):
+    state, _ = NotificationReadState.objects.get_or_create(user=user)
+    return state
+
+
+def _count_unread(user):
+    state = NotificationReadState.objects.filter(user=user).first()
+    queryset = feed_for(user)
+    if state is not None:
+        queryset = queryset.filter(id__gt=state.last_read_id).exclude(id__in=state.read_ids)
+    return queryset.count()
+
+
+def unread_count(user):
+    """
+    Unread badge count. Cached per user and tagged with the broadcast
+    generation, so a hit costs one cache round-trip and no queries. Stale
+    for up to UNREAD_CACHE_TIMEOUT in other workers unless the cache is shared.
+    """
+    if not user.is_authenticated:
+        return 0
+    key = _unread_key(user.pk)
+    cached = cache.get_many([GENERATION_KEY, key])
+    generation = cached.get(GENERATION_KEY, 0)
+    entry = cached.get(key)
+    if entry is not None and entry[0] == generation:
+        return entry[1]
+
+    count = _count_unread(user)
+    cache.set(key, (generation, count), settings.UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+async def aunread_count(user):
+    """``unread_count`` for async views; only a cache miss leaves the event loop."""
+    if not user.is_authenticated:
+        return 0
+    key = _unread_key(user.pk)
+    cached = await cache_get_many(cache, [GENERATION_KEY, key])
+    generation = cached.get(GENERATION_KEY, 0)
+    entry = cached.get(key)
+    if entry is not None and entry[0] == generation:
+        return entry[1]
+
+    count = await sync_to_async(_count_unread)(user)
+    await cache_set(cache, key, (generation, count), settings.UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def invalidate_unread(user_id):
+    cache.delete(_unread_key(user_id))
+
+
+def invalidate_broadcasts():
+    """Make every cached unread count stale without touching each key."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def mark_read(user, notification_id):
+    if not feed_for(user).filter(pk=notification_id).exists():
+        return
+    with transaction.atomic():
+        state = get_read_state(user)
+        state = NotificationReadState.objects.select_for_update().get(pk=state.pk)
+        if state.is_read(notification_id):
+            return
+        state.read_ids.append(notification_id)
+        _compact(user, state)
+        state.save(update_fields=['last_read_id', 'read_ids'])
+    invalidate_unread(user.pk)
+
+
+def mark_all_read(user):
+    latest = feed_for(user).order_by('-id').values_list('id', flat=True).first()
+    if latest is None:
+        return
+    NotificationReadState.objects.update_or_create(
+        user=user,
+        defaults={'last_read_id': latest, 'read_ids': []},
+    )
+    invalidate_unread(user.pk)
+
+
+def _compact(user, state):
+    # Advance the high-water mark over the leading run of read exceptions so
+    # read_ids only ever holds ids read out of order.
+    pending = set(state.read_ids)
+    following = (
+        feed_for(user)
+        .filter(id__gt=state.last_read_id)
+        .order_by('id')
+        .values_list('id', flat=True)[:len(pending) + 1]
+    )
+    for notification_id in following:
+        if notification_id not in pending:
+            break
+        pending.discard(notification_id)
+        state.last_read_id = notification_id
+    state.read_ids = sorted(pending)
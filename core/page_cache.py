@@ -0,0 +1,107 @@
+import hashlib
+
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+from core.async_utils import cache_get, cache_set
+
+PAGE_CACHE_ALIAS = 'pages'
+
+
+def _generation_key(template_name):
+    return f'page:generation:{template_name}'
+
+
+def invalidate_page(template_name):
+    """Drop every cached variant of ``template_name``."""
+    cache = caches[PAGE_CACHE_ALIAS]
+    try:
+        cache.incr(_generation_key(template_name))
+    except ValueError:
+        cache.set(_generation_key(template_name), 1, None)
+
+
+class CachedPageMixin:
+    """
+    Caches the rendered page per template, auth state and user type, and
+    answers conditional GETs with 304 using a strong ETag of the body.
+
+    Only for pages whose output does not depend on the individual user:
+    responses that set cookies or use the CSRF token are never stored.
+    """
+    page_cache_timeout = 300
+    page_cache_vary_on_query = False
+
+    def get_page_cache_key(self, generation):
+        user = self.request.user
+        audience = user.user_type if user.is_authenticated else 'anonymous'
+        key = f'page:{self.template_name}:{generation}:{audience}'
+        if self.page_cache_vary_on_query:
+            query = self.request.GET.urlencode()
+            key += ':' + hashlib.md5(query.encode()).hexdigest()
+        return key
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+
+        cache = caches[PAGE_CACHE_ALIAS]
+        generation = cache.get(_generation_key(self.template_name), 0)
+        key = self.get_page_cache_key(generation)
+        entry = cache.get(key)
+        if entry is None:
+            response = super().dispatch(request, *args, **kwargs)
+            entry = self._page_entry(response)
+            if entry is None:
+                return response
+            cache.set(key, entry, self.page_cache_timeout)
+        return self._cached_response(request, entry)
+
+    def _page_entry(self, response):
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        if not self._is_cacheable(response):
+            return None
+        return (
+            f'"{hashlib.sha256(response.content).hexdigest()[:32]}"',
+            response.content,
+            response['Content-Type'],
+        )
+
+    @staticmethod
+    def _cached_response(request, entry):
+        etag, content, content_type = entry
+        response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Cookie'])
+        return get_conditional_response(request, etag=etag, response=response)
+
+    def _is_cacheable(self, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not self.request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+        )
+
+
+class AsyncCachedPageMixin(CachedPageMixin):
+    """``CachedPageMixin`` for async views. ``request.user`` must already be resolved (see ``aget_user``)."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await super(CachedPageMixin, self).dispatch(request, *args, **kwargs)
+
+        cache = caches[PAGE_CACHE_ALIAS]
+        generation = await cache_get(cache, _generation_key(self.template_name), 0)
+        key = self.get_page_cache_key(generation)
+        entry = await cache_get(cache, key)
+        if entry is None:
+            response = await super(CachedPageMixin, self).dispatch(request, *args, **kwargs)
+            entry = self._page_entry(response)
+            if entry is None:
+                return response
+            await cache_set(cache, key, entry, self.page_cache_timeout)
+        return self._cached_response(request, entry)
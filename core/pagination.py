@@ -0,0 +1,129 @@
+import base64
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Cursor (keyset) pagination over an indexed, unique ordering.
+
+    Instead of OFFSET, each page filters on the ordering key of the last row
+    of the previous page, so fetching page N costs the same as page 1. The
+    last field in ``ordering`` must be unique (normally ``id``) to break ties.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-id',)):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.fields = [self._field(name.lstrip('-')) for name in self.ordering]
+
+    def _field(self, name):
+        model = self.queryset.model
+        if name == 'pk':
+            return model._meta.pk
+        return model._meta.get_field(name)
+
+    def encode_cursor(self, obj):
+        values = [field.value_to_string(obj) for field in self.fields]
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError
+            return [field.to_python(value) for field, value in zip(self.fields, values)]
+        except Exception:
+            raise InvalidCursor('Invalid cursor.')
+
+    def _after(self, values):
+        # (a, b) > (x, y)  ==  a > x OR (a = x AND b > y), with the comparison
+        # direction taken from each ordering term.
+        condition = Q()
+        equal = {}
+        for name, field, value in zip(self.ordering, self.fields, values):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{field.attname}__{lookup}': value})
+            equal[field.attname] = value
+        return condition
+
+    def _page_queryset(self, cursor):
+        queryset = self.queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor)))
+        return queryset[:self.per_page + 1]
+
+    def page(self, cursor=None):
+        return self._make_page(list(self._page_queryset(cursor)))
+
+    async def apage(self, cursor=None):
+        """``page`` with the async ORM. Querysets using prefetch_related can't be iterated this way."""
+        return self._make_page([row async for row in self._page_queryset(cursor)])
+
+    def _make_page(self, rows):
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = self.encode_cursor(rows[-1])
+        return KeysetPage(rows, next_cursor)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    A Paginator for very large tables. On PostgreSQL ``count`` is the
+    planner's row estimate for the query whenever that is above
+    ``exact_count_limit``, so no page costs a full ``COUNT(*)``; small results
+    and other databases are counted exactly.
+
+    The estimate can be off either way, so the last page shown may be empty or
+    a few rows may lie beyond it.
+    """
+    exact_count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query'):
+            connection = connections[queryset.db]
+            if connection.vendor == 'postgresql':
+                estimate = self.estimate(queryset, connection)
+                if estimate > self.exact_count_limit:
+                    return estimate
+        return super().count
+
+    @staticmethod
+    def estimate(queryset, connection):
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
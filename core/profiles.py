@@ -0,0 +1,25 @@
+"""
+The profile row every user needs to take part in mentoring: a Mentor for
+mentors (the directory, matching and profile counters read it) and a
+StudentProfile for students (matching reads it).
+
+Signup and ``import_users`` create it with the user. ``create_user`` leaves
+it alone so callers (the admin, tests) can create the profile with its
+fields themselves.
+"""
+from core.enums import UserTypeChoices
+
+
+def new_profile(user, department='', year=None):
+    """The unsaved profile for ``user`` (saved, or with ``user_id`` set)."""
+    from mentor.models import Mentor
+    from student.models import StudentProfile
+
+    model = Mentor if user.user_type == UserTypeChoices.MENTOR else StudentProfile
+    return model(user_id=user.pk, department=department, year=year)
+
+
+def create_profile(user, **fields):
+    profile = new_profile(user, **fields)
+    profile.save()
+    return profile
@@ -0,0 +1,149 @@
+"""
+Read replicas.
+
+``PrimaryReplicaRouter`` sends writes to the primary (``default``) and reads
+to the replicas in ``DATABASE_REPLICAS['ALIASES']``, round-robin. Reads go to
+the primary instead when:
+
+* the current request has written (``track_writes`` sees every INSERT,
+  UPDATE and DELETE on the primary), or the client wrote within the last
+  ``STICKY_SECONDS`` and carries the pin cookie set by
+  ``core.middleware.ReplicaPinMiddleware``, so people see their own changes
+  while the replicas catch up;
+* the primary is inside a transaction, so reads see its uncommitted writes;
+* every replica is down.
+
+A replica is checked when this thread has no open connection to it, by
+opening the connection the read needs anyway. If that fails it is skipped
+for ``RETRY_AFTER`` seconds.
+"""
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.dispatch import receiver
+
+from core import metrics
+
+PRIMARY = DEFAULT_DB_ALIAS
+PIN_COOKIE = 'primary_pin'
+
+DEFAULT_DATABASE_REPLICAS = {
+    'ALIASES': [],
+    'STICKY_SECONDS': 10,
+    'RETRY_AFTER': 30,
+}
+
+_routing = ContextVar('db_routing', default=None)
+
+
+class RoutingState:
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+@contextmanager
+def request_routing(pinned=False):
+    """Scope of one request: reads stay on the primary once it has written, or throughout if ``pinned``."""
+    state = RoutingState(pinned)
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+def track_writes(execute, sql, params, many, context):
+    """Installed on the primary's connections by core.signals."""
+    state = _routing.get()
+    if state is not None and not state.wrote and sql.lstrip()[:6].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+        state.wrote = True
+    return execute(sql, params, many, context)
+
+
+class ReplicaSet:
+    def __init__(self, aliases, sticky_seconds, retry_after):
+        self.aliases = list(aliases)
+        self.sticky_seconds = sticky_seconds
+        self.retry_after = retry_after
+        self._cycle = itertools.cycle(self.aliases)
+        self._down_until = {}
+        self._lock = threading.Lock()
+
+    def choose(self):
+        """A healthy replica, or the primary if there is none."""
+        for _ in range(len(self.aliases)):
+            with self._lock:
+                alias = next(self._cycle)
+            if self.is_healthy(alias):
+                return alias
+        return PRIMARY
+
+    def is_healthy(self, alias):
+        if time.monotonic() < self._down_until.get(alias, 0):
+            return False
+        connection = connections[alias]
+        if connection.connection is not None:
+            return True
+        try:
+            connection.ensure_connection()
+        except DatabaseError:
+            self._down_until[alias] = time.monotonic() + self.retry_after
+            metrics.replica_failovers.inc()
+            return False
+        self._down_until.pop(alias, None)
+        return True
+
+
+_replicas = None
+_replicas_lock = threading.Lock()
+
+
+def get_replicas():
+    global _replicas
+    if _replicas is None:
+        with _replicas_lock:
+            if _replicas is None:
+                config = {**DEFAULT_DATABASE_REPLICAS, **getattr(settings, 'DATABASE_REPLICAS', {})}
+                _replicas = ReplicaSet(config['ALIASES'], config['STICKY_SECONDS'], config['RETRY_AFTER'])
+    return _replicas
+
+
+@receiver(setting_changed)
+def reset_replicas(setting, **kwargs):
+    global _replicas
+    if setting in ('DATABASE_REPLICAS', 'DATABASES'):
+        _replicas = None
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if not replicas.aliases:
+            return None
+        state = _routing.get()
+        if state is not None and (state.pinned or state.wrote):
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return replicas.choose()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replicas().aliases:
+            return False
+        return None
@@ -0,0 +1,315 @@
+"""
+Site search across mentors, broadcast notifications and Voice of Experience.
+
+Each process ranks queries against its own in-memory index (see
+core.search_index) and loads only the top rows from the database. When
+there is a fresh snapshot, the server entry points start loading it in a
+background thread at start-up (``LOAD_AT_STARTUP``); otherwise, or if a search
+arrives first, the first search loads it:
+
+* from the snapshot at ``SEARCH_INDEX['SNAPSHOT']`` when there is one younger
+  than ``SNAPSHOT_MAX_AGE``, plus the rows added since it was taken;
+* otherwise from the database, after which the snapshot is written for the
+  next cold start. ``manage.py build_search_index`` writes it ahead of time.
+
+Saves and deletes in this process reach the index through the receivers in
+core.signals and mentor.signals once their transaction commits; while the
+index is loading they are queued rather than waiting for it. Rows other
+processes add are picked up every ``REFRESH_INTERVAL`` seconds; their edits
+and deletions show once the snapshot is rebuilt (deleted rows are never
+returned, as results are loaded from the database).
+
+Personal notifications are not indexed; broadcasts are filtered by audience
+like the notification feed.
+"""
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, namedtuple
+from functools import partial
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections, transaction
+from django.dispatch import receiver
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.utils.text import Truncator
+
+from core.enums import NotificationAudienceChoices
+from core.models import Notification, VoiceOfExperience
+from mentor.models import Mentor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_INDEX = {
+    # Path of the snapshot file; None keeps the index in memory only.
+    'SNAPSHOT': None,
+    'SNAPSHOT_MAX_AGE': 24 * 60 * 60,
+    'REFRESH_INTERVAL': 60,
+    # Start loading a fresh snapshot in the background when the server starts
+    # (core wsgi/asgi). Never builds from the database at start-up.
+    'LOAD_AT_STARTUP': True,
+}
+
+# Index groups, one per searchable model.
+MENTOR, VOICE, NOTIFICATION = range(3)
+TYPES = {'mentor': MENTOR, 'voice': VOICE, 'notification': NOTIFICATION}
+
+# Audience bytes: everyone, or one user type.
+EVERYONE, STUDENTS, MENTORS = range(3)
+AUDIENCES = {
+    NotificationAudienceChoices.ALL: EVERYONE,
+    NotificationAudienceChoices.STUDENT: STUDENTS,
+    NotificationAudienceChoices.MENTOR: MENTORS,
+}
+
+SUMMARY_LENGTH = 200
+
+
+def _mentors():
+    return Mentor.objects.directory()
+
+
+def _mentor_text(mentor):
+    name = mentor.user.get_full_name()
+    tags = ' '.join(tag.name for tag in mentor.expertise.all())
+    # The name and headline count twice.
+    return ' '.join([name, name, mentor.headline, mentor.headline, mentor.department, tags, mentor.bio])
+
+
+def _mentor_result(mentor):
+    return {
+        'title': mentor.user.get_full_name(),
+        'summary': mentor.headline or mentor.department,
+        'url': f"{reverse('mentors')}?{urlencode({'department': mentor.department})}",
+    }
+
+
+def _voices():
+    return VoiceOfExperience.objects.filter(is_published=True)
+
+
+def _voice_text(voice):
+    return ' '.join([voice.speaker_name, voice.speaker_name, voice.topic, voice.topic, voice.cohort, voice.intro])
+
+
+def _voice_result(voice):
+    return {
+        'title': str(voice),
+        'summary': Truncator(voice.intro).chars(SUMMARY_LENGTH),
+        'url': reverse('voiceofexperience'),
+    }
+
+
+def _notifications():
+    return Notification.objects.filter(recipient__isnull=True)
+
+
+def _notification_text(notification):
+    return ' '.join([notification.title, notification.title, notification.body])
+
+
+def _notification_result(notification):
+    return {
+        'title': notification.title,
+        'summary': Truncator(notification.body).chars(SUMMARY_LENGTH),
+        'url': notification.link or reverse('notifications'),
+    }
+
+
+Source = namedtuple('Source', 'queryset text audience result')
+
+SOURCES = {
+    MENTOR: Source(_mentors, _mentor_text, lambda mentor: EVERYONE, _mentor_result),
+    VOICE: Source(_voices, _voice_text, lambda voice: EVERYONE, _voice_result),
+    NOTIFICATION: Source(
+        _notifications, _notification_text, lambda notification: AUDIENCES[notification.audience],
+        _notification_result,
+    ),
+}
+
+
+def _index_rows(index, group, queryset):
+    source = SOURCES[group]
+    count = 0
+    for row in queryset.iterator(chunk_size=2000):
+        index.add(group, row.pk, source.text(row), source.audience(row))
+        count += 1
+    return count
+
+
+def build_index():
+    """A fresh, frozen index of everything searchable."""
+    # NumPy stays out of web worker start-up until the first search.
+    from core.search_index import SearchIndex
+
+    index = SearchIndex()
+    for group, source in SOURCES.items():
+        _index_rows(index, group, source.queryset().order_by('pk'))
+    index.freeze()
+    return index
+
+
+def catch_up(index):
+    """Index the rows added since ``index`` was built; returns how many."""
+    index.refreshed_at = time.monotonic()
+    added = 0
+    for group, source in SOURCES.items():
+        added += _index_rows(index, group, source.queryset().filter(pk__gt=index.high_water.get(group, 0)))
+    return added
+
+
+def reindex(index, group, pk):
+    source = SOURCES[group]
+    row = source.queryset().filter(pk=pk).first()
+    if row is None:
+        index.remove(group, pk)
+    else:
+        index.add(group, pk, source.text(row), source.audience(row))
+
+
+def get_config():
+    return {**DEFAULT_SEARCH_INDEX, **getattr(settings, 'SEARCH_INDEX', {})}
+
+
+_index = None
+# Guards _index and _pending. Held only to swap them, never while loading,
+# so saves don't wait for a load.
+_index_lock = threading.Lock()
+# One load per process; searches that need the index wait on it.
+_load_lock = threading.Lock()
+# Rows saved in this process before the index was loaded.
+_pending = set()
+
+
+def _fresh_snapshot(config):
+    """The snapshot path if there is one younger than SNAPSHOT_MAX_AGE, else None."""
+    path = config['SNAPSHOT']
+    if not path:
+        return None
+    try:
+        if time.time() - os.path.getmtime(path) < config['SNAPSHOT_MAX_AGE']:
+            return path
+    except OSError:
+        pass
+    return None
+
+
+def _load(config):
+    from core.search_index import SearchIndex
+
+    path = config['SNAPSHOT']
+    snapshot = _fresh_snapshot(config)
+    if snapshot:
+        try:
+            index = SearchIndex.load(snapshot)
+            catch_up(index)
+            return index
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning('Ignoring search index snapshot %s: %s', snapshot, e)
+    index = build_index()
+    if path:
+        try:
+            index.save(path)
+        except OSError as e:
+            logger.warning('Could not write search index snapshot %s: %s', path, e)
+    return index
+
+
+def load_search_index():
+    """This process's index, loading it first if no other thread has."""
+    global _index
+    with _load_lock:
+        if _index is not None:
+            return _index
+        index = _load(get_config())
+        while True:
+            with _index_lock:
+                pending = set(_pending)
+                _pending.clear()
+                if not pending:
+                    _index = index
+                    return index
+            for group, pk in pending:
+                reindex(index, group, pk)
+
+
+def _load_at_startup():
+    try:
+        load_search_index()
+    except Exception:
+        logger.exception('Could not load the search index')
+    finally:
+        connections.close_all()
+
+
+def load_in_background():
+    """
+    Start loading the index from a fresh snapshot in a daemon thread; returns
+    the thread. Without one (or when disabled or already loaded) the first
+    search builds it instead, so starting up never waits on the database.
+    """
+    config = get_config()
+    if _index is not None or not config['LOAD_AT_STARTUP'] or not _fresh_snapshot(config):
+        return None
+    thread = threading.Thread(target=_load_at_startup, name='search-index', daemon=True)
+    thread.start()
+    return thread
+
+
+def get_search_index():
+    config = get_config()
+    index = _index
+    if index is None:
+        index = load_search_index()
+    if time.monotonic() - index.refreshed_at >= config['REFRESH_INTERVAL']:
+        catch_up(index)
+    return index
+
+
+def _changed(group, pk):
+    with _index_lock:
+        index = _index
+        if index is None:
+            _pending.add((group, pk))
+            return
+    reindex(index, group, pk)
+
+
+def schedule_reindex(group, pk):
+    """Bring ``(group, pk)`` up to date in this process's index once the current transaction commits."""
+    transaction.on_commit(partial(_changed, group, pk))
+
+
+def audiences_for(user):
+    if not user.is_authenticated:
+        return {EVERYONE}
+    return {EVERYONE, AUDIENCES[user.user_type]}
+
+
+def search(user, query, type_name=None, limit=20):
+    """The best ``limit`` matches ``user`` may see, as dicts for JSON."""
+    groups = None if type_name is None else {TYPES[type_name]}
+    hits = get_search_index().search(query, groups=groups, audiences=audiences_for(user), limit=limit)
+    wanted = defaultdict(list)
+    for group, pk, _ in hits:
+        wanted[group].append(pk)
+    # Rows deleted or hidden since they were indexed drop out here.
+    rows = {group: SOURCES[group].queryset().in_bulk(pks) for group, pks in wanted.items()}
+    names = {group: name for name, group in TYPES.items()}
+    results = []
+    for group, pk, score in hits:
+        row = rows[group].get(pk)
+        if row is not None:
+            results.append({'type': names[group], 'id': pk, **SOURCES[group].result(row), 'score': round(score, 3)})
+    return results
+
+
+@receiver(setting_changed)
+def reset_search_index(setting, **kwargs):
+    global _index
+    if setting == 'SEARCH_INDEX':
+        _index = None
+        _pending.clear()
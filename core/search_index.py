@@ -0,0 +1,357 @@
+"""
+In-memory inverted index with BM25 ranking, for core.search.
+
+Documents are ``(group, pk)`` pairs (which model, which row) with an
+``audience`` byte that queries filter on. Postings live in two segments:
+
+* a frozen one, the vocabulary in sorted order with every term's document
+  ids and term frequencies in two flat arrays (CSR), which is also the
+  snapshot format;
+* the postings added since, per term, in growable ``array.array``s.
+
+Removing a document only clears its live flag; queries skip dead postings
+and count document frequency over the live ones, so BM25 stays exact.
+``freeze`` folds the added postings in and drops the dead ones, renumbering
+documents; it runs when a snapshot is written.
+
+Query terms match exactly, by prefix (the most frequent ``max_expansions``
+completions) and, when the word itself is unknown, within one edit
+(deletion, transposition, or replacement/insertion of an ASCII letter or
+digit). Completions and corrections score less than the word itself, and a
+document scores each query word once, by its best-matching form.
+
+Only NumPy and the standard library; nothing here touches Django.
+"""
+import array
+import bisect
+import heapq
+import math
+import os
+import re
+import string
+import threading
+from collections import Counter
+
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+_TOKEN = re.compile(r'\w+')
+_EDIT_ALPHABET = string.ascii_lowercase + string.digits
+_KEY_SHIFT = 48
+
+
+def tokenize(text):
+    return [token for token in _TOKEN.findall(text.casefold()) if len(token) > 1]
+
+
+def _edits(word):
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    for left, right in splits:
+        if right:
+            yield left + right[1:]
+            for letter in _EDIT_ALPHABET:
+                yield left + letter + right[1:]
+        if len(right) > 1:
+            yield left + right[1] + right[0] + right[2:]
+        for letter in _EDIT_ALPHABET:
+            yield left + letter + right
+
+
+def _grown(column, capacity):
+    grown = np.zeros(capacity, dtype=column.dtype)
+    grown[:len(column)] = column
+    return grown
+
+
+class SearchIndex:
+    k1 = 1.2
+    b = 0.75
+    prefix_weight = 0.8
+    typo_weight = 0.6
+    max_expansions = 20
+    min_prefix = 3
+    min_typo = 4
+    max_query_terms = 10
+
+    def __init__(self):
+        # Document columns; slots [size:] are spare capacity.
+        self.size = 0
+        self.live_count = 0
+        self.total_length = 0
+        self._groups = np.zeros(0, dtype=np.uint8)
+        self._pks = np.zeros(0, dtype=np.int64)
+        self._audiences = np.zeros(0, dtype=np.uint8)
+        self._lengths = np.zeros(0, dtype=np.uint32)
+        self._live = np.zeros(0, dtype=bool)
+        # (group << 48 | pk) -> document id, built on first use after a load.
+        self._ids = {}
+        # Frozen segment.
+        self._terms = []
+        self._term_ids = {}
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._docs = np.zeros(0, dtype=np.uint32)
+        self._tfs = np.zeros(0, dtype=np.uint16)
+        # Postings added since, and which of their terms the frozen vocabulary lacks.
+        self._added = {}
+        self._new_terms = set()
+        self._new_sorted = None
+        # Highest pk indexed per group, and when the owner last looked for
+        # rows added elsewhere (time.monotonic()).
+        self.high_water = {}
+        self.refreshed_at = 0.0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self.live_count
+
+    # Writing
+
+    def add(self, group, pk, text, audience=0):
+        """Index ``text`` as the document ``(group, pk)``, replacing any earlier version."""
+        counts = Counter(tokenize(text))
+        with self._lock:
+            self._remove(group, pk)
+            doc = self._append(group, pk, audience, sum(counts.values()))
+            for term, tf in counts.items():
+                postings = self._added.get(term)
+                if postings is None:
+                    postings = self._added[term] = (array.array('I'), array.array('H'))
+                    if term not in self._term_ids:
+                        self._new_terms.add(term)
+                        self._new_sorted = None
+                postings[0].append(doc)
+                postings[1].append(min(tf, 65535))
+            if pk > self.high_water.get(group, 0):
+                self.high_water[group] = pk
+
+    def remove(self, group, pk):
+        with self._lock:
+            return self._remove(group, pk)
+
+    def _remove(self, group, pk):
+        doc = self._doc_ids().pop(group << _KEY_SHIFT | pk, None)
+        if doc is None:
+            return False
+        self._live[doc] = False
+        self.live_count -= 1
+        self.total_length -= int(self._lengths[doc])
+        return True
+
+    def _append(self, group, pk, audience, length):
+        if self.size == len(self._pks):
+            # Readers keep the arrays they started with; writers move on to the copies.
+            capacity = max(1024, 2 * self.size)
+            self._groups = _grown(self._groups, capacity)
+            self._pks = _grown(self._pks, capacity)
+            self._audiences = _grown(self._audiences, capacity)
+            self._lengths = _grown(self._lengths, capacity)
+            self._live = _grown(self._live, capacity)
+        doc = self.size
+        self._groups[doc] = group
+        self._pks[doc] = pk
+        self._audiences[doc] = audience
+        self._lengths[doc] = length
+        self._live[doc] = True
+        self.size += 1
+        self.live_count += 1
+        self.total_length += length
+        self._doc_ids()[group << _KEY_SHIFT | pk] = doc
+        return doc
+
+    def _doc_ids(self):
+        if self._ids is None:
+            live = np.flatnonzero(self._live[:self.size])
+            keys = self._groups[live].astype(np.int64) << _KEY_SHIFT | self._pks[live]
+            self._ids = dict(zip(keys.tolist(), live.tolist()))
+        return self._ids
+
+    # Reading
+
+    def search(self, query, groups=None, audiences=None, limit=20):
+        """``(group, pk, score)`` of the best ``limit`` matches, best first."""
+        tokens = list(dict.fromkeys(tokenize(query)))[:self.max_query_terms]
+        if not tokens or limit <= 0:
+            return []
+        with self._lock:
+            size, live_count, total_length = self.size, self.live_count, self.total_length
+            live, lengths = self._live[:size], self._lengths[:size]
+            doc_groups, pks, doc_audiences = self._groups[:size], self._pks[:size], self._audiences[:size]
+            words = [
+                [(weight, *self._postings(term)) for term, weight in self._expand(token)]
+                for token in tokens
+            ]
+        if not live_count:
+            return []
+
+        average_length = total_length / live_count
+        scores = np.zeros(size, dtype=np.float32)
+        for forms in words:
+            best = scores if len(forms) == 1 else np.zeros(size, dtype=np.float32)
+            for weight, docs, tfs in forms:
+                alive = live[docs]
+                docs, tfs = docs[alive], tfs[alive].astype(np.float32)
+                if not len(docs):
+                    continue
+                idf = math.log(1 + (live_count - len(docs) + 0.5) / (len(docs) + 0.5))
+                norm = self.k1 * (1 - self.b + self.b / average_length * lengths[docs])
+                form_scores = np.float32(weight * idf * (self.k1 + 1)) * tfs / (tfs + norm)
+                if best is scores:
+                    scores[docs] += form_scores
+                else:
+                    # A term lists each document once, so plain indexing is safe.
+                    best[docs] = np.maximum(best[docs], form_scores)
+            if best is not scores:
+                scores += best
+
+        candidates = np.flatnonzero(scores)
+        if groups is not None:
+            candidates = candidates[np.isin(doc_groups[candidates], list(groups))]
+        if audiences is not None:
+            candidates = candidates[np.isin(doc_audiences[candidates], list(audiences))]
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return [
+            (int(doc_groups[doc]), int(pks[doc]), float(scores[doc]))
+            for doc in candidates.tolist()
+        ]
+
+    def _postings(self, term):
+        docs, tfs = [], []
+        term_id = self._term_ids.get(term)
+        if term_id is not None:
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            docs.append(self._docs[start:end])
+            tfs.append(self._tfs[start:end])
+        added = self._added.get(term)
+        if added is not None:
+            docs.append(np.frombuffer(added[0], dtype=np.uint32).copy())
+            tfs.append(np.frombuffer(added[1], dtype=np.uint16).copy())
+        if len(docs) == 1:
+            return docs[0], tfs[0]
+        return np.concatenate(docs), np.concatenate(tfs)
+
+    def _frequency(self, term):
+        """Postings for ``term``, live or not; good enough to pick expansions by."""
+        count = 0
+        term_id = self._term_ids.get(term)
+        if term_id is not None:
+            count += int(self._offsets[term_id + 1] - self._offsets[term_id])
+        added = self._added.get(term)
+        if added is not None:
+            count += len(added[0])
+        return count
+
+    def _known(self, term):
+        return term in self._term_ids or term in self._added
+
+    def _expand(self, token):
+        forms = {}
+        if self._known(token):
+            forms[token] = 1.0
+        if len(token) >= self.min_prefix:
+            for term in heapq.nlargest(self.max_expansions, self._completions(token), key=self._frequency):
+                forms.setdefault(term, self.prefix_weight)
+        if token not in forms and len(token) >= self.min_typo:
+            corrections = {edit for edit in _edits(token) if self._known(edit)}
+            for term in heapq.nlargest(self.max_expansions, corrections, key=self._frequency):
+                forms.setdefault(term, self.typo_weight)
+        return forms.items()
+
+    def _completions(self, prefix):
+        if self._new_sorted is None:
+            self._new_sorted = sorted(self._new_terms)
+        for vocabulary in (self._terms, self._new_sorted):
+            for i in range(bisect.bisect_right(vocabulary, prefix), len(vocabulary)):
+                if not vocabulary[i].startswith(prefix):
+                    break
+                yield vocabulary[i]
+
+    # Compaction and snapshots
+
+    def freeze(self):
+        """Fold the added postings into the frozen segment and drop removed documents."""
+        with self._lock:
+            size = self.size
+            live = self._live[:size]
+            new_ids = np.cumsum(live, dtype=np.int64) - 1
+
+            terms = sorted(self._new_terms.union(self._terms))
+            term_index = {term: i for i, term in enumerate(terms)}
+            old_to_new = np.array([term_index[term] for term in self._terms], dtype=np.int32)
+            term_parts = [np.repeat(old_to_new, np.diff(self._offsets))]
+            doc_parts, tf_parts = [self._docs], [self._tfs]
+            for term, (docs, tfs) in self._added.items():
+                term_parts.append(np.full(len(docs), term_index[term], dtype=np.int32))
+                doc_parts.append(np.frombuffer(docs, dtype=np.uint32))
+                tf_parts.append(np.frombuffer(tfs, dtype=np.uint16))
+            term_ids = np.concatenate(term_parts)
+            docs = np.concatenate(doc_parts)
+            tfs = np.concatenate(tf_parts)
+            del doc_parts, tf_parts
+
+            keep = live[docs]
+            term_ids, docs, tfs = term_ids[keep], docs[keep], tfs[keep]
+            # Frozen postings precede added ones and document ids only grow,
+            # so a stable sort by term leaves each term's documents in order.
+            order = np.argsort(term_ids, kind='stable')
+            term_ids = term_ids[order]
+            docs = new_ids[docs[order]].astype(np.uint32)
+            tfs = tfs[order]
+
+            counts = np.bincount(term_ids, minlength=len(terms))
+            used = counts > 0
+            self._terms = [term for term, kept in zip(terms, used.tolist()) if kept]
+            self._term_ids = {term: i for i, term in enumerate(self._terms)}
+            self._offsets = np.concatenate([[0], np.cumsum(counts[used])]).astype(np.int64)
+            self._docs, self._tfs = docs, tfs
+            self._added, self._new_terms, self._new_sorted = {}, set(), None
+
+            self._groups = self._groups[:size][live]
+            self._pks = self._pks[:size][live]
+            self._audiences = self._audiences[:size][live]
+            self._lengths = self._lengths[:size][live]
+            self.size = len(self._pks)
+            self._live = np.ones(self.size, dtype=bool)
+            self._ids = None
+
+    def save(self, path):
+        """Write a snapshot (after freezing) atomically to ``path``."""
+        with self._lock:
+            self.freeze()
+            groups = sorted(self.high_water)
+            arrays = {
+                'version': np.array([SNAPSHOT_VERSION]),
+                'groups': self._groups, 'pks': self._pks, 'audiences': self._audiences, 'lengths': self._lengths,
+                'terms': np.frombuffer('\n'.join(self._terms).encode(), dtype=np.uint8),
+                'offsets': self._offsets, 'docs': self._docs, 'tfs': self._tfs,
+                'high_water': np.array([[group, self.high_water[group]] for group in groups], dtype=np.int64),
+            }
+        temporary = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(temporary, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    @classmethod
+    def load(cls, path):
+        """An index read from a snapshot; ``ValueError`` if it is from another version."""
+        index = cls()
+        with np.load(path, allow_pickle=False) as snapshot:
+            if int(snapshot['version'][0]) != SNAPSHOT_VERSION:
+                raise ValueError(f"Snapshot version {int(snapshot['version'][0])}, expected {SNAPSHOT_VERSION}.")
+            index._groups, index._pks = snapshot['groups'], snapshot['pks']
+            index._audiences, index._lengths = snapshot['audiences'], snapshot['lengths']
+            index._offsets, index._docs, index._tfs = snapshot['offsets'], snapshot['docs'], snapshot['tfs']
+            terms = snapshot['terms'].tobytes().decode()
+            index.high_water = {int(group): int(pk) for group, pk in snapshot['high_water'].reshape(-1, 2).tolist()}
+        index._terms = terms.split('\n') if terms else []
+        index._term_ids = {term: i for i, term in enumerate(index._terms)}
+        index.size = index.live_count = len(index._pks)
+        index.total_length = int(index._lengths.sum(dtype=np.int64))
+        index._live = np.ones(index.size, dtype=bool)
+        index._ids = None
+        return index
@@ -0,0 +1,105 @@
+import logging
+
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.core.signals import request_finished
+from django.db import close_old_connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core import search
+from core.activity import get_activity_buffer
+from core.backends import invalidate_user
+from core.enums import AuditEventKindChoices
+from core.middleware import record_queries
+from core.routers import PRIMARY, track_writes
+from core.models import Notification, User, VoiceOfExperience
+from core.notifications import invalidate_broadcasts, invalidate_unread, publish
+from core.page_cache import invalidate_page
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(connection_created)
+def install_execute_wrappers(sender, connection, **kwargs):
+    # Reconnecting fires this again on the same wrapper.
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_queries)
+    if connection.alias == PRIMARY and track_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, track_writes)
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def invalidate_unread_counts(sender, instance, **kwargs):
+    if instance.is_broadcast:
+        invalidate_broadcasts()
+    else:
+        invalidate_unread(instance.recipient_id)
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def reindex_notification(sender, instance, created=False, **kwargs):
+    # Personal notifications aren't searchable, but one edited into or out
+    # of a broadcast has to be looked at.
+    if instance.is_broadcast or not created:
+        search.schedule_reindex(search.NOTIFICATION, instance.pk)
+
+
+@receiver(post_save, sender=Notification)
+def push_notification(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: publish(instance))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # set_password() is always followed by save(), so this covers password
+    # changes too.
+    invalidate_user(instance.pk)
+
+
+# Replaces django.contrib.auth's receiver, which saves last_login on every login.
+user_logged_in.disconnect(dispatch_uid='update_last_login')
+
+
+@receiver(user_logged_in)
+def buffer_login(sender, request, user, **kwargs):
+    buffer = get_activity_buffer()
+    buffer.login(user)
+    buffer.record(AuditEventKindChoices.LOGIN, user.pk)
+
+
+def flush_activity(sender, **kwargs):
+    # The response has gone out; a failed write stays buffered for the next try.
+    try:
+        get_activity_buffer().flush_if_due()
+    except Exception:
+        logger.exception('Activity buffer flush failed')
+
+
+# Ahead of Django's close_old_connections, so the connection a flush uses is
+# closed (or kept, per CONN_MAX_AGE) with the request's rather than left open.
+request_finished.disconnect(close_old_connections)
+request_finished.connect(flush_activity)
+request_finished.connect(close_old_connections)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_user(user.pk)
+
+
+@receiver(post_save, sender=VoiceOfExperience)
+@receiver(post_delete, sender=VoiceOfExperience)
+def invalidate_voice_of_experience_page(sender, **kwargs):
+    invalidate_page('voiceofexperience.html')
+
+
+@receiver(post_save, sender=VoiceOfExperience)
+@receiver(post_delete, sender=VoiceOfExperience)
+def reindex_voice_of_experience(sender, instance, **kwargs):
+    search.schedule_reindex(search.VOICE, instance.pk)
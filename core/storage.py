@@ -0,0 +1,23 @@
+from django.conf import settings
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from core.images import build_variants, hashed_names
+
+
+class ImageVariantStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    WhiteNoise's storage plus responsive image variants, built at the end of
+    ``collectstatic`` (see core.images) and added to the staticfiles
+    manifest. Skipped when Pillow is not installed.
+    """
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        if kwargs.get('dry_run') or not getattr(settings, 'BUILD_IMAGE_VARIANTS', True):
+            return
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            return
+        self.hashed_files.update(hashed_names(build_variants(self.location)))
+        self.save_manifest()
@@ -0,0 +1,114 @@
+import mimetypes
+import os
+import re
+
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` inclusive for a single ``bytes=`` range, or ``None`` to
+    serve the whole file. Multi-range requests are answered with the whole
+    file, which RFC 9110 allows.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+class FileRange:
+    """
+    File-like view of bytes ``start..end`` (inclusive) of an open file.
+
+    It keeps ``fileno()`` and leaves the file positioned at ``start``, so
+    servers that implement ``wsgi.file_wrapper`` with sendfile (gunicorn) send
+    exactly ``Content-Length`` bytes from there without copying them through
+    Python. Everything else reads it in ``block_size`` chunks.
+    """
+
+    def __init__(self, fileobj, start, end):
+        self.fileobj = fileobj
+        self.remaining = end - start + 1
+        fileobj.seek(start)
+
+    def fileno(self):
+        return self.fileobj.fileno()
+
+    def tell(self):
+        return self.fileobj.tell()
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.fileobj.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.fileobj.close()
+
+
+def ranged_file_response(request, path, content_type=None, max_age=60 * 60 * 24):
+    """
+    Serve ``path`` with ETag/Last-Modified validation and single byte-range
+    support (206 Partial Content). Both cases are FileResponses, so the server
+    can hand them to ``wsgi.file_wrapper``/sendfile.
+    """
+    fileobj = open(path, 'rb')
+    stat = os.fstat(fileobj.fileno())
+    size = stat.st_size
+    etag = quote_etag(f'{int(stat.st_mtime)}-{size}')
+    content_type = content_type or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if conditional is not None:
+        fileobj.close()
+        return conditional
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if not if_range or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            fileobj.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None or size == 0:
+        response = FileResponse(fileobj, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(FileRange(fileobj, start, end), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
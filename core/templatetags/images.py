@@ -0,0 +1,51 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from core.images import FORMATS, variants_for
+
+register = template.Library()
+
+
+def _static(name):
+    # Manifest storage raises ValueError for files it doesn't know.
+    try:
+        return static(name)
+    except ValueError:
+        return f'{settings.STATIC_URL}{name}'
+
+
+def _srcset(variants):
+    return ', '.join(f'{settings.STATIC_URL}{path} {width}w' for width, path in variants)
+
+
+@register.simple_tag
+def picture(name, alt='', sizes='100vw', css_class='', loading='lazy'):
+    """
+    ``<picture>`` markup for a static image using the variants built by
+    ``build_image_variants``. Falls back to a plain ``<img>`` for images that
+    have no variants (e.g. in development before collectstatic) and for
+    paths the staticfiles manifest doesn't know.
+
+        {% load images %}
+        {% picture 'images/hero.png' alt='Students' sizes='(min-width: 768px) 50vw, 100vw' %}
+    """
+    record = variants_for(name)
+    if record is None:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async">',
+            _static(name), alt, css_class, loading,
+        )
+
+    variants = record['variants']
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((FORMATS[fmt][1], _srcset(variants[fmt]), sizes) for fmt in FORMATS if fmt != 'jpeg' and fmt in variants),
+    )
+    # Transparent images get no JPEG variants; they fall back to the original.
+    fallback_srcset = format_html(' srcset="{}" sizes="{}"', _srcset(variants['jpeg']), sizes) if 'jpeg' in variants else ''
+    return format_html(
+        '<picture>{}<img src="{}"{} width="{}" height="{}" alt="{}" class="{}" loading="{}" decoding="async"></picture>',
+        sources, _static(name), fallback_srcset, record['width'], record['height'], alt, css_class, loading,
+    )
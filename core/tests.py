@@ -1,3 +1,1282 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import importlib.util
+import io
+import json
+import os
+import shutil
+import smtplib
+import subprocess
+import sys
+import tempfile
+import types
+import unittest.mock
+from contextlib import redirect_stdout
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core import mail
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.mail.backends.locmem import EmailBackend as LocMemEmailBackend
+from django.core.signals import request_finished
+from django.core.management import call_command
+from django.db import DatabaseError, close_old_connections, connections, transaction
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import path, reverse
+from django.utils import timezone
+
+from campus_connect import urls
+from core import (
+    activity, async_views, benchmarking, metrics, middleware, notifications, routers, search, signals,
+)
+from core.backends import CachedModelBackend
+from core.bundling import build_template, minify_html, stale_templates
+from core.broker import Broker, LocalBackend, RedisBackend
+from core.checks import check_throttle_cache
+from core.contact_queue import ContactQueue, MemoryBackend, QueueFull, SQLiteBackend, get_contact_queue
+from core.enums import AuditEventKindChoices, NotificationAudienceChoices, UserTypeChoices
+from core.forms import SignupForm
+from core.images import build_variants, hashed_names
+from core.models import (
+    AuditEvent, ContactMessage, Notification, NotificationReadState, User, VoiceOfExperience, _tsquery_prefix,
+)
+from core.pagination import EstimatedCountPaginator
+from core.search_index import SearchIndex
+from core.throttling import LocalStore, Throttle, reset_throttles
+from core.views import NotificationStreamView
+from mentor.models import ExpertiseTag, Mentor
+from student.models import StudentProfile
+
+
+class NotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Without the announcements seeded by migration 0009.
+        Notification.objects.all().delete()
+        self.student = User.objects.create_user(email='student@example.com', first_name='Stu')
+        self.mentor = User.objects.create_user(
+            email='mentor@example.com', first_name='Men', user_type=UserTypeChoices.MENTOR,
+        )
+
+    def test_page_announcements_are_seeded(self):
+        seed = importlib.import_module('core.migrations.0009_seed_announcements')
+        seed.seed_announcements(django_apps, None)
+        seed.seed_announcements(django_apps, None)
+        response = self.client.get(reverse('notifications'))
+        self.assertEqual(
+            [notification.title for notification in response.context['notifications']],
+            [fields['title'] for fields in reversed(seed.ANNOUNCEMENTS)],
+        )
+        self.assertContains(response, 'Career Guidance Session with Alumni')
+
+    def test_broadcast_is_one_row_and_respects_audience(self):
+        Notification.objects.create(title='All')
+        Notification.objects.create(title='Mentors only', audience=NotificationAudienceChoices.MENTOR)
+        Notification.objects.create(title='Personal', recipient=self.student)
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(notifications.unread_count(self.student), 2)
+        self.assertEqual(notifications.unread_count(self.mentor), 2)
+
+    def test_cached_count_costs_no_query_and_is_invalidated_on_write(self):
+        Notification.objects.create(title='First')
+        self.assertEqual(notifications.unread_count(self.student), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(notifications.unread_count(self.student), 1)
+        Notification.objects.create(title='Second')
+        self.assertEqual(notifications.unread_count(self.student), 2)
+
+    @override_settings(UNREAD_CACHE_TIMEOUT=0)
+    def test_count_expires_after_unread_cache_timeout(self):
+        # Another worker's invalidation never reaches a local cache; expiry
+        # bounds how long its count can lag.
+        Notification.objects.create(title='First')
+        self.assertEqual(notifications.unread_count(self.student), 1)
+        with self.assertNumQueries(2):
+            self.assertEqual(notifications.unread_count(self.student), 1)
+
+    def test_out_of_order_reads_compact_into_high_water_mark(self):
+        first, second, third = (Notification.objects.create(title=str(i)) for i in range(3))
+        notifications.mark_read(self.student, third.pk)
+        state = notifications.get_read_state(self.student)
+        self.assertEqual((state.last_read_id, state.read_ids), (0, [third.pk]))
+        self.assertEqual(notifications.unread_count(self.student), 2)
+
+        notifications.mark_read(self.student, first.pk)
+        notifications.mark_read(self.student, second.pk)
+        state.refresh_from_db()
+        self.assertEqual((state.last_read_id, state.read_ids), (third.pk, []))
+        self.assertEqual(notifications.unread_count(self.student), 0)
+
+    def test_cannot_mark_someone_elses_notification(self):
+        other = Notification.objects.create(title='Theirs', recipient=self.mentor)
+        notifications.mark_read(self.student, other.pk)
+        self.assertEqual(notifications.get_read_state(self.student).read_ids, [])
+
+
+class BrokerTests(TestCase):
+    def test_local_backend_fans_out_and_drops_oldest_when_full(self):
+        broker = Broker(LocalBackend(), max_queue_size=2)
+
+        async def scenario():
+            async with broker.subscribe(['a', 'b']) as both, broker.subscribe(['b']) as only_b:
+                for i in range(3):
+                    broker.publish('b', {'id': i})
+                broker.publish('a', {'id': 9})
+                await asyncio.sleep(0)
+                received = [await both.get(timeout=0.1) for _ in range(2)]
+                return received, await only_b.get(timeout=0.1), broker.subscriber_count()
+
+        received, first_b, count = async_to_sync(scenario)()
+        self.assertEqual(received, [{'id': 2}, {'id': 9}])
+        self.assertEqual(first_b, {'id': 1})
+        self.assertEqual(count, 2)
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    def test_redis_backend_needs_the_redis_package(self):
+        with unittest.mock.patch.dict(sys.modules, {'redis': None}):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'needs the "redis" package'):
+                RedisBackend()
+
+    def test_redis_listener_resubscribes_after_a_dropped_connection(self):
+        class Dropped(Exception):
+            pass
+
+        class Stop(Exception):
+            pass
+
+        def listen_then(error, *items):
+            yield from items
+            raise error
+
+        message = {'channel': b'campus_connect:user:1', 'data': b'{"id": 7}'}
+        fake_redis = types.SimpleNamespace(Redis=unittest.mock.Mock(), ConnectionError=Dropped, TimeoutError=Dropped)
+        with unittest.mock.patch.dict(sys.modules, {'redis': fake_redis}):
+            backend = RedisBackend(reconnect_backoff=0)
+        pubsubs = [unittest.mock.Mock(), unittest.mock.Mock()]
+        pubsubs[0].listen.return_value = listen_then(Dropped('Connection reset by peer'), message)
+        pubsubs[1].listen.return_value = listen_then(Stop(), message)
+        backend._client.pubsub.side_effect = pubsubs
+        delivered = []
+        with self.assertLogs('core.broker', 'ERROR') as logs, self.assertRaises(Stop):
+            backend._listen(lambda channel, data: delivered.append((channel, data)))
+        self.assertIn('Connection reset by peer', logs.output[0])
+        self.assertEqual(delivered, [('user:1', {'id': 7})] * 2)
+        for pubsub in pubsubs:
+            pubsub.psubscribe.assert_called_once_with('campus_connect:*')
+            pubsub.close.assert_called_once_with()
+
+    def test_stream_replays_missed_and_pushes_new(self):
+        user = User.objects.create_user(email='stream@example.com', first_name='S')
+        missed = Notification.objects.create(title='Missed', recipient=user)
+        view = NotificationStreamView()
+
+        async def scenario():
+            stream = view.stream(user, last_event_id=missed.pk - 1)
+            events = [await stream.__anext__(), await stream.__anext__()]
+            live = Notification(pk=missed.pk + 1, title='Live', recipient=user, created_at=missed.created_at)
+            notifications.publish(live)
+            events.append(await stream.__anext__())
+            await stream.aclose()
+            return events
+
+        retry, replayed, pushed = async_to_sync(scenario)()
+        self.assertTrue(retry.startswith('retry:'))
+        self.assertEqual(json.loads(replayed.split('data: ')[1])['title'], 'Missed')
+        self.assertIn(f'id: {missed.pk + 1}', pushed)
+
+
+class SignupFormTests(TestCase):
+    data = {
+        'username': 'fresher_1',
+        'email': 'fresher@example.com',
+        'password': 'Correct-Horse-42',
+        'confirm_password': 'Correct-Horse-42',
+        'user_type': UserTypeChoices.STUDENT,
+    }
+
+    def test_validation_is_a_single_query(self):
+        form = SignupForm(self.data)
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid(), form.errors)
+        user = form.save()
+        self.assertTrue(user.check_password('Correct-Horse-42'))
+
+    def test_duplicates_are_reported_per_field(self):
+        User.objects.create_user(email='fresher@example.com', first_name='F', username='fresher_1')
+        form = SignupForm(self.data)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['username'], ['This username is already taken.'])
+        self.assertEqual(form.errors['email'], ['This email is already registered.'])
+
+    def test_password_similar_to_username_is_rejected(self):
+        form = SignupForm({**self.data, 'password': 'fresher_1x', 'confirm_password': 'fresher_1x'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('password', form.errors)
+
+
+def remove_seeded_mentors():
+    """Delete the mentors seeded by migration mentor 0006, for tests that count users or mentors."""
+    importlib.import_module('mentor.migrations.0006_seed_mentors').remove_mentors(django_apps, None)
+
+
+class ImportUsersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        remove_seeded_mentors()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.rejects = os.path.join(self.directory, 'rejects.jsonl')
+
+    def run_import(self, lines, **options):
+        path = os.path.join(self.directory, 'users.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(line + '\n' for line in lines)
+        call_command('import_users', path, workers=1, rejects=self.rejects, stdout=io.StringIO(), **options)
+        return path
+
+    def rejected(self):
+        with open(self.rejects, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_users_are_imported_with_profiles(self):
+        path = self.run_import([
+            json.dumps({'email': 'Sana@Uni.edu', 'first_name': 'Sana', 'password': 'Correct-Horse-42'}),
+            json.dumps({'email': 'omar@uni.edu', 'user_type': 'mentor', 'department': 'BSSE', 'year': 4}),
+        ])
+        student = User.objects.get(email='Sana@uni.edu')
+        self.assertTrue(student.check_password('Correct-Horse-42'))
+        self.assertEqual(student.username, 'Sana')
+        self.assertEqual(StudentProfile.objects.get().user, student)
+        mentor = Mentor.objects.get()
+        self.assertEqual((mentor.user.email, mentor.department, mentor.year), ('omar@uni.edu', 'BSSE', 4))
+        self.assertFalse(os.path.exists(f'{path}.import-progress'))
+
+    def test_bad_rows_are_rejected_one_by_one(self):
+        self.run_import([
+            '{"email": "broken@uni.edu",',
+            '[1, 2]',
+            json.dumps({'email': 'not-an-email'}),
+            json.dumps({'email': 'long@uni.edu', 'department': 'x' * 101}),
+            json.dumps({'email': 'year@uni.edu', 'year': 99999}),
+            json.dumps({'email': 'good@uni.edu'}),
+        ])
+        self.assertEqual(list(User.objects.values_list('email', flat=True)), ['good@uni.edu'])
+        rejected = self.rejected()
+        self.assertEqual([row['row'] for row in rejected], [1, 2, 3, 4, 5])
+        self.assertIn('Invalid JSON', rejected[0]['reason'])
+        self.assertEqual(rejected[0]['data'], '{"email": "broken@uni.edu",')
+        self.assertIn('Expected a JSON object', rejected[1]['reason'])
+        self.assertTrue(rejected[3]['reason'].startswith('department:'))
+        self.assertTrue(rejected[4]['reason'].startswith('year:'))
+
+    def test_resumes_after_the_checkpoint(self):
+        lines = [json.dumps({'email': f'user{i}@uni.edu'}) for i in range(3)]
+        path = os.path.join(self.directory, 'users.jsonl')
+        with open(f'{path}.import-progress', 'w') as f:
+            json.dump({'rows_done': 2}, f)
+        self.run_import(lines, resume=True)
+        self.assertEqual(list(User.objects.values_list('email', flat=True)), ['user2@uni.edu'])
+        self.assertFalse(os.path.exists(f'{path}.import-progress'))
+
+    def test_empty_file(self):
+        self.run_import([])
+        self.assertFalse(User.objects.exists())
+
+
+def shared_caches():
+    """Use default and 'users' caches shared between processes, as cached sessions and CachedModelBackend require."""
+    file_cache = 'django.core.cache.backends.filebased.FileBasedCache'
+    return override_settings(
+        CACHES={
+            **settings.CACHES,
+            'default': {'BACKEND': file_cache, 'LOCATION': tempfile.mkdtemp()},
+            'users': {'BACKEND': file_cache, 'LOCATION': tempfile.mkdtemp()},
+        },
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+        AUTHENTICATION_BACKENDS=['core.backends.CachedModelBackend'],
+    )
+
+
+@shared_caches()
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['users'].clear()
+        self.user = User.objects.create_user(email='cached@example.com', first_name='Cached', password='pw')
+        self.client.force_login(self.user)
+
+    def test_repeat_page_views_skip_the_user_query(self):
+        self.client.get(reverse('profile'))
+        # Only the page's own profile query; the session user comes from the cache.
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('profile'))
+        self.assertContains(response, 'Cached')
+
+    def test_save_invalidates_cached_user(self):
+        self.client.get(reverse('profile'))
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        self.assertContains(self.client.get(reverse('profile')), 'Renamed')
+
+    def test_password_change_ends_other_sessions(self):
+        self.client.get(reverse('profile'))
+        self.user.set_password('new-password')
+        self.user.save()
+        self.assertNotContains(self.client.get(reverse('profile')), 'Cached')
+
+    def test_per_process_cache_is_refused(self):
+        local = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        with self.settings(CACHES={**settings.CACHES, 'users': local}):
+            with self.assertRaises(ImproperlyConfigured):
+                CachedModelBackend()
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        caches['pages'].clear()
+
+    def test_repeat_visit_with_etag_gets_304(self):
+        first = self.client.get(reverse('about-us'))
+        etag = first['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        second = self.client.get(reverse('about-us'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b'')
+
+    def test_pages_are_keyed_on_user_type(self):
+        anonymous = self.client.get(reverse('home'))['ETag']
+        self.client.force_login(User.objects.create_user(email='a@example.com', first_name='A'))
+        self.client.get(reverse('home'))
+        cached = [key for key in caches['pages']._cache if ':page:home.html:' in key]
+        self.assertEqual(len(cached), 2)
+        self.assertEqual(self.client.get(reverse('home'))['ETag'], anonymous)
+
+
+class PictureTagTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.root, 'images'))
+
+    def render(self, name):
+        with self.settings(STATIC_ROOT=self.root):
+            return Template("{% load images %}{% picture name alt='Campus' %}").render(Context({'name': name}))
+
+    @unittest.skipUnless(importlib.util.find_spec('PIL'), 'Pillow is not installed')
+    def test_variants_are_built_and_listed_for_the_staticfiles_manifest(self):
+        from PIL import Image
+
+        Image.new('RGB', (800, 400), 'teal').save(os.path.join(self.root, 'images', 'campus.png'))
+        manifest = build_variants(self.root, widths=(320, 640))
+        record = manifest['images']['images/campus.png']
+        self.assertEqual((record['width'], record['height']), (800, 400))
+        self.assertEqual([width for width, _ in record['variants']['jpeg']], [320, 640])
+        for variants in record['variants'].values():
+            for _, variant in variants:
+                self.assertTrue(os.path.exists(os.path.join(self.root, variant)))
+        names = hashed_names(manifest)
+        self.assertEqual(names['images/variants/campus.320w.jpeg'], record['variants']['jpeg'][0][1])
+        # Variants are not sources themselves, even when listed in a manifest.
+        with open(os.path.join(self.root, 'staticfiles.json'), 'w') as f:
+            json.dump({'paths': {'images/campus.png': 'images/campus.png', **names}}, f)
+        self.assertEqual(list(build_variants(self.root, widths=(320, 640))['images']), ['images/campus.png'])
+
+        html = self.render('images/campus.png')
+        self.assertIn('<source type="image/webp" srcset="/static/images/variants/campus.320w.', html)
+        self.assertIn('width="800" height="400" alt="Campus"', html)
+
+    def test_image_without_variants_is_a_plain_img(self):
+        self.assertHTMLEqual(
+            self.render('images/plain.png'),
+            '<img src="/static/images/plain.png" alt="Campus" class="" loading="lazy" decoding="async">',
+        )
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.ManifestStaticFilesStorage')
+    def test_path_missing_from_the_staticfiles_manifest_is_a_plain_img(self):
+        self.assertIn('<img src="/static/images/missing.png"', self.render('images/missing.png'))
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        caches['pages'].clear()
+        caches['compressed'].clear()
+
+    def test_gzip_round_trip(self):
+        plain = self.client.get(reverse('about-us'))
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.client.get(reverse('about-us'), HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(response['ETag'], f"W/{plain['ETag']}")
+
+    def test_cached_body_and_revalidation(self):
+        first = self.client.get(reverse('about-us'), HTTP_ACCEPT_ENCODING='gzip;q=1, br;q=0')
+        self.assertEqual(len(caches['compressed']._cache), 1)
+        second = self.client.get(reverse('about-us'), HTTP_ACCEPT_ENCODING='gzip;q=1, br;q=0')
+        self.assertEqual(second.content, first.content)
+        revalidated = self.client.get(
+            reverse('about-us'), HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=first['ETag'],
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_responses_carrying_the_csrf_token_are_not_compressed(self):
+        response = self.client.get(reverse('login'), HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_per_request_gzip_bodies_are_padded(self):
+        body = b'{"results": []}' * 50
+        compression = middleware.CompressionMiddleware(lambda request: HttpResponse(body, content_type='application/json'))
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        bodies = [compression(request).content for _ in range(5)]
+        self.assertEqual({gzip.decompress(content) for content in bodies}, {body})
+        self.assertGreater(len({len(content) for content in bodies}), 1)
+
+    def test_choose_encoding(self):
+        choose = middleware.CompressionMiddleware.choose_encoding
+        self.assertIsNone(choose(''))
+        self.assertIsNone(choose('identity, gzip;q=0'))
+        self.assertEqual(choose('deflate, *;q=0.5, br;q=0'), 'gzip')
+        self.assertEqual(choose('gzip, br'), 'br' if middleware.brotli else 'gzip')
+
+
+class BuildTemplateTests(TestCase):
+    def test_inline_css_and_js_move_to_hashed_bundles(self):
+        html, bundles = build_template(
+            '<html><head><style>\n  body { color: red; }\n  /* note */\n</style></head>'
+            '<body><script>\n  init();\n</script></body></html>'
+        )
+        self.assertEqual(sorted(bundles.values()), ['body{color:red}', 'init();\n'])
+        css_path = next(path for path in bundles if path.endswith('.css'))
+        self.assertTrue(html.startswith('{% load static %}'))
+        self.assertIn(f"<link rel=\"stylesheet\" href=\"{{% static '{css_path}' %}}\">", html)
+        self.assertNotIn('init()', html)
+
+    def test_blocks_with_template_syntax_stay_inline(self):
+        source = '<style>a { color: {{ colour }}; }</style><script>var id = {{ user.pk }};</script>'
+        html, bundles = build_template(source)
+        self.assertEqual(bundles, {})
+        self.assertEqual(html, source)
+
+    def test_minify_keeps_raw_text_and_template_tags(self):
+        source = (
+            '<div>\n    <p>a   b</p>\n<!-- drop me -->\n<pre>  keep\n  this</pre>'
+            '{% if x %}  {{ x|default:"  " }}{% endif %}<!-- {% if y %} -->{# note #}</div>'
+        )
+        self.assertEqual(
+            minify_html(source),
+            '<div> <p>a b</p> <pre>  keep\n  this</pre>{% if x %} {{ x|default:"  " }}{% endif %}'
+            '<!-- {% if y %} --></div>',
+        )
+
+    def test_build_and_check(self):
+        build_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, build_dir)
+        source_dir = os.path.join(settings.BASE_DIR, 'templates')
+        self.assertIn('home.html', stale_templates(source_dir, build_dir))
+        with override_settings(TEMPLATE_BUILD_DIR=build_dir):
+            call_command('build_templates', stdout=io.StringIO())
+            call_command('build_templates', '--check', stdout=io.StringIO())
+        self.assertEqual(stale_templates(source_dir, build_dir), [])
+        self.assertTrue(os.listdir(os.path.join(build_dir, 'static', 'bundles')))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class VoiceRecordingTests(TestCase):
+    def setUp(self):
+        self.audio = bytes(range(256)) * 40
+        self.recording = VoiceOfExperience(speaker_name='Sarah Ahmed')
+        self.recording.audio.save('talk.m4a', ContentFile(self.audio))
+        self.url = reverse('voice-recording', args=[self.recording.pk])
+
+    def test_full_download_advertises_ranges(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'audio/mp4')
+        self.assertEqual(b''.join(response.streaming_content), self.audio)
+
+    def test_range_returns_partial_content(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.audio)}')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(b''.join(response.streaming_content), self.audio[100:200])
+
+        suffix = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(suffix.streaming_content), self.audio[-10:])
+
+    def test_unsatisfiable_range_and_stale_if_range(self):
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.audio)}-')
+        self.assertEqual(response.status_code, 416)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_revalidation_gets_304(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_bundled_recordings_are_seeded_into_storage(self):
+        seed = importlib.import_module('core.migrations.0007_seed_voice_recordings')
+        VoiceOfExperience.objects.filter(speaker_name__in=['Sarah Ahmed', 'Ali Khan']).delete()
+        seed.seed_recordings(django_apps, None)
+        seed.seed_recordings(django_apps, None)
+        seeded = VoiceOfExperience.objects.get(speaker_name='Ali Khan')
+        self.assertEqual(VoiceOfExperience.objects.filter(speaker_name__in=['Sarah Ahmed', 'Ali Khan']).count(), 2)
+        self.assertEqual(seeded.audio.name, 'voices/voice_of_experience_huzaifa_friend.m4a')
+
+        response = self.client.get(reverse('voiceofexperience'))
+        self.assertContains(response, 'Dealing with exam pressure')
+        response = self.client.get(reverse('voice-recording', args=[seeded.pk]), HTTP_RANGE='bytes=0-3')
+        with open(os.path.join(settings.BASE_DIR, 'static', 'audios', 'voice of experience huzaifa friend.m4a'), 'rb') as f:
+            self.assertEqual(b''.join(response.streaming_content), f.read(4))
+
+
+@override_settings(METRICS_TOKEN='scrape-me')
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        remove_seeded_mentors()
+
+    def setUp(self):
+        caches['pages'].clear()
+        for histogram in metrics.REGISTRY:
+            histogram.reset()
+
+    def test_metrics_require_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+
+    def test_requests_are_recorded_per_route(self):
+        self.assertEqual(self.client.get(reverse('mentors')).status_code, 200)
+        body = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-me').content.decode()
+        self.assertIn('campus_connect_request_duration_seconds_count{route="mentors",method="GET"} 1', body)
+        self.assertIn('campus_connect_db_queries_sum{route="mentors",method="GET"} 2', body)
+        self.assertIn('campus_connect_response_size_bytes_count{route="mentors",method="GET"} 1', body)
+
+    def test_slow_requests_are_logged_with_sql(self):
+        with self.settings(SLOW_REQUEST_THRESHOLD=0), self.assertLogs('campus_connect.slow_requests') as logs:
+            self.client.get(reverse('mentors'))
+        self.assertIn('SELECT', logs.output[0])
+
+
+class UserSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        remove_seeded_mentors()
+        User.objects.create_user(email='ayesha.khan@uni.edu', first_name='Ayesha', last_name='Khan', username='ayesha')
+        User.objects.create_user(email='bilal@uni.edu', first_name='Bilal', last_name='Ahmed', username='bkhan')
+        User.objects.create_user(email='sara@uni.edu', first_name='Sara', last_name='Akhtar', username='sara')
+        cls.admin = User.objects.create_superuser(email='admin@uni.edu', first_name='Admin', password='pw')
+
+    def test_every_word_must_prefix_a_column(self):
+        self.assertEqual(
+            sorted(User.objects.search('kha').values_list('username', flat=True)), ['ayesha'],
+        )
+        self.assertEqual(list(User.objects.search('ay KHAN').values_list('username', flat=True)), ['ayesha'])
+        self.assertEqual(User.objects.search('bk').get().username, 'bkhan')
+        self.assertFalse(User.objects.search('khtar').exists())
+        self.assertEqual(User.objects.search('  ').count(), 4)
+
+    def test_tsquery_words_are_quoted(self):
+        self.assertEqual(_tsquery_prefix(["o'neil", 'a|b']), "'oneil':* & 'a|b':*")
+
+    def test_admin_changelist_uses_search(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin:core_user_changelist'), {'q': 'sara'})
+        self.assertContains(response, 'sara@uni.edu')
+        self.assertNotContains(response, 'bilal@uni.edu')
+        self.assertIsInstance(response.context['cl'].paginator, EstimatedCountPaginator)
+
+    def test_small_results_are_counted_exactly(self):
+        self.assertEqual(EstimatedCountPaginator(User.objects.order_by('email'), 2).count, 4)
+
+
+class FlakyEmailBackend(LocMemEmailBackend):
+    failures = 0
+
+    def send_messages(self, messages):
+        if FlakyEmailBackend.failures:
+            FlakyEmailBackend.failures -= 1
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        return super().send_messages(messages)
+
+
+class FailingActivityBuffer(activity.ActivityBuffer):
+    failures = 1
+
+    def write(self, logins, events):
+        if self.failures:
+            self.failures -= 1
+            raise DatabaseError('database is down')
+        super().write(logins, events)
+
+
+@override_settings(ACTIVITY_BUFFER={'FLUSH_INTERVAL': 3600})
+class ActivityBufferTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='active@example.com', first_name='Active', password='pw')
+
+    def test_logins_are_buffered_and_coalesced(self):
+        self.client.login(email='active@example.com', password='pw')
+        self.client.login(email='active@example.com', password='pw')
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+
+        buffer = activity.get_activity_buffer()
+        self.assertEqual(buffer.pending(), 3)
+        self.assertEqual(buffer.flush(), 3)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        self.assertEqual(
+            list(AuditEvent.objects.values_list('kind', 'user_id')),
+            [(AuditEventKindChoices.LOGIN, self.user.pk)] * 2,
+        )
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_flushes_at_request_end_once_due(self):
+        with self.settings(ACTIVITY_BUFFER={'BATCH_SIZE': 3, 'FLUSH_INTERVAL': 3600}):
+            self.client.force_login(self.user)
+            self.client.get(reverse('about-us'))
+            self.assertFalse(AuditEvent.objects.exists())
+            self.client.get(reverse('profile'))
+            self.assertEqual(activity.pending(), 0)
+        self.assertEqual(
+            sorted(AuditEvent.objects.values_list('kind', flat=True)),
+            [AuditEventKindChoices.LOGIN, AuditEventKindChoices.PROFILE_VIEW],
+        )
+
+    def test_batch_size_one_writes_each_request_as_it_finishes(self):
+        # The Vercel default: nothing is left for a frozen instance to lose.
+        with self.settings(ACTIVITY_BUFFER={'BATCH_SIZE': 1, 'FLUSH_INTERVAL': 3600}):
+            self.client.force_login(self.user)
+            self.client.get(reverse('profile'))
+            self.assertEqual(activity.pending(), 0)
+        self.assertEqual(AuditEvent.objects.count(), 2)
+
+    def test_flush_runs_before_connections_are_closed(self):
+        receivers = request_finished._live_receivers(None)
+        self.assertLess(receivers.index(signals.flush_activity), receivers.index(close_old_connections))
+
+    def test_failed_write_keeps_entries_up_to_the_limit(self):
+        buffer = FailingActivityBuffer(max_pending=3)
+        earlier = timezone.now() - timezone.timedelta(minutes=5)
+        buffer.login(self.user, at=earlier)
+        for _ in range(3):
+            buffer.record(AuditEventKindChoices.PROFILE_VIEW, self.user.pk)
+        with self.assertRaises(DatabaseError), self.assertLogs('core.activity', 'ERROR'):
+            buffer.flush()
+        self.assertEqual(buffer.pending(), 3)
+
+        buffer.login(self.user)
+        latest = self.user.last_login
+        self.assertEqual(buffer.flush(), 3)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login, latest)
+        self.assertEqual(AuditEvent.objects.count(), 2)
+
+    def test_audit_events_are_append_only(self):
+        event = AuditEvent.objects.create(
+            month=202601, kind=AuditEventKindChoices.SIGNUP, user=self.user, created_at=timezone.now(),
+        )
+        with self.assertRaises(ValueError):
+            event.save()
+
+    def test_audit_partitions_deletes_past_retention(self):
+        now = timezone.now()
+        for month in (200001, AuditEvent.month_of(now)):
+            AuditEvent.objects.create(month=month, kind=AuditEventKindChoices.LOGIN, created_at=now)
+        call_command('audit_partitions', stdout=io.StringIO())
+        self.assertEqual(list(AuditEvent.objects.values_list('month', flat=True)), [AuditEvent.month_of(now)])
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.add(0, 1, 'Machine learning and data science')
+        self.index.add(0, 2, 'Data structures, algorithms and machine code')
+        self.index.add(1, 1, 'Learning to learn: a talk on studying', audience=2)
+
+    def test_ranks_by_bm25(self):
+        self.assertEqual([hit[:2] for hit in self.index.search('machine learning')], [(0, 1), (0, 2), (1, 1)])
+        self.assertEqual([hit[:2] for hit in self.index.search('data', groups={0}, limit=1)], [(0, 1)])
+        self.assertEqual(self.index.search('learning', audiences={0}), self.index.search('learning', groups={0}))
+        self.assertEqual(self.index.search('a !'), [])
+
+    def test_prefixes_and_typos(self):
+        self.assertEqual({hit[:2] for hit in self.index.search('algo')}, {(0, 2)})
+        self.assertEqual({hit[:2] for hit in self.index.search('strcutures')}, {(0, 2)})
+        self.assertEqual({hit[:2] for hit in self.index.search('sceince')}, {(0, 1)})
+        # The exact word outranks its completions.
+        exact, completion = self.index.search('learn')
+        self.assertEqual(exact[:2], (1, 1))
+        self.assertGreater(exact[2], completion[2])
+
+    def test_updates_survive_freeze_and_snapshot(self):
+        self.index.add(0, 1, 'Quantum physics')
+        self.index.remove(0, 2)
+        self.assertEqual(self.index.search('machine'), [])
+        self.assertEqual(len(self.index), 2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'index.npz')
+            self.index.save(path)
+            loaded = SearchIndex.load(path)
+        self.assertEqual(loaded.search('quantum learning'), self.index.search('quantum learning'))
+        self.assertEqual(loaded.high_water, {0: 2, 1: 1})
+        loaded.add(0, 3, 'Quantum computing')
+        self.assertEqual({hit[:2] for hit in loaded.search('quant')}, {(0, 1), (0, 3)})
+
+
+@override_settings(SEARCH_INDEX={'SNAPSHOT': None})
+class SiteSearchTests(TestCase):
+    def setUp(self):
+        search.reset_search_index(setting='SEARCH_INDEX')
+        user = User.objects.create_user(
+            email='hina@uni.edu', first_name='Hina', last_name='Rauf', user_type=UserTypeChoices.MENTOR,
+        )
+        self.mentor = Mentor.objects.create(user=user, department='Physics', headline='Quantum optics researcher')
+        self.student = User.objects.create_user(email='student@uni.edu', first_name='Student')
+        Notification.objects.create(title='Quantum seminar', audience=NotificationAudienceChoices.MENTOR)
+        Notification.objects.create(title='Quantum reading group', audience=NotificationAudienceChoices.STUDENT)
+        Notification.objects.create(title='Quantum grades', recipient=self.student)
+
+    def get(self, **params):
+        response = self.client.get(reverse('search'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_results_follow_the_audience(self):
+        self.assertEqual([result['title'] for result in self.get(q='quantum')], ['Hina Rauf'])
+        self.client.force_login(self.student)
+        results = self.get(q='quantum')
+        self.assertEqual(sorted(result['title'] for result in results), ['Hina Rauf', 'Quantum reading group'])
+        mentor = next(result for result in results if result['type'] == 'mentor')
+        self.assertEqual((mentor['id'], mentor['url']), (self.mentor.pk, f"{reverse('mentors')}?department=Physics"))
+        self.assertEqual([result['type'] for result in self.get(q='quantu', type='notification')], ['notification'])
+        self.assertEqual(self.get(q='  '), [])
+        self.assertEqual(self.client.get(reverse('search'), {'q': 'x', 'type': 'user'}).status_code, 400)
+
+    def test_saves_and_deletes_reach_the_index(self):
+        self.get(q='quantum')
+        tag = ExpertiseTag.objects.create(name='Photonics', slug='photonics')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mentor.expertise.add(tag)
+            VoiceOfExperience.objects.create(speaker_name='Omar', topic='Photonics careers', audio='voices/omar.mp3')
+        self.assertEqual(
+            [(result['type'], result['title']) for result in self.get(q='photonic')],
+            [('voice', 'Omar – Photonics careers'), ('mentor', 'Hina Rauf')],
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.name = 'Lasers'
+            tag.save()
+            self.mentor.user.first_name = 'Hira'
+            self.mentor.user.save()
+        self.assertEqual([result['title'] for result in self.get(q='lasers hira')], ['Hira Rauf'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mentor.delete()
+        self.assertEqual(self.get(q='lasers'), [])
+
+    def test_saves_while_loading_are_queued_not_blocked(self):
+        # A load in progress holds _load_lock; a save must not wait for it.
+        with search._load_lock:
+            with self.captureOnCommitCallbacks(execute=True):
+                VoiceOfExperience.objects.create(speaker_name='Omar', topic='Photonics careers', audio='voices/omar.mp3')
+            self.assertEqual(len(search._pending), 1)
+        self.assertEqual([result['type'] for result in self.get(q='photonics')], ['voice'])
+        self.assertEqual(search._pending, set())
+
+    @override_settings(SEARCH_INDEX={'SNAPSHOT': None, 'LOAD_AT_STARTUP': False})
+    def test_startup_load_can_be_turned_off(self):
+        self.assertIsNone(search.load_in_background())
+        self.assertIsNone(search._index)
+
+    def test_startup_only_loads_an_existing_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'search-index.npz')
+            with self.settings(SEARCH_INDEX={'SNAPSHOT': path}):
+                self.assertIsNone(search.load_in_background())
+                self.assertIsNone(search._index)
+                self.get(q='physics')
+                search.reset_search_index(setting='SEARCH_INDEX')
+                with unittest.mock.patch.object(search, '_load_at_startup') as load:
+                    search.load_in_background().join()
+                load.assert_called_once_with()
+
+    def test_starts_from_a_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'search-index.npz')
+            with self.settings(SEARCH_INDEX={'SNAPSHOT': path}):
+                self.assertEqual(len(self.get(q='physics')), 1)
+                self.assertTrue(os.path.exists(path))
+            written = os.stat(path).st_mtime_ns
+            # Added by another process after the snapshot was taken.
+            Notification.objects.bulk_create([Notification(title='Physics colloquium')])
+            with self.settings(SEARCH_INDEX={'SNAPSHOT': path}):
+                titles = [result['title'] for result in self.get(q='physics')]
+            self.assertEqual(os.stat(path).st_mtime_ns, written)
+        self.assertEqual(sorted(titles), ['Hina Rauf', 'Physics colloquium'])
+
+
+@override_settings(CONTACT_QUEUE={'START_WORKER': False, 'RETRY_BACKOFF': 0})
+class ContactQueueTests(TestCase):
+    def setUp(self):
+        metrics.contact_queue_latency.reset()
+        reset_throttles(setting='AUTH_THROTTLES')
+
+    def post(self, name='Visitor', email='visitor@example.com'):
+        return self.client.post(reverse('contact-us'), {'name': name, 'email': email, 'message': 'Hello'})
+
+    def test_submission_is_saved_and_its_acknowledgement_queued(self):
+        response = self.client.post(reverse('contact-us'), {
+            'name': 'Visitor', 'email': 'visitor@example.com', 'message': 'Hello',
+        })
+        self.assertRedirects(response, reverse('contact-us'), fetch_redirect_response=False)
+        contact = ContactMessage.objects.get()
+        self.assertIsNone(contact.acknowledged_at)
+        self.assertEqual(mail.outbox, [])
+
+        with self.assertNumQueries(4):  # pending contacts, claim, claimed ids, acknowledged_at update
+            self.assertEqual(get_contact_queue().flush(), 1)
+        contact.refresh_from_db()
+        self.assertIsNotNone(contact.acknowledged_at)
+        self.assertEqual([message.to for message in mail.outbox], [['visitor@example.com']])
+        self.assertIn('campus_connect_contact_queue_latency_seconds_count 1', metrics.expose())
+
+    @override_settings(AUTH_THROTTLES={'contact': [('ip', '2/h')]})
+    def test_submissions_are_throttled_by_ip(self):
+        for i in range(2):
+            self.assertEqual(self.post(email=f'visitor{i}@example.com').status_code, 302)
+        response = self.post(email='victim@example.com')
+        self.assertContains(response, 'Too many attempts', status_code=429)
+        self.assertEqual(ContactMessage.objects.count(), 2)
+
+    def test_claimed_acknowledgements_are_not_sent_again(self):
+        # Claimed by a run that was interrupted before recording the send.
+        ContactMessage.objects.create(
+            name='Sent', email='sent@example.com', message='Hello', acknowledgement_claimed_at=timezone.now(),
+        )
+        ContactMessage.objects.create(name='Pending', email='pending@example.com', message='Hello')
+        call_command('send_contact_acknowledgements', stdout=io.StringIO())
+        call_command('send_contact_acknowledgements', stdout=io.StringIO())
+        self.assertEqual([message.to for message in mail.outbox], [['pending@example.com']])
+
+    def test_saved_submission_survives_a_full_queue(self):
+        contact_queue = ContactQueue(MemoryBackend(max_size=1), start_worker=False)
+        contact_queue.submit('First', 'first@example.com', 'Hello')
+        contact_queue.submit('Second', 'second@example.com', 'Hello')
+        self.assertEqual(ContactMessage.objects.count(), 2)
+        self.assertEqual(contact_queue.backend.depth(), 1)
+
+    def test_drain_at_exit_sends_acknowledgements_once(self):
+        FlakyEmailBackend.failures = 1
+        contact_queue = ContactQueue(
+            MemoryBackend(), write_on_submit=False, retry_backoff=0, start_worker=False,
+            connection_factory=lambda: FlakyEmailBackend(),
+        )
+        for name in ('First', 'Second'):
+            contact_queue.submit(name, f'{name.lower()}@example.com', 'Hello')
+        with self.assertLogs('core.contact_queue', 'WARNING'):
+            contact_queue.drain()
+        self.assertEqual(
+            {contact.name: contact.acknowledged_at is not None for contact in ContactMessage.objects.all()},
+            {'First': False, 'Second': True},
+        )
+
+    @override_settings(CONTACT_QUEUE={'START_WORKER': False, 'RETRY_BACKOFF': 0, 'WRITE_ON_SUBMIT': False})
+    def test_batched_submissions_are_flushed_in_one_batch(self):
+        for i in range(3):
+            response = self.client.post(reverse('contact-us'), {
+                'name': f'Visitor {i}', 'email': f'visitor{i}@example.com', 'message': 'Hello',
+            })
+            self.assertRedirects(response, reverse('contact-us'), fetch_redirect_response=False)
+        self.assertFalse(ContactMessage.objects.exists())
+
+        with self.assertNumQueries(4):  # bulk insert, claim, claimed ids, acknowledged_at update
+            self.assertEqual(get_contact_queue().flush(), 3)
+        self.assertEqual(ContactMessage.objects.filter(acknowledged_at__isnull=False).count(), 3)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [f'visitor{i}@example.com' for i in range(3)])
+        self.assertIn('campus_connect_contact_queue_latency_seconds_count 3', metrics.expose())
+
+    def test_invalid_submission_rerenders_form(self):
+        response = self.client.post(reverse('contact-us'), {'name': 'Visitor', 'email': 'nope', 'message': 'Hi'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Enter a valid email address.')
+
+    def test_smtp_failures_are_retried_on_a_fresh_connection(self):
+        FlakyEmailBackend.failures = 2
+        contact_queue = ContactQueue(
+            MemoryBackend(), retry_backoff=0, start_worker=False,
+            connection_factory=lambda: FlakyEmailBackend(),
+        )
+        contact_queue.submit('Visitor', 'visitor@example.com', 'Hello')
+        with self.assertLogs('core.contact_queue', 'WARNING'):
+            contact_queue.flush()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIsNotNone(ContactMessage.objects.get().acknowledged_at)
+
+    def test_given_up_acknowledgements_stay_pending(self):
+        FlakyEmailBackend.failures = 10
+        contact_queue = ContactQueue(
+            MemoryBackend(), max_attempts=3, retry_backoff=0, start_worker=False,
+            connection_factory=lambda: FlakyEmailBackend(),
+        )
+        contact_queue.submit('Visitor', 'visitor@example.com', 'Hello')
+        with self.assertLogs('core.contact_queue', 'WARNING'):
+            contact_queue.flush()
+        self.assertEqual(FlakyEmailBackend.failures, 7)
+        contact = ContactMessage.objects.get()
+        self.assertIsNone(contact.acknowledged_at)
+        # Released for send_contact_acknowledgements to retry.
+        self.assertIsNone(contact.acknowledgement_claimed_at)
+
+    def test_full_memory_queue_rejects(self):
+        backend = MemoryBackend(max_size=1)
+        backend.put({'email': 'a@example.com'})
+        with self.assertRaises(QueueFull):
+            backend.put({'email': 'b@example.com'})
+
+    def test_sqlite_backend_claims_and_releases(self):
+        with tempfile.TemporaryDirectory() as directory:
+            backend = SQLiteBackend(path=os.path.join(directory, 'queue.sqlite3'))
+            for i in range(3):
+                backend.put({'name': 'Visitor', 'email': f'v{i}@example.com', 'message': 'Hi', 'enqueued_at': 0})
+            first = backend.take(2, timeout=0)
+            self.assertEqual([job['email'] for job in first], ['v0@example.com', 'v1@example.com'])
+            # claimed jobs are not handed out twice
+            self.assertEqual([job['email'] for job in backend.take(5, timeout=0)], ['v2@example.com'])
+            backend.release(first[:1])
+            backend.done(first[1:])
+            self.assertEqual(backend.depth(), 2)
+            self.assertEqual(backend.take(5, timeout=0)[0]['email'], 'v0@example.com')
+
+
+@override_settings(AUTH_THROTTLES={'login': [('ip', '5/m'), ('account', '3/m')], 'signup': [('ip', '2/h')]})
+class ThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user(email='owner@example.com', first_name='Owner', password='Correct-Horse-42')
+
+    def setUp(self):
+        reset_throttles(setting='AUTH_THROTTLES')
+
+    def login(self, password='wrong', email='owner@example.com', ip='10.0.0.1'):
+        return self.client.post(reverse('login'), {'username': email, 'password': password}, REMOTE_ADDR=ip)
+
+    def test_token_bucket_allows_burst_then_refills(self):
+        throttle = Throttle([('ip', '2/10s')], LocalStore())
+        self.assertIsNone(throttle.check('test', {'ip': 'a'}, now=100))
+        self.assertIsNone(throttle.check('test', {'ip': 'a'}, now=100))
+        self.assertAlmostEqual(throttle.check('test', {'ip': 'a'}, now=100), 5)
+        self.assertIsNone(throttle.check('test', {'ip': 'b'}, now=100))
+        self.assertIsNone(throttle.check('test', {'ip': 'a'}, now=105))
+
+    def test_per_process_state_is_flagged_outside_debug(self):
+        with self.settings(DEBUG=False, THROTTLE_CACHE=None):
+            self.assertEqual([warning.id for warning in check_throttle_cache(None)], ['core.W002'])
+        with self.settings(DEBUG=False, THROTTLE_CACHE='default'):
+            self.assertEqual([warning.id for warning in check_throttle_cache(None)], ['core.W002'])
+        with self.settings(DEBUG=False, THROTTLE_CACHE='shared', CACHES={
+            **settings.CACHES,
+            'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/shared'},
+        }):
+            self.assertEqual(check_throttle_cache(None), [])
+        with self.settings(DEBUG=True, THROTTLE_CACHE=None):
+            self.assertEqual(check_throttle_cache(None), [])
+
+    def test_account_is_locked_before_validation_runs(self):
+        for i in range(3):
+            self.assertEqual(self.login(ip=f'10.0.0.{i}').status_code, 200)
+        # no session, user lookup or hashing once throttled
+        with self.assertNumQueries(0):
+            response = self.login(password='Correct-Horse-42', ip='10.0.0.9')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(response['Retry-After'].isdigit())
+        self.assertContains(response, 'Too many attempts', status_code=429)
+
+    def test_ip_limit_spans_accounts(self):
+        for i in range(5):
+            self.login(email=f'user{i}@example.com')
+        self.assertEqual(self.login(email='someone@example.com').status_code, 429)
+        self.assertEqual(self.login(email='someone@example.com', ip='10.0.0.2').status_code, 200)
+
+    def test_successful_login_clears_account_attempts(self):
+        self.login()
+        self.login()
+        self.assertEqual(self.login(password='Correct-Horse-42').status_code, 302)
+        self.client.logout()
+        for _ in range(3):
+            self.assertEqual(self.login(ip='10.0.0.3').status_code, 200)
+
+    def test_signup_is_throttled_per_ip(self):
+        with redirect_stdout(io.StringIO()):
+            for i in range(2):
+                self.client.post(reverse('signup'), {'username': f'u{i}'}, REMOTE_ADDR='10.0.1.1')
+        self.assertEqual(
+            self.client.post(reverse('signup'), {'username': 'u3'}, REMOTE_ADDR='10.0.1.1').status_code, 429,
+        )
+
+
+class BenchmarkComparisonTests(TestCase):
+    def result(self, **overrides):
+        return {**benchmarking.summarise([0.010] * 20, 0.2, [3] * 20, [64 * 1024] * 5), **overrides}
+
+    def test_summarise(self):
+        result = benchmarking.summarise([i / 1000 for i in range(1, 101)], 5.0, [2, 4, 2], [1024, 2048, 4096])
+        self.assertEqual((result['p50_ms'], result['p95_ms'], result['p99_ms']), (50, 95, 99))
+        self.assertEqual(result['throughput'], 20)
+        self.assertEqual(result['queries'], 4)
+        self.assertEqual(result['alloc_kb'], 2)
+
+    def test_extra_query_is_a_regression(self):
+        baseline = {'GET home [anonymous]': self.result()}
+        self.assertEqual(benchmarking.compare({'GET home [anonymous]': self.result()}, baseline), [])
+        regressions = benchmarking.compare({'GET home [anonymous]': self.result(queries=4)}, baseline)
+        self.assertEqual(regressions, ['GET home [anonymous]: 4 queries, baseline 3'])
+
+    def test_latency_and_allocations_have_tolerance(self):
+        baseline = {'route': self.result()}
+        self.assertEqual(benchmarking.compare({'route': self.result(p50_ms=13.0, alloc_kb=80.0)}, baseline), [])
+        regressions = benchmarking.compare({'route': self.result(p50_ms=14.0, alloc_kb=90.0)}, baseline)
+        self.assertEqual(len(regressions), 2)
+        # Scenarios missing from the baseline are not failures.
+        self.assertEqual(benchmarking.compare({'new route': self.result(queries=50)}, baseline), [])
+
+
+ASYNC_VIEWS = {
+    'home': async_views.AsyncHomeView, 'login': async_views.AsyncLoginView, 'profile': async_views.AsyncProfileView,
+    'mentors': async_views.AsyncMentorsView, 'notifications': async_views.AsyncNotificationView,
+    'signup': async_views.AsyncSignupView,
+}
+
+
+class LeanServingTests(TestCase):
+    def test_admin_is_left_out(self):
+        # Settings read LEAN_SERVING once, at import.
+        script = (
+            "import django; django.setup()\n"
+            "from django.conf import settings\n"
+            "from django.urls import Resolver404, resolve\n"
+            "try:\n"
+            "    resolve('/admin/')\n"
+            "except Resolver404:\n"
+            "    print('no admin url')\n"
+            "print('django.contrib.admin' in settings.INSTALLED_APPS)\n"
+            "print('core.middleware.LazyWhiteNoiseMiddleware' in settings.MIDDLEWARE)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, capture_output=True, text=True,
+            env={**os.environ, 'LEAN_SERVING': 'True'},
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.splitlines(), ['no admin url', 'False', 'True'])
+
+    def test_lazy_whitenoise_indexes_static_files_on_first_use(self):
+        lazy = middleware.LazyWhiteNoiseMiddleware(lambda request: HttpResponse('page'))
+        self.assertEqual(lazy.files, {})
+        self.assertEqual(lazy(RequestFactory().get('/about-us/')).content, b'page')
+        self.assertTrue(lazy._pending_files)
+
+        response = lazy(RequestFactory().get('/static/images/download.png'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        response.close()
+        self.assertEqual(lazy._pending_files, [])
+        self.assertIn('/static/images/download.png', lazy.files)
+
+
+class AsyncURLConf:
+    """campus_connect.urls as routed in ASYNC_SERVING mode."""
+    urlpatterns = [
+        path(str(pattern.pattern), ASYNC_VIEWS[pattern.name].as_view(), name=pattern.name)
+        if getattr(pattern, 'name', None) in ASYNC_VIEWS else pattern
+        for pattern in urls.urlpatterns
+    ]
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf, METRICS_TOKEN='scrape-me')
+class AsyncServingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='async@example.com', first_name='Ada', password='Correct-Horse-42')
+        mentor_user = User.objects.create_user(
+            email='mentor@example.com', first_name='Grace', user_type=UserTypeChoices.MENTOR,
+        )
+        mentor = Mentor.objects.create(user=mentor_user, department='Physics')
+        mentor.expertise.add(ExpertiseTag.objects.create(name='Optics', slug='optics'))
+        Notification.objects.all().delete()
+        cls.notifications = Notification.objects.bulk_create(
+            [Notification(recipient=cls.user, title=f'Reminder {i}') for i in range(3)]
+        )
+
+    def setUp(self):
+        cache.clear()
+        caches['pages'].clear()
+        caches['users'].clear()
+        for metric in metrics.REGISTRY:
+            metric.reset()
+
+    async def test_home_is_served_from_the_page_cache(self):
+        first = await self.async_client.get(reverse('home'))
+        self.assertEqual(first.status_code, 200)
+        second = await self.async_client.get(reverse('home'), headers={'If-None-Match': first['ETag']})
+        self.assertEqual(second.status_code, 304)
+
+    async def test_profile(self):
+        self.assertContains(await self.async_client.get(reverse('profile')), 'Guest')
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get(reverse('profile'))
+        self.assertContains(response, 'Ada')
+        self.assertEqual(response.context['unread_notifications_count'], 3)
+
+    async def test_mentors_json_matches_the_sync_view(self):
+        response = await self.async_client.get(reverse('mentors'), {'format': 'json'})
+        with self.settings(ROOT_URLCONF='campus_connect.urls'):
+            expected = await sync_to_async(self.client.get)(reverse('mentors'), {'format': 'json'})
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(response.json()['results'][0]['expertise'], ['optics'])
+        self.assertContains(await self.async_client.get(reverse('mentors')), 'Grace')
+
+    async def test_notifications_read_state(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get(reverse('notifications'))
+        self.assertEqual([n.is_read for n in response.context['notifications']], [False] * 3)
+        # Viewing doesn't create a read state; marking one read does.
+        self.assertFalse(await NotificationReadState.objects.filter(user=self.user).aexists())
+        await self.async_client.post(reverse('notifications'), {'notification': self.notifications[1].pk})
+        response = await self.async_client.get(reverse('notifications'))
+        self.assertEqual([n.is_read for n in response.context['notifications']], [False, True, False])
+
+    async def test_login(self):
+        response = await self.async_client.get(reverse('login'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        response = await self.async_client.post(
+            reverse('login'), {'username': 'async@example.com', 'password': 'Correct-Horse-42'},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertContains(await self.async_client.get(reverse('profile')), 'Ada')
+
+    async def test_signup_hashes_on_the_pool(self):
+        self.assertEqual((await self.async_client.get(reverse('signup'))).status_code, 200)
+        data = {
+            'username': 'async_fresher', 'email': 'fresher@example.com', 'user_type': UserTypeChoices.STUDENT,
+            'password': 'Correct-Horse-42', 'confirm_password': 'Wrong-Horse-42',
+        }
+        response = await self.async_client.post(reverse('signup'), data)
+        self.assertContains(response, 'Passwords do not match.')
+        response = await self.async_client.post(reverse('signup'), {**data, 'confirm_password': 'Correct-Horse-42'})
+        self.assertEqual(response.status_code, 302)
+        user = await User.objects.select_related('student_profile').aget(email='fresher@example.com')
+        self.assertTrue(await sync_to_async(user.check_password)('Correct-Horse-42'))
+        self.assertIsNotNone(user.student_profile)
+        self.assertContains(await self.async_client.get(reverse('profile')), 'fresher@example.com')
+
+    async def test_metrics_count_queries_made_in_threads(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        await self.async_client.get(reverse('notifications'))
+        response = await self.async_client.get(reverse('metrics'), headers={'Authorization': 'Bearer scrape-me'})
+        body = response.content.decode()
+        self.assertIn('campus_connect_request_duration_seconds_count{route="notifications",method="GET"} 1', body)
+        # The session and user lookups run in a thread; the feed and read state don't.
+        self.assertIn('campus_connect_db_queries_sum{route="notifications",method="GET"} 4', body)
+
+
+def add_sqlite_alias(alias, path):
+    connections.settings[alias] = connections.configure_settings({
+        'default': connections.settings['default'], alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path},
+    })[alias]
+
+
+def remove_alias(alias):
+    connections[alias].close()
+    del connections[alias]
+    del connections.settings[alias]
+
+
+@override_settings(DATABASE_REPLICAS={'ALIASES': ['replica'], 'STICKY_SECONDS': 10, 'RETRY_AFTER': 30})
+class ReplicaRouterTests(TransactionTestCase):
+    """A second SQLite database stands in for the replica; it only has what the tests put there."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        add_sqlite_alias('replica', os.path.join(cls.directory, 'replica.sqlite3'))
+        with override_settings(DATABASE_ROUTERS=[]):
+            call_command('migrate', database='replica', verbosity=0)
+        User.objects.using('replica').all().delete()
+
+    @classmethod
+    def tearDownClass(cls):
+        remove_alias('replica')
+        shutil.rmtree(cls.directory, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        remove_seeded_mentors()
+        metrics.replica_failovers.reset()
+        self.addCleanup(lambda: User.objects.using('replica').all().delete())
+
+    def emails(self):
+        return set(User.objects.values_list('email', flat=True))
+
+    def test_reads_go_to_the_replica_and_writes_to_the_primary(self):
+        User.objects.create_user(email='primary@example.com', first_name='P')
+        User.objects.using('replica').create(email='replica@example.com', first_name='R')
+        self.assertEqual(self.emails(), {'replica@example.com'})
+        self.assertTrue(User.objects.using('default').filter(email='primary@example.com').exists())
+
+    def test_reads_after_a_write_stay_on_the_primary(self):
+        with routers.request_routing() as state:
+            self.assertEqual(self.emails(), set())
+            User.objects.create_user(email='new@example.com', first_name='N')
+            self.assertTrue(state.wrote)
+            self.assertEqual(self.emails(), {'new@example.com'})
+        with routers.request_routing(pinned=True):
+            self.assertEqual(self.emails(), {'new@example.com'})
+        self.assertEqual(self.emails(), set())
+
+    def test_transactions_read_from_the_primary(self):
+        with transaction.atomic():
+            User.objects.create_user(email='atomic@example.com', first_name='A')
+            self.assertEqual(self.emails(), {'atomic@example.com'})
+
+    def test_writing_request_sets_the_pin_cookie(self):
+        self.assertNotIn(routers.PIN_COOKIE, self.client.get(reverse('about-us')).cookies)
+        response = self.client.post(reverse('signup'), {
+            'username': 'pinned', 'email': 'pinned@example.com', 'password': 'Correct-Horse-42',
+            'confirm_password': 'Correct-Horse-42', 'user_type': UserTypeChoices.STUDENT,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.cookies[routers.PIN_COOKIE]['max-age'], 10)
+        # The new session is only on the primary; the pinned client still gets its profile.
+        self.assertContains(self.client.get(reverse('profile')), 'pinned@example.com')
+
+    def test_replica_that_is_down_is_skipped(self):
+        add_sqlite_alias('broken', os.path.join(self.directory, 'missing', 'replica.sqlite3'))
+        self.addCleanup(remove_alias, 'broken')
+        User.objects.using('replica').create(email='replica@example.com', first_name='R')
+        with self.settings(DATABASE_REPLICAS={'ALIASES': ['broken', 'replica'], 'RETRY_AFTER': 30}):
+            for _ in range(4):
+                self.assertEqual(self.emails(), {'replica@example.com'})
+            # Checked once, then left alone until RETRY_AFTER.
+            self.assertIn('campus_connect_db_replica_failovers_total 1', metrics.replica_failovers.expose())
+        with self.settings(DATABASE_REPLICAS={'ALIASES': ['broken']}):
+            User.objects.create_user(email='primary@example.com', first_name='P')
+            self.assertEqual(self.emails(), {'primary@example.com'})
+
+    def test_replicas_are_not_migrated(self):
+        router = routers.PrimaryReplicaRouter()
+        self.assertFalse(router.allow_migrate('replica', 'core'))
+        self.assertIsNone(router.allow_migrate('default', 'core'))
@@ -0,0 +1,215 @@
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import NON_FIELD_ERRORS, ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.forms.utils import ErrorDict
+
+from core import metrics
+
+DEFAULT_AUTH_THROTTLES = {
+    # Campus networks put many students behind one address, so the per-IP
+    # limits are generous; the per-account limit is what stops guessing.
+    'login': [('ip', '60/m'), ('account', '10/15m')],
+    'signup': [('ip', '20/h')],
+    'contact': [('ip', '10/h')],
+}
+
+_RATE = re.compile(r'^(\d+)/(\d*)([smhd])$')
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """``'10/15m'`` -> (10, 900.0): at most 10 hits per 15 minutes."""
+    match = _RATE.match(rate)
+    if not match:
+        raise ImproperlyConfigured(f'Invalid throttle rate {rate!r}; expected e.g. "10/m" or "10/15m".')
+    limit, count, unit = match.groups()
+    return int(limit), float(int(count or 1) * _UNITS[unit])
+
+
+class LocalStore:
+    """
+    Per-process state: one float per key in an LRU bounded by
+    ``max_entries``, so a spray of random usernames cannot grow it without
+    limit.
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key)
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class CacheStore:
+    """
+    State in a Django cache shared by every worker. Read-then-write is not
+    atomic, so concurrent attempts on one key can let a few extra through.
+    """
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, timeout):
+        self.cache.set(key, value, math.ceil(timeout) + 1)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+
+class Throttle:
+    """
+    Generic cell rate algorithm: a token bucket stored as a single
+    "theoretical arrival time" per key, so a check is one read and one write.
+    A limit of N per period allows bursts of N and refills one slot every
+    period / N.
+    """
+
+    def __init__(self, rules, store):
+        self.rules = [(kind, *parse_rate(rate)) for kind, rate in rules]
+        self.store = store
+
+    def check(self, scope, keys, now=None):
+        """
+        Count one hit against every rule whose key is present in ``keys``
+        (e.g. ``{'ip': ..., 'account': ...}``). Returns ``None`` if allowed,
+        otherwise seconds until a retry can succeed; a rejected hit is not
+        counted.
+        """
+        now = time.time() if now is None else now
+        pending = []
+        for kind, limit, period in self.rules:
+            value = keys.get(kind)
+            if not value:
+                continue
+            key = _store_key(scope, kind, value)
+            interval = period / limit
+            arrival = max(self.store.get(key) or now, now) + interval
+            if arrival - now > period:
+                return arrival - now - period
+            pending.append((key, arrival, period))
+        for key, arrival, period in pending:
+            self.store.set(key, arrival, period)
+        return None
+
+    def reset(self, scope, kind, value):
+        self.store.delete(_store_key(scope, kind, value))
+
+
+def _store_key(scope, kind, value):
+    digest = hashlib.md5(str(value).strip().lower().encode()).hexdigest()
+    return f'throttle:{scope}:{kind}:{digest}'
+
+
+def client_ip(request):
+    """
+    The client address. Behind ``THROTTLE_PROXY_COUNT`` trusted proxies it is
+    taken from X-Forwarded-For, counting from the right so a client cannot
+    choose it.
+    """
+    proxies = getattr(settings, 'THROTTLE_PROXY_COUNT', 0)
+    if proxies:
+        forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if part.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+_throttles = {}
+_throttles_lock = threading.Lock()
+
+
+def get_throttle(scope):
+    throttle = _throttles.get(scope)
+    if throttle is None:
+        with _throttles_lock:
+            throttle = _throttles.get(scope)
+            if throttle is None:
+                rules = {**DEFAULT_AUTH_THROTTLES, **getattr(settings, 'AUTH_THROTTLES', {})}.get(scope, [])
+                alias = getattr(settings, 'THROTTLE_CACHE', None)
+                store = CacheStore(alias) if alias else _local_store()
+                throttle = _throttles[scope] = Throttle(rules, store)
+    return throttle
+
+
+_local = None
+
+
+def _local_store():
+    global _local
+    if _local is None:
+        _local = LocalStore()
+    return _local
+
+
+@receiver(setting_changed)
+def reset_throttles(setting, **kwargs):
+    global _local
+    if setting in ('AUTH_THROTTLES', 'THROTTLE_CACHE'):
+        _throttles.clear()
+        _local = None
+
+
+class ThrottleMixin:
+    """
+    Rejects POSTs over the ``throttle_scope`` limits with 429 before the form
+    is built, so a flood of attempts never reaches validation or password
+    hashing. ``throttle_account_field`` names the POST field that identifies
+    the account being attacked.
+    """
+    throttle_scope = None
+    throttle_account_field = None
+
+    def dispatch(self, request, *args, **kwargs):
+        retry_after = self.throttle_check(request)
+        if retry_after is not None:
+            return self.throttled(request, retry_after)
+        return super().dispatch(request, *args, **kwargs)
+
+    def throttle_check(self, request):
+        """Whole seconds to wait if ``request`` is over a limit, otherwise None."""
+        if request.method != 'POST':
+            return None
+        keys = {'ip': client_ip(request)}
+        if self.throttle_account_field:
+            keys['account'] = request.POST.get(self.throttle_account_field, '')
+        retry_after = get_throttle(self.throttle_scope).check(self.throttle_scope, keys)
+        if retry_after is None:
+            return None
+        metrics.throttled_requests.inc()
+        return math.ceil(retry_after)
+
+    def throttled(self, request, retry_after):
+        form = self.get_form()
+        # Attach the error without running validation.
+        form._errors = ErrorDict({NON_FIELD_ERRORS: form.error_class(
+            [f'Too many attempts. Please try again in {retry_after} seconds.'], error_class='nonfield',
+        )})
+        response = self.render_to_response(self.get_context_data(form=form), status=429)
+        response['Retry-After'] = str(retry_after)
+        return response
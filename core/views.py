@@ -1,14 +1,39 @@
-from django.contrib.auth import login
-from django.contrib.auth.views import LoginView, LogoutView
-from django.views.generic import FormView, TemplateView
-from django.shortcuts import redirect, render
+import hmac
+import json
+import os
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth import get_user, login
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.views import LoginView, LogoutView, redirect_to_login
+from django.views.generic import FormView, TemplateView, View
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
-from core.forms import SignupForm, LoginForm
+from django.utils.http import urlencode
+from core import metrics, notifications, search
+from core.activity import get_activity_buffer
+from core.broker import get_broker
+from core.enums import AuditEventKindChoices, AvailabilityChoices
+from core.contact_queue import QueueFull, get_contact_queue
+from core.forms import ContactForm, MessageForm, SignupForm, LoginForm
+from core.models import ContactMessage, User, VoiceOfExperience
+from core.page_cache import CachedPageMixin
+from core.pagination import InvalidCursor, KeysetPaginator
+from core.streaming import ranged_file_response
+from core.throttling import ThrottleMixin, get_throttle
+from mentor import messaging
+from mentor.models import ExpertiseTag, Mentor, ThreadParticipant
 
-class SignupView(FormView):
+class SignupView(ThrottleMixin, FormView):
     template_name = "signup.html"
     form_class = SignupForm
     success_url = reverse_lazy("home")
+    throttle_scope = 'signup'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -16,7 +41,11 @@ class SignupView(FormView):
         return context
 
     def form_valid(self, form):
-        user = form.save()  # This now uses our custom save method
+        return self.complete_signup(form)
+
+    def complete_signup(self, form, password_hash=None):
+        user = form.save(password_hash=password_hash)  # This now uses our custom save method
+        get_activity_buffer().record(AuditEventKindChoices.SIGNUP, user.pk)
         login(self.request, user)
         return redirect(self.get_success_url())
 
@@ -25,40 +54,319 @@ class SignupView(FormView):
         print("Form errors:", form.errors)
         return super().form_invalid(form)
 
-class CustomLoginView(LoginView):
+class CustomLoginView(ThrottleMixin, LoginView):
     template_name = "login.html"
     authentication_form = LoginForm
     success_url = reverse_lazy("home")
+    throttle_scope = 'login'
+    throttle_account_field = 'username'
+
+    def form_valid(self, form):
+        # Mistyped attempts before a successful login don't count against the owner.
+        get_throttle(self.throttle_scope).reset(self.throttle_scope, 'account', form.cleaned_data['username'])
+        return super().form_valid(form)
 
-class HomeView(TemplateView):
+class HomeView(CachedPageMixin, TemplateView):
     template_name = "home.html"
 
 class CustomLogoutView(LogoutView):
     next_page = reverse_lazy('login')
 
 class ProfileView(TemplateView):
+    """
+    The user with their student or mentor profile and current mentor in one
+    joined query; the counters are denormalised onto the profiles and the
+    unread count comes from its cache.
+    """
     template_name = "profile.html"
+    profile_related = ('student_profile', 'mentor_profile', 'mentorship__mentor__user')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        user = None
         if self.request.user.is_authenticated:
-            context['user_display_name'] = self.request.user.get_full_name() or self.request.user.email
-        else:
-            context['user_display_name'] = "Guest"
+            user = User.objects.select_related(*self.profile_related).get(pk=self.request.user.pk)
+            get_activity_buffer().record(AuditEventKindChoices.PROFILE_VIEW, user.pk)
+        context.update(self.profile_context(user))
         return context
 
+    @staticmethod
+    def profile_context(user):
+        if user is None:
+            return {'user_display_name': "Guest"}
+        return {
+            'user_display_name': user.get_full_name() or user.email,
+            'student_profile': _related(user, 'student_profile'),
+            'mentor_profile': _related(user, 'mentor_profile'),
+            'mentorship': _related(user, 'mentorship'),
+        }
+
+
+def _related(instance, name):
+    """A reverse one-to-one loaded by select_related, or None if there is none."""
+    try:
+        return getattr(instance, name)
+    except ObjectDoesNotExist:
+        return None
+
 
-class VoiceOfExperienceView(TemplateView):
+class VoiceOfExperienceView(CachedPageMixin, TemplateView):
     template_name = "voiceofexperience.html"
 
-class MentorsView(TemplateView):
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['recordings'] = VoiceOfExperience.objects.filter(is_published=True)
+        return context
+
+
+class VoiceRecordingView(View):
+    """Audio for one recording, with byte ranges so players can seek."""
+
+    def get(self, request, pk):
+        recording = get_object_or_404(VoiceOfExperience, pk=pk, is_published=True)
+        try:
+            path = recording.audio.path
+        except NotImplementedError:
+            # Remote storage: let it serve (and range) the file itself.
+            return redirect(recording.audio.url)
+        if not os.path.exists(path):
+            raise Http404("Recording not found.")
+        return ranged_file_response(request, path)
+
+class MentorsView(CachedPageMixin, TemplateView):
     template_name = "mentors.html"
+    page_cache_vary_on_query = True
+    paginate_by = 24
+    filter_params = ('department', 'availability', 'year', 'expertise')
+
+    def get_filters(self):
+        filters = {name: self.request.GET.get(name, '').strip() for name in self.filter_params}
+        if filters['year'] and not filters['year'].isdigit():
+            filters['year'] = ''
+        return filters
 
-class AboutUsView(TemplateView):
+    def get_queryset(self, filters):
+        return Mentor.objects.directory().filter_directory(**filters)
+
+    def get_page(self, filters):
+        paginator = KeysetPaginator(self.get_queryset(filters), self.paginate_by)
+        try:
+            return paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404("Invalid page.")
+
+    def get(self, request, *args, **kwargs):
+        filters = self.get_filters()
+        page = self.get_page(filters)
+        if request.GET.get('format') == 'json':
+            return JsonResponse({
+                'results': [mentor.to_dict() for mentor in page],
+                'next_cursor': page.next_cursor,
+            })
+        context = self.get_context_data(page=page, mentors=page.object_list, filters=filters, **kwargs)
+        return self.render_to_response(context)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['availability_choices'] = AvailabilityChoices.choices
+        context['expertise_tags'] = ExpertiseTag.objects.values_list('slug', 'name')
+        page = context.get('page')
+        if page is not None and page.has_next:
+            query = {name: value for name, value in context['filters'].items() if value}
+            query['cursor'] = page.next_cursor
+            context['next_query'] = urlencode(query)
+        return context
+
+class SearchView(View):
+    """
+    JSON search over mentors, broadcast notifications and Voice of Experience:
+    ``?q=<words>[&type=mentor|voice|notification][&limit=<1-50>]``.
+    """
+    max_query_length = 200
+    max_limit = 50
+
+    def get(self, request):
+        query = request.GET.get('q', '').strip()[:self.max_query_length]
+        type_name = request.GET.get('type') or None
+        if type_name is not None and type_name not in search.TYPES:
+            return JsonResponse({'error': f"Unknown type {type_name!r}."}, status=400)
+        limit = request.GET.get('limit', '')
+        limit = min(int(limit), self.max_limit) if limit.isdigit() and int(limit) > 0 else 20
+        results = search.search(request.user, query, type_name, limit) if query else []
+        return JsonResponse({'query': query, 'results': results})
+
+class AboutUsView(CachedPageMixin, TemplateView):
     template_name = "aboutus.html"
 
-class ContactUsView(TemplateView):
+class ContactUsView(ThrottleMixin, FormView):
     template_name = "contactus.html"
+    form_class = ContactForm
+    success_url = reverse_lazy("contact-us")
+    # Each submission emails whatever address it gives.
+    throttle_scope = 'contact'
+
+    def form_valid(self, form):
+        try:
+            get_contact_queue().submit(**form.cleaned_data)
+        except QueueFull:
+            # Degrade to a direct write rather than lose the message; it is
+            # acknowledged later by send_contact_acknowledgements.
+            ContactMessage.objects.create(**form.cleaned_data)
+        messages.success(self.request, "Thanks for getting in touch! We'll reply by email soon.")
+        return super().form_valid(form)
 
 class NotificationView(TemplateView):
     template_name = "notifications.html"
+    paginate_by = 20
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        user = self.request.user
+        paginator = KeysetPaginator(notifications.feed_for(user), self.paginate_by)
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404("Invalid page.")
+
+        state = notifications.get_read_state(user) if user.is_authenticated else None
+        context.update(self.page_context(page, state))
+        return context
+
+    @staticmethod
+    def page_context(page, state):
+        for notification in page:
+            notification.is_read = state is None or state.is_read(notification.pk)
+        return {'page': page, 'notifications': page.object_list}
+
+    def post(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        notification_id = request.POST.get('notification', '')
+        if notification_id.isdigit():
+            notifications.mark_read(request.user, int(notification_id))
+        else:
+            notifications.mark_all_read(request.user)
+        return redirect('notifications')
+
+
+class NotificationStreamView(View):
+    """
+    Server-Sent Events stream of new notifications.
+
+    Serve it through ``campus_connect.asgi``: each open stream is a coroutine
+    waiting on an in-process queue, not a worker thread. Streams are closed
+    after ``max_lifetime`` seconds and the browser's EventSource reconnects
+    with ``Last-Event-ID``; anything missed in between is replayed from the DB.
+    """
+    keepalive = 15
+    max_lifetime = 300
+    replay_limit = 50
+
+    async def get(self, request, *args, **kwargs):
+        user = await sync_to_async(get_user)(request)
+        last_event_id = request.headers.get('Last-Event-ID', '')
+        response = StreamingHttpResponse(
+            self.stream(user, int(last_event_id) if last_event_id.isdigit() else None),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @staticmethod
+    def format_event(message):
+        return f"id: {message['id']}\nevent: notification\ndata: {json.dumps(message)}\n\n"
+
+    async def stream(self, user, last_event_id):
+        async with get_broker().subscribe(notifications.channels_for(user)) as subscription:
+            yield f"retry: {self.keepalive * 1000}\n\n"
+            if last_event_id is not None:
+                missed = notifications.feed_for(user).filter(id__gt=last_event_id).order_by('id')
+                async for notification in missed[:self.replay_limit]:
+                    yield self.format_event(notification.to_dict())
+
+            deadline = time.monotonic() + self.max_lifetime
+            while time.monotonic() < deadline:
+                message = await subscription.get(timeout=self.keepalive)
+                if message is None:
+                    yield ": keepalive\n\n"
+                    continue
+                if last_event_id is not None and message['id'] <= last_event_id:
+                    continue
+                yield self.format_event(message)
+
+
+class InboxView(LoginRequiredMixin, TemplateView):
+    template_name = "messages.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            page = messaging.inbox(self.request.user).page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404("Invalid page.")
+        context['page'] = page
+        context['threads'] = page.object_list
+        return context
+
+
+class StartThreadView(LoginRequiredMixin, View):
+    """Opens (or reopens) the thread with one's mentor or mentee."""
+
+    def get(self, request, user_pk):
+        other = get_object_or_404(User, pk=user_pk, is_active=True)
+        return redirect('thread', messaging.thread_between(request.user, other).pk)
+
+
+class ThreadView(LoginRequiredMixin, TemplateView):
+    template_name = "thread.html"
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            try:
+                self.participant = messaging.participation(request.user, kwargs['pk'])
+            except ThreadParticipant.DoesNotExist:
+                raise Http404("No such conversation.")
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        cursor = self.request.GET.get('cursor')
+        try:
+            page = messaging.history(self.participant.thread_id).page(cursor)
+        except InvalidCursor:
+            raise Http404("Invalid page.")
+        if not cursor:
+            messaging.mark_read(self.participant)
+        thread = self.participant.thread
+        other = thread.mentor.user if thread.student_id == self.request.user.pk else thread.student
+        context.update(page=page, chat_messages=page.object_list, other_name=other.get_full_name())
+        context.setdefault('form', MessageForm())
+        return context
+
+    def post(self, request, *args, **kwargs):
+        form = MessageForm(request.POST)
+        if not form.is_valid():
+            return self.render_to_response(self.get_context_data(form=form))
+        messaging.send(self.participant, form.cleaned_data['body'])
+        return redirect('thread', self.participant.thread_id)
+
+
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint. Requires ``Authorization: Bearer <METRICS_TOKEN>``
+    when a token is configured, otherwise a staff session.
+    """
+
+    def get(self, request):
+        if not self.is_allowed(request):
+            return HttpResponse(status=403)
+        return HttpResponse(metrics.expose(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    @staticmethod
+    def is_allowed(request):
+        token = getattr(settings, 'METRICS_TOKEN', None)
+        if token:
+            supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+            return hmac.compare_digest(supplied.encode(), token.encode())
+        return request.user.is_authenticated and request.user.is_staff
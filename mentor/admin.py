@@ -1,3 +1,67 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ExpertiseTag, Mentor, MentoringSession, Mentorship, Message, Thread, ThreadParticipant
+
+
+@admin.register(ExpertiseTag)
+class ExpertiseTagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug')
+    search_fields = ('name',)
+    prepopulated_fields = {'slug': ('name',)}
+
+
+@admin.register(Mentor)
+class MentorAdmin(admin.ModelAdmin):
+    list_display = ('user', 'department', 'year', 'availability', 'mentee_count', 'session_count')
+    list_filter = ('availability', 'department')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    filter_horizontal = ('expertise',)
+    search_fields = ('user__email', 'user__first_name', 'user__last_name', 'department')
+
+
+@admin.register(Mentorship)
+class MentorshipAdmin(admin.ModelAdmin):
+    list_display = ('student', 'mentor', 'score', 'matched_at')
+    list_select_related = ('student', 'mentor__user')
+    raw_id_fields = ('student', 'mentor')
+    search_fields = ('student__email', 'mentor__user__email')
+
+
+@admin.register(MentoringSession)
+class MentoringSessionAdmin(admin.ModelAdmin):
+    list_display = ('mentor', 'student', 'held_at')
+    list_select_related = ('student', 'mentor__user')
+    raw_id_fields = ('student', 'mentor')
+    date_hierarchy = 'held_at'
+    search_fields = ('student__email', 'mentor__user__email')
+
+
+class ThreadParticipantInline(admin.TabularInline):
+    model = ThreadParticipant
+    raw_id_fields = ('user',)
+    readonly_fields = ('last_read_seq', 'last_message_at')
+    extra = 0
+
+
+@admin.register(Thread)
+class ThreadAdmin(admin.ModelAdmin):
+    list_display = ('student', 'mentor', 'last_seq', 'last_message_at')
+    list_select_related = ('student', 'mentor__user')
+    raw_id_fields = ('student', 'mentor')
+    inlines = [ThreadParticipantInline]
+    search_fields = ('student__email', 'mentor__user__email')
+
+
+@admin.register(Message)
+class MessageAdmin(admin.ModelAdmin):
+    list_display = ('thread', 'sender', 'seq', 'created_at')
+    list_select_related = ('sender', 'thread__student', 'thread__mentor__user')
+    raw_id_fields = ('thread', 'sender')
+
+    # Messages only come in through mentor.messaging.send, which numbers them.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
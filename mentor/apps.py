@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MentorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mentor'
+
+    def ready(self):
+        from mentor import signals  # noqa: F401
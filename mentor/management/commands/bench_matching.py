@@ -0,0 +1,72 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from core.enums import AvailabilityChoices
+from mentor.matching import encode_mentors, encode_students, solve
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the matching engine on synthetic data (no database): encoding, a full capacity-constrained "
+        "solve, and an incremental re-match of a few students against the capacity left over."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=50000)
+        parser.add_argument('--mentors', type=int, default=5000)
+        parser.add_argument('--departments', type=int, default=25)
+        parser.add_argument('--tags', type=int, default=200)
+        parser.add_argument('--changed', type=int, default=100, help="Students re-matched incrementally.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        languages = ['en', 'ur', 'pa', 'sd', 'ps', 'ar']
+        availability = [AvailabilityChoices.AVAILABLE, AvailabilityChoices.LIMITED, AvailabilityChoices.UNAVAILABLE]
+
+        def features(count):
+            departments = rng.integers(options['departments'], size=count)
+            tag_counts = rng.integers(1, 6, size=count)
+            for i in range(count):
+                yield (
+                    f'dept-{departments[i]}',
+                    rng.choice(options['tags'], size=tag_counts[i], replace=False).tolist(),
+                    ['en', *rng.choice(languages[1:], size=rng.integers(0, 3), replace=False).tolist()],
+                )
+
+        mentor_records = [
+            (pk, department, tags, codes, availability[rng.choice(3, p=(0.7, 0.2, 0.1))], int(rng.integers(5, 16)))
+            for pk, (department, tags, codes) in enumerate(features(options['mentors']), start=1)
+        ]
+        student_records = [
+            (pk, *feature) for pk, feature in enumerate(features(options['students']), start=1)
+        ]
+
+        started = time.perf_counter()
+        mentors = encode_mentors(mentor_records)
+        students = encode_students(student_records, mentors)
+        encoded = time.perf_counter()
+        assigned, scores = solve(students, mentors)
+        solved = time.perf_counter()
+
+        matched = assigned >= 0
+        usage = np.bincount(assigned[matched], minlength=len(mentors.ids))
+        self.stdout.write(f"{options['students']} students x {options['mentors']} mentors")
+        self.stdout.write(f"  encode        {(encoded - started) * 1000:9.1f} ms")
+        self.stdout.write(f"  full solve    {(solved - encoded) * 1000:9.1f} ms")
+        self.stdout.write(
+            f"  matched {matched.sum()} students (mean score {scores[matched].mean():.3f}), "
+            f"capacity respected: {bool((usage <= mentors.capacity).all())}"
+        )
+
+        changed = rng.choice(len(students.ids), size=min(options['changed'], len(students.ids)), replace=False)
+        remaining = mentors.capacity - usage
+        remaining += np.bincount(assigned[changed][matched[changed]], minlength=len(mentors.ids))
+        started = time.perf_counter()
+        subset = encode_students([student_records[i] for i in changed], mentors)
+        solve(subset, mentors, remaining)
+        self.stdout.write(
+            f"  incremental   {(time.perf_counter() - started) * 1000:9.1f} ms for {len(changed)} students"
+        )
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mentor.matching import match_students, stale_student_ids
+
+
+class Command(BaseCommand):
+    help = (
+        "Assign mentors to students. By default only students who need it are re-matched: those without a "
+        "mentor and those whose mentor became unavailable or is over capacity. --full re-solves everyone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Discard every assignment and match from scratch.")
+        parser.add_argument('--student', type=int, action='append', dest='students', default=[],
+                            help="Also re-match this student (user id). Repeatable.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['full']:
+            student_ids = None
+        else:
+            student_ids = stale_student_ids() | set(options['students'])
+            if not student_ids:
+                self.stdout.write("Every student already has a mentor.")
+                return
+        matched = match_students(student_ids)
+        considered = 'all' if student_ids is None else len(student_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Matched {matched} of {considered} students in {time.perf_counter() - started:.2f}s."
+        ))
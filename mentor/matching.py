@@ -0,0 +1,307 @@
+"""
+Mentor–student matching.
+
+Mentors and students are encoded as dense NumPy blocks over a vocabulary
+taken from the mentors: a department, interest or language that no mentor
+has can never add to a score, so it is dropped. Scoring a block of students
+against every mentor is then a few matrix products, and ``solve`` hands out
+mentors greedily in global score order from each student's top candidates,
+never exceeding what is left of a mentor's capacity.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, replace
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from core.enums import AvailabilityChoices, UserTypeChoices
+from mentor.models import Mentor, Mentorship, split_languages
+from student.models import StudentProfile
+
+WEIGHTS = {'department': 0.45, 'interests': 0.35, 'language': 0.15, 'availability': 0.05}
+AVAILABILITY_SCORES = {
+    AvailabilityChoices.AVAILABLE: 1.0,
+    AvailabilityChoices.LIMITED: 0.5,
+    AvailabilityChoices.UNAVAILABLE: 0.0,
+}
+# Far below the weight of any feature.
+TIE_BREAK = 1e-3
+FEATURES_CACHE_KEY = 'matching:mentor-features'
+FEATURES_CACHE_TIMEOUT = 3600
+
+
+@dataclass
+class MentorFeatures:
+    ids: np.ndarray           # (M,) mentor pks
+    profile: np.ndarray       # (M, T + D) float32: L2-normalised interests, department one-hot
+    languages: np.ndarray     # (M, L) float32 indicator
+    availability: np.ndarray  # (M,) float32 in [0, 1]
+    capacity: np.ndarray      # (M,) int64
+    departments: dict         # vocabularies, shared with the students
+    tags: dict
+    language_codes: dict
+
+    def subset(self, indices):
+        return replace(
+            self,
+            ids=self.ids[indices],
+            profile=self.profile[indices],
+            languages=self.languages[indices],
+            availability=self.availability[indices],
+            capacity=self.capacity[indices],
+        )
+
+
+@dataclass
+class StudentFeatures:
+    ids: np.ndarray           # (S,) user pks
+    profile: np.ndarray       # (S, T + D) float32, the mentor layout scaled by WEIGHTS
+    languages: np.ndarray     # (S, L) float32 indicator
+
+
+def _indicator(rows, vocabulary):
+    row_index, columns = [], []
+    for i, values in enumerate(rows):
+        for value in values:
+            column = vocabulary.get(value)
+            if column is not None:
+                row_index.append(i)
+                columns.append(column)
+    matrix = np.zeros((len(rows), len(vocabulary)), dtype=np.float32)
+    matrix[row_index, columns] = 1.0
+    return matrix
+
+
+def _normalise(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def encode_mentors(records):
+    """
+    ``records`` is a list of ``(pk, department, tag ids, language codes,
+    availability, capacity)`` tuples.
+    """
+    departments, tags, language_codes = {}, {}, {}
+    for _, department, tag_ids, languages, _, _ in records:
+        if department:
+            departments.setdefault(department, len(departments))
+        for tag in tag_ids:
+            tags.setdefault(tag, len(tags))
+        for code in languages:
+            language_codes.setdefault(code, len(language_codes))
+    return MentorFeatures(
+        ids=np.array([record[0] for record in records], dtype=np.int64),
+        profile=np.hstack([
+            _normalise(_indicator([record[2] for record in records], tags)),
+            _indicator([[record[1]] for record in records], departments),
+        ]),
+        languages=_indicator([record[3] for record in records], language_codes),
+        availability=np.array([AVAILABILITY_SCORES.get(record[4], 0.0) for record in records], dtype=np.float32),
+        capacity=np.array([record[5] for record in records], dtype=np.int64),
+        departments=departments,
+        tags=tags,
+        language_codes=language_codes,
+    )
+
+
+def encode_students(records, mentors):
+    """``records`` is a list of ``(pk, department, tag ids, language codes)`` tuples."""
+    return StudentFeatures(
+        ids=np.array([record[0] for record in records], dtype=np.int64),
+        profile=np.hstack([
+            _normalise(_indicator([record[2] for record in records], mentors.tags)) * np.float32(WEIGHTS['interests']),
+            _indicator([[record[1]] for record in records], mentors.departments) * np.float32(WEIGHTS['department']),
+        ]),
+        languages=_indicator([record[3] for record in records], mentors.language_codes),
+    )
+
+
+def score(students, mentors, rows):
+    """
+    Scores of the students at ``rows`` against every mentor, shape
+    (len(rows), M): interest cosine and same department in one product, plus
+    whether they share any language, plus the mentor's availability.
+    """
+    scores = students.profile[rows] @ mentors.profile.T
+    shared = students.languages[rows] @ mentors.languages.T
+    np.minimum(shared, 1, out=shared)
+    shared *= np.float32(WEIGHTS['language'])
+    scores += shared
+    scores += np.float32(WEIGHTS['availability']) * mentors.availability
+    return scores
+
+
+def solve(students, mentors, remaining=None, top_k=8, block_size=2048, max_rounds=4):
+    """
+    Give each student at most one mentor without exceeding ``remaining``
+    places per mentor (default: each mentor's capacity).
+
+    Students are scored in blocks so memory stays at ``block_size`` × M
+    floats, and only each student's ``top_k`` best mentors are kept. Those pairs are
+    assigned best-first; students whose candidates all filled up are scored
+    again against the mentors that still have room, for up to ``max_rounds``.
+
+    Returns the index into ``mentors`` for every student (-1 if unassigned)
+    and the score of that pairing.
+    """
+    remaining = (mentors.capacity if remaining is None else np.asarray(remaining)).astype(np.int64)
+    remaining = np.where(mentors.availability > 0, np.maximum(remaining, 0), 0).tolist()
+    assigned = [-1] * len(students.ids)
+    assigned_scores = [0.0] * len(students.ids)
+    pending = np.arange(len(students.ids))
+
+    for _ in range(max_rounds):
+        open_mentors = np.flatnonzero(np.array(remaining) > 0)
+        if not len(pending) or not len(open_mentors):
+            break
+        candidates = mentors.subset(open_mentors)
+        k = min(top_k, len(open_mentors))
+        # Mentors with the same department and tags score identically, and
+        # large runs of ties make partitioning slow and pile every student onto
+        # the same few mentors. A tiny, fixed per-mentor offset breaks them.
+        jitter = ((candidates.ids * 2654435761) % 4096).astype(np.float32) * np.float32(TIE_BREAK / 4096)
+        pair_students, pair_mentors, pair_scores = [], [], []
+        for start in range(0, len(pending), block_size):
+            rows = pending[start:start + block_size]
+            block = score(students, candidates, rows)
+            block += jitter
+            # Partitioning the values and thresholding is an order of magnitude
+            # faster than argpartition.
+            threshold = np.partition(block, -k, axis=1)[:, -k]
+            block_rows, columns = np.nonzero(block >= threshold[:, None])
+            pair_students.append(rows[block_rows])
+            pair_mentors.append(open_mentors[columns])
+            pair_scores.append(block[block_rows, columns] - jitter[columns])
+        pair_scores = np.concatenate(pair_scores)
+        order = np.argsort(-pair_scores, kind='stable')
+
+        progress = False
+        for student, mentor, value in zip(
+            np.concatenate(pair_students)[order].tolist(),
+            np.concatenate(pair_mentors)[order].tolist(),
+            pair_scores[order].tolist(),
+        ):
+            if assigned[student] < 0 and remaining[mentor] > 0:
+                assigned[student] = mentor
+                assigned_scores[student] = value
+                remaining[mentor] -= 1
+                progress = True
+        if not progress:
+            break
+        pending = pending[np.array(assigned, dtype=np.int64)[pending] < 0]
+
+    return np.array(assigned, dtype=np.int64), np.array(assigned_scores, dtype=np.float32)
+
+
+def _department(value):
+    return value.strip().casefold()
+
+
+def _mentor_records():
+    mentors = Mentor.objects.filter(user__is_active=True).exclude(availability=AvailabilityChoices.UNAVAILABLE)
+    tags = defaultdict(list)
+    for mentor_id, tag_id in Mentor.expertise.through.objects.filter(
+        mentor__in=mentors,
+    ).values_list('mentor_id', 'expertisetag_id'):
+        tags[mentor_id].append(tag_id)
+    return [
+        (pk, _department(department), tags[pk], split_languages(languages), availability, capacity)
+        for pk, department, languages, availability, capacity in mentors.order_by('pk').values_list(
+            'pk', 'department', 'languages', 'availability', 'capacity',
+        )
+    ]
+
+
+def _student_records(student_ids=None):
+    profiles = StudentProfile.objects.filter(user__is_active=True, user__user_type=UserTypeChoices.STUDENT)
+    if student_ids is not None:
+        profiles = profiles.filter(user_id__in=student_ids)
+    interests = defaultdict(list)
+    for profile_id, tag_id in StudentProfile.interests.through.objects.filter(
+        studentprofile__in=profiles,
+    ).values_list('studentprofile_id', 'expertisetag_id'):
+        interests[profile_id].append(tag_id)
+    return [
+        (user_id, _department(department), interests[pk], split_languages(languages))
+        for pk, user_id, department, languages in profiles.order_by('pk').values_list(
+            'pk', 'user_id', 'department', 'languages',
+        )
+    ]
+
+
+def mentor_features():
+    """Features of every mentor open to matching, cached until a mentor changes."""
+    features = cache.get(FEATURES_CACHE_KEY)
+    if features is None:
+        features = encode_mentors(_mentor_records())
+        cache.set(FEATURES_CACHE_KEY, features, FEATURES_CACHE_TIMEOUT)
+    return features
+
+
+def invalidate_mentor_features():
+    cache.delete(FEATURES_CACHE_KEY)
+
+
+def stale_student_ids():
+    """
+    Students whose assignment needs revisiting: students with a profile and no
+    mentor, mentees of mentors who became unavailable or inactive, and the
+    lowest-scoring mentees of mentors now over capacity.
+    """
+    ids = set(StudentProfile.objects.filter(
+        user__is_active=True, user__user_type=UserTypeChoices.STUDENT, user__mentorship__isnull=True,
+    ).values_list('user_id', flat=True))
+    ids.update(Mentorship.objects.filter(
+        Q(mentor__availability=AvailabilityChoices.UNAVAILABLE) | Q(mentor__user__is_active=False),
+    ).values_list('student_id', flat=True))
+    over_capacity = Mentor.objects.annotate(mentees=Count('mentorships')).filter(mentees__gt=F('capacity'))
+    for mentor in over_capacity:
+        ids.update(mentor.mentorships.order_by('-score', '-pk').values_list('student_id', flat=True)[mentor.capacity:])
+    return ids
+
+
+def match_students(student_ids=None):
+    """
+    Assign mentors and save the Mentorship rows. With ``student_ids`` only
+    those students are re-solved, against what is left of every mentor's
+    capacity; everyone else keeps their mentor. Without it every student is
+    matched from scratch. Returns the number of students given a mentor.
+    """
+    mentors = mentor_features()
+    with transaction.atomic():
+        current = Mentorship.objects.all()
+        if student_ids is not None:
+            current = current.filter(student_id__in=student_ids)
+        touched = set(current.values_list('mentor_id', flat=True).distinct())
+        # The delete signals decrement mentee counts row by row; recount first
+        # so counters left stale by bulk writes can't go below zero.
+        Mentor.objects.filter(pk__in=touched).refresh_counters()
+        current.delete()
+
+        students = encode_students(_student_records(student_ids), mentors)
+        taken = dict(Mentorship.objects.values_list('mentor_id').annotate(Count('pk')).order_by())
+        remaining = mentors.capacity - np.array([taken.get(pk, 0) for pk in mentors.ids.tolist()], dtype=np.int64)
+        assigned, scores = solve(students, mentors, remaining)
+
+        matched = assigned >= 0
+        Mentorship.objects.bulk_create(
+            [
+                Mentorship(student_id=student, mentor_id=mentor, score=value)
+                for student, mentor, value in zip(
+                    students.ids[matched].tolist(),
+                    mentors.ids[assigned[matched]].tolist(),
+                    scores[matched].tolist(),
+                )
+            ],
+            batch_size=1000,
+        )
+        mentors_to_count = Mentor.objects.all()
+        if student_ids is not None:
+            touched.update(mentors.ids[assigned[matched]].tolist())
+            mentors_to_count = mentors_to_count.filter(pk__in=touched)
+        mentors_to_count.refresh_counters()
+    return int(matched.sum())
@@ -0,0 +1,112 @@
+"""
+Messaging between a student and their mentor.
+
+Sending is append-only: it bumps the thread's ``last_seq`` (which also locks
+the thread row, so concurrent sends get consecutive numbers), inserts the
+message with that number and stamps both participants. That is a fixed four
+statements whatever the size of the thread. Unread counts are the difference
+between the thread's sequence and each participant's ``last_read_seq``.
+
+A participant's ``last_message_at`` starts at the thread's creation time, so a
+thread nobody has written in yet still has an inbox key to page on.
+"""
+from django.core.exceptions import PermissionDenied
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, PositiveIntegerField, Sum, When
+from django.utils import timezone
+
+from core.enums import UserTypeChoices
+from core.pagination import KeysetPaginator
+from mentor.models import Mentor, Mentorship, Message, Thread, ThreadParticipant
+
+HISTORY_ORDERING = ('-created_at', '-id')
+INBOX_ORDERING = ('-last_message_at', '-id')
+MAX_MESSAGE_LENGTH = 5000
+
+
+def thread_between(user, other):
+    """
+    The thread between ``user`` and ``other``, created on first use. One of
+    them must be the other's current mentor.
+    """
+    if user.user_type == UserTypeChoices.MENTOR:
+        mentor_user, student = user, other
+    else:
+        mentor_user, student = other, user
+    mentor = Mentor.objects.filter(user=mentor_user).first()
+    if mentor is None or not Mentorship.objects.filter(student=student, mentor=mentor).exists():
+        raise PermissionDenied("You can only message your own mentor or mentees.")
+
+    thread = Thread.objects.filter(student=student, mentor=mentor).first()
+    if thread is not None:
+        return thread
+    try:
+        with transaction.atomic():
+            thread = Thread.objects.create(student=student, mentor=mentor)
+            ThreadParticipant.objects.bulk_create([
+                ThreadParticipant(thread=thread, user=student, last_message_at=thread.created_at),
+                ThreadParticipant(thread=thread, user=mentor_user, last_message_at=thread.created_at),
+            ])
+    except IntegrityError:
+        # Both sides opened it at once.
+        thread = Thread.objects.get(student=student, mentor=mentor)
+    return thread
+
+
+def participation(user, thread_id):
+    """``user``'s side of a thread, with the thread and both people joined in."""
+    return ThreadParticipant.objects.select_related(
+        'thread__student', 'thread__mentor__user',
+    ).get(user=user, thread_id=thread_id)
+
+
+def inbox(user, per_page=20):
+    queryset = ThreadParticipant.objects.filter(user=user).select_related('thread__student', 'thread__mentor__user')
+    return KeysetPaginator(queryset, per_page, ordering=INBOX_ORDERING)
+
+
+def history(thread_id, per_page=50):
+    """Newest first; each cursor goes further back."""
+    queryset = Message.objects.filter(thread_id=thread_id).select_related('sender')
+    return KeysetPaginator(queryset, per_page, ordering=HISTORY_ORDERING)
+
+
+def send(participant, body):
+    body = body.strip()
+    if not body:
+        raise ValueError("Message is empty.")
+    if len(body) > MAX_MESSAGE_LENGTH:
+        raise ValueError(f"Messages are limited to {MAX_MESSAGE_LENGTH} characters.")
+
+    now = timezone.now()
+    threads = Thread.objects.filter(pk=participant.thread_id)
+    with transaction.atomic():
+        threads.update(last_seq=F('last_seq') + 1, last_message_at=now)
+        seq = threads.values_list('last_seq', flat=True).get()
+        message = Message.objects.create(
+            thread_id=participant.thread_id, sender_id=participant.user_id, seq=seq, body=body, created_at=now,
+        )
+        # The sender has read their own message.
+        ThreadParticipant.objects.filter(thread_id=participant.thread_id).update(
+            last_message_at=now,
+            last_read_seq=Case(
+                When(pk=participant.pk, then=seq), default=F('last_read_seq'), output_field=PositiveIntegerField(),
+            ),
+        )
+    return message
+
+
+def mark_read(participant):
+    """Everything up to the thread's newest message; never moves backwards."""
+    ThreadParticipant.objects.filter(
+        pk=participant.pk, last_read_seq__lt=participant.thread.last_seq,
+    ).update(last_read_seq=participant.thread.last_seq)
+    participant.last_read_seq = max(participant.last_read_seq, participant.thread.last_seq)
+
+
+def unread_total(user):
+    """Unread messages across all of ``user``'s threads: one row per thread, not per message."""
+    total = ThreadParticipant.objects.filter(user=user).aggregate(
+        unread=Sum(F('thread__last_seq') - F('last_read_seq')),
+    )['unread']
+    return total or 0
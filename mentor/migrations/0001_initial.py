@@ -0,0 +1,47 @@
+# Generated by Django 4.2.11 on 2026-10-18 18:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpertiseTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Name')),
+                ('slug', models.SlugField(unique=True, verbose_name='Slug')),
+            ],
+            options={
+                'ordering': ('name',),
+            },
+        ),
+        migrations.CreateModel(
+            name='Mentor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(max_length=100, verbose_name='Department')),
+                ('year', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Year')),
+                ('availability', models.CharField(choices=[('AVAILABLE', 'Available'), ('LIMITED', 'Limited'), ('UNAVAILABLE', 'Unavailable')], default='AVAILABLE', max_length=20, verbose_name='Availability')),
+                ('headline', models.CharField(blank=True, max_length=120, verbose_name='Headline')),
+                ('bio', models.TextField(blank=True, verbose_name='Bio')),
+                ('photo', models.CharField(blank=True, help_text='Path under static/, e.g. images/mentor.jpg', max_length=255, verbose_name='Photo')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('expertise', models.ManyToManyField(blank=True, related_name='mentors', to='mentor.expertisetag', verbose_name='Expertise')),
+                ('user', models.OneToOneField(limit_choices_to={'user_type': 'MENTOR'}, on_delete=django.db.models.deletion.CASCADE, related_name='mentor_profile', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'ordering': ('-id',),
+                'indexes': [models.Index(fields=['department', 'availability', '-id'], name='mentor_dept_avail_idx'), models.Index(fields=['availability', '-id'], name='mentor_avail_idx'), models.Index(fields=['year', '-id'], name='mentor_year_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.11 on 2026-10-18 18:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('mentor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mentor',
+            name='capacity',
+            field=models.PositiveSmallIntegerField(default=5, help_text='Most students to mentor at once.', verbose_name='Capacity'),
+        ),
+        migrations.AddField(
+            model_name='mentor',
+            name='languages',
+            field=models.CharField(blank=True, help_text='Comma-separated language codes, e.g. en,ur', max_length=100, verbose_name='Languages'),
+        ),
+        migrations.CreateModel(
+            name='Mentorship',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Score')),
+                ('matched_at', models.DateTimeField(auto_now_add=True, verbose_name='Matched At')),
+                ('mentor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentorships', to='mentor.mentor', verbose_name='Mentor')),
+                ('student', models.OneToOneField(limit_choices_to={'user_type': 'STUDENT'}, on_delete=django.db.models.deletion.CASCADE, related_name='mentorship', to=settings.AUTH_USER_MODEL, verbose_name='Student')),
+            ],
+            options={
+                'ordering': ('-matched_at',),
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.11 on 2026-10-18 18:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_existing_mentees(apps, schema_editor):
+    Mentor = apps.get_model('mentor', 'Mentor')
+    Mentorship = apps.get_model('mentor', 'Mentorship')
+    mentees = (
+        Mentorship.objects.filter(mentor=OuterRef('pk')).order_by().values('mentor')
+        .annotate(total=Count('pk')).values('total')
+    )
+    Mentor.objects.update(mentee_count=Coalesce(Subquery(mentees), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('mentor', '0002_mentor_capacity_mentor_languages_mentorship'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mentor',
+            name='mentee_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Mentees'),
+        ),
+        migrations.AddField(
+            model_name='mentor',
+            name='session_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Sessions'),
+        ),
+        migrations.CreateModel(
+            name='MentoringSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('held_at', models.DateTimeField(verbose_name='Held At')),
+                ('notes', models.TextField(blank=True, verbose_name='Notes')),
+                ('mentor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to='mentor.mentor', verbose_name='Mentor')),
+                ('student', models.ForeignKey(limit_choices_to={'user_type': 'STUDENT'}, on_delete=django.db.models.deletion.CASCADE, related_name='mentoring_sessions', to=settings.AUTH_USER_MODEL, verbose_name='Student')),
+            ],
+            options={
+                'ordering': ('-held_at',),
+                'indexes': [models.Index(fields=['mentor', '-held_at'], name='session_mentor_idx'), models.Index(fields=['student', '-held_at'], name='session_student_idx')],
+            },
+        ),
+        migrations.RunPython(count_existing_mentees, migrations.RunPython.noop),
+    ]
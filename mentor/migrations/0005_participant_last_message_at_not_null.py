@@ -0,0 +1,26 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_last_message_at(apps, schema_editor):
+    Thread = apps.get_model('mentor', 'Thread')
+    ThreadParticipant = apps.get_model('mentor', 'ThreadParticipant')
+    ThreadParticipant.objects.filter(last_message_at__isnull=True).update(
+        last_message_at=Subquery(Thread.objects.filter(pk=OuterRef('thread_id')).values('created_at')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentor', '0004_messaging'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_last_message_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='threadparticipant',
+            name='last_message_at',
+            field=models.DateTimeField(verbose_name='Last Message At'),
+        ),
+    ]
@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import migrations
+
+# The mentors the directory listed before it was backed by Mentor. They get
+# accounts nobody can log in to (placeholder address, unusable password) and
+# no capacity, so no student is matched to them until an admin hands the
+# account over and sets its capacity.
+MENTORS = [
+    {
+        'first_name': 'Amir',
+        'last_name': 'Ibn Shabir',
+        'email': 'amir.ibnshabir@campusconnect.invalid',
+        'department': 'IER',
+        'headline': 'Alumni IER 2022',
+        'bio': (
+            "An IER alumnus passionate about guiding students toward academic excellence and career growth. With "
+            "firsthand experience in overcoming challenges, he inspires others to make confident and informed "
+            "decisions about their future."
+        ),
+        'photo': 'images/1861ba34-3e61-45bb-a865-76f10fe5f834.jpg',
+    },
+    {
+        'first_name': 'Sarmad',
+        'last_name': 'Awais',
+        'email': 'sarmad.awais@campusconnect.invalid',
+        'department': 'BSSE',
+        'headline': 'Alumni BSSE 2023',
+        'bio': (
+            "A BSSE graduate dedicated to helping students build their coding skills from the ground up. He "
+            "believes learning to code should be fun, practical, and empowering — turning beginners into "
+            "confident problem-solvers."
+        ),
+        'photo': 'images/aad7c821-7201-4946-83a7-566fae29bce9.jpg',
+    },
+    {
+        'first_name': 'Junaid',
+        'last_name': 'Farooqi',
+        'email': 'junaid.farooqi@campusconnect.invalid',
+        'department': 'IAS',
+        'headline': 'Final Year IAS',
+        'bio': (
+            "An IAS student passionate about guiding freshmen through their academic journey. He aims to share "
+            "insights, study tips, and real experiences to help new students adjust smoothly and make the most of "
+            "their department life."
+        ),
+        'photo': 'images/705da372-5abd-4874-89f2-55cf7a6a5eed.jpg',
+    },
+    {
+        'first_name': 'Kamran',
+        'last_name': 'Baloch',
+        'email': 'kamran.baloch@campusconnect.invalid',
+        'department': 'Mass Communication',
+        'headline': 'Final Year, Mass Communication',
+        'bio': (
+            "A final-year Mass Communication student dedicated to helping freshers navigate their career paths and "
+            "overcome departmental challenges. He shares practical advice, real experiences, and guidance to help "
+            "them build confidence and direction in their field."
+        ),
+        'photo': 'images/2ceb3ec7-1333-4783-a2fb-363cc4f794fd.jpg',
+    },
+]
+
+
+def seed_mentors(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Mentor = apps.get_model('mentor', 'Mentor')
+    for fields in MENTORS:
+        fields = dict(fields)
+        email = fields.pop('email')
+        if User.objects.filter(email=email).exists():
+            continue
+        user = User.objects.create(
+            email=email,
+            username=email.split('@')[0],
+            first_name=fields.pop('first_name'),
+            last_name=fields.pop('last_name'),
+            password=make_password(None),
+            user_type='MENTOR',
+        )
+        Mentor.objects.create(user=user, capacity=0, **fields)
+
+
+def remove_mentors(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    User.objects.filter(email__in=[fields['email'] for fields in MENTORS]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('mentor', '0005_participant_last_message_at_not_null'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_mentors, remove_mentors),
+    ]
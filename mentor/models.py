@@ -1,3 +1,251 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+from core.enums import AvailabilityChoices, UserTypeChoices
+
+
+class ExpertiseTag(models.Model):
+    name = models.CharField(_('Name'), max_length=50, unique=True)
+    slug = models.SlugField(_('Slug'), max_length=50, unique=True)
+
+    class Meta:
+        ordering = ('name',)
+
+    def __str__(self):
+        return self.name
+
+
+class MentorQuerySet(models.QuerySet):
+    def directory(self):
+        """
+        Active mentors with everything the directory renders: the user row is
+        joined in the same query and tags come from a single prefetch.
+        """
+        return (
+            self.filter(user__is_active=True)
+            .select_related('user')
+            .prefetch_related('expertise')
+        )
+
+    def filter_directory(self, department=None, availability=None, year=None, expertise=None):
+        queryset = self
+        if department:
+            queryset = queryset.filter(department=department)
+        if availability:
+            queryset = queryset.filter(availability=availability)
+        if year:
+            queryset = queryset.filter(year=year)
+        if expertise:
+            queryset = queryset.filter(expertise__slug=expertise)
+        return queryset
+
+    def refresh_counters(self):
+        """Recount ``mentee_count`` and ``session_count`` from the rows they summarise."""
+        return self.update(
+            mentee_count=count_subquery(Mentorship.objects.filter(mentor=OuterRef('pk')), 'mentor'),
+            session_count=count_subquery(MentoringSession.objects.filter(mentor=OuterRef('pk')), 'mentor'),
+        )
+
+
+def count_subquery(queryset, group_by):
+    """A correlated COUNT subquery usable in ``update()``."""
+    return Coalesce(Subquery(queryset.order_by().values(group_by).annotate(total=Count('pk')).values('total')), 0)
+
+
+class Mentor(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='mentor_profile',
+        limit_choices_to={'user_type': UserTypeChoices.MENTOR},
+        verbose_name=_('User'),
+    )
+    department = models.CharField(_('Department'), max_length=100)
+    expertise = models.ManyToManyField(ExpertiseTag, blank=True, related_name='mentors', verbose_name=_('Expertise'))
+    year = models.PositiveSmallIntegerField(_('Year'), null=True, blank=True)
+    availability = models.CharField(
+        _('Availability'),
+        max_length=20,
+        choices=AvailabilityChoices.choices,
+        default=AvailabilityChoices.AVAILABLE,
+    )
+    headline = models.CharField(_('Headline'), max_length=120, blank=True)
+    bio = models.TextField(_('Bio'), blank=True)
+    photo = models.CharField(_('Photo'), max_length=255, blank=True, help_text=_('Path under static/, e.g. images/mentor.jpg'))
+    languages = models.CharField(
+        _('Languages'), max_length=100, blank=True, help_text=_('Comma-separated language codes, e.g. en,ur'),
+    )
+    capacity = models.PositiveSmallIntegerField(_('Capacity'), default=5, help_text=_('Most students to mentor at once.'))
+    # Denormalised for the profile page; kept in step by mentor.signals and
+    # mentor.matching.
+    mentee_count = models.PositiveIntegerField(_('Mentees'), default=0, editable=False)
+    session_count = models.PositiveIntegerField(_('Sessions'), default=0, editable=False)
+    created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
+
+    objects = MentorQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-id',)
+        indexes = [
+            # Every directory filter is an equality match followed by the
+            # keyset ordering on id, so each index ends with it.
+            models.Index(fields=['department', 'availability', '-id'], name='mentor_dept_avail_idx'),
+            models.Index(fields=['availability', '-id'], name='mentor_avail_idx'),
+            models.Index(fields=['year', '-id'], name='mentor_year_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} ({self.department})"
+
+    def clean(self):
+        if self.user_id and self.user.user_type != UserTypeChoices.MENTOR:
+            raise ValidationError({'user': _('Only users of type Mentor can have a mentor profile.')})
+
+    def to_dict(self):
+        return {
+            'id': self.pk,
+            'name': self.user.get_full_name(),
+            'department': self.department,
+            'year': self.year,
+            'availability': self.availability,
+            'headline': self.headline,
+            'bio': self.bio,
+            'photo': self.photo,
+            'expertise': [tag.slug for tag in self.expertise.all()],
+        }
+
+
+def split_languages(value):
+    return [code for code in (part.strip().lower() for part in value.split(',')) if code]
+
+
+class Mentorship(models.Model):
+    """A student's current mentor, as assigned by ``mentor.matching``."""
+    student = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='mentorship',
+        limit_choices_to={'user_type': UserTypeChoices.STUDENT},
+        verbose_name=_('Student'),
+    )
+    mentor = models.ForeignKey(Mentor, on_delete=models.CASCADE, related_name='mentorships', verbose_name=_('Mentor'))
+    score = models.FloatField(_('Score'))
+    matched_at = models.DateTimeField(_('Matched At'), auto_now_add=True)
+
+    class Meta:
+        ordering = ('-matched_at',)
+
+    def __str__(self):
+        return f"{self.student} -> {self.mentor}"
+
+
+class MentoringSession(models.Model):
+    """A meeting between a mentor and one of their students."""
+    mentor = models.ForeignKey(Mentor, on_delete=models.CASCADE, related_name='sessions', verbose_name=_('Mentor'))
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='mentoring_sessions',
+        limit_choices_to={'user_type': UserTypeChoices.STUDENT},
+        verbose_name=_('Student'),
+    )
+    held_at = models.DateTimeField(_('Held At'))
+    notes = models.TextField(_('Notes'), blank=True)
+
+    class Meta:
+        ordering = ('-held_at',)
+        indexes = [
+            models.Index(fields=['mentor', '-held_at'], name='session_mentor_idx'),
+            models.Index(fields=['student', '-held_at'], name='session_student_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.mentor} with {self.student} at {self.held_at:%Y-%m-%d %H:%M}"
+
+
+class Thread(models.Model):
+    """
+    A conversation between a student and a mentor. ``last_seq`` is the
+    sequence number of the newest message, so a participant's unread count is
+    ``last_seq - last_read_seq`` without looking at the messages.
+    """
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='message_threads',
+        verbose_name=_('Student'),
+    )
+    mentor = models.ForeignKey(Mentor, on_delete=models.CASCADE, related_name='message_threads', verbose_name=_('Mentor'))
+    last_seq = models.PositiveIntegerField(_('Messages'), default=0, editable=False)
+    last_message_at = models.DateTimeField(_('Last Message At'), null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'mentor'], name='thread_student_mentor_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.student} and {self.mentor.user}"
+
+
+class ThreadParticipant(models.Model):
+    """One side of a thread, with how far they have read."""
+    thread = models.ForeignKey(Thread, on_delete=models.CASCADE, related_name='participants', verbose_name=_('Thread'))
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='thread_memberships',
+        verbose_name=_('User'),
+    )
+    last_read_seq = models.PositiveIntegerField(_('Last Read'), default=0)
+    # Copied from the thread on every send so the inbox is one index scan;
+    # the thread's creation time until then, as keyset pages can't step past
+    # a NULL.
+    last_message_at = models.DateTimeField(_('Last Message At'))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'thread'], name='participant_user_thread_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-last_message_at', '-id'], name='participant_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} in {self.thread_id}"
+
+    @property
+    def unread_count(self):
+        return self.thread.last_seq - self.last_read_seq
+
+
+class Message(models.Model):
+    """Append-only: messages are never edited, so ``seq`` order is history order."""
+    thread = models.ForeignKey(Thread, on_delete=models.CASCADE, related_name='messages', verbose_name=_('Thread'))
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='sent_messages',
+        verbose_name=_('Sender'),
+    )
+    seq = models.PositiveIntegerField(_('Sequence'))
+    body = models.TextField(_('Body'))
+    created_at = models.DateTimeField(_('Created At'))
+
+    class Meta:
+        ordering = ('-created_at', '-id')
+        constraints = [
+            models.UniqueConstraint(fields=['thread', 'seq'], name='message_thread_seq_unique'),
+        ]
+        indexes = [
+            # History pages: the keyset ordering within one thread.
+            models.Index(fields=['thread', '-created_at', '-id'], name='message_thread_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sender}: {self.body[:50]}"
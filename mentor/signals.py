@@ -0,0 +1,127 @@
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core import search
+from core.enums import UserTypeChoices
+from core.models import User
+from core.page_cache import invalidate_page
+from mentor.models import ExpertiseTag, Mentor, MentoringSession, Mentorship
+from student.models import StudentProfile
+
+
+def invalidate_matching():
+    # Imported here so NumPy stays out of web worker start-up.
+    from mentor.matching import invalidate_mentor_features
+
+    invalidate_mentor_features()
+
+
+@receiver(post_save, sender=Mentor)
+@receiver(post_delete, sender=Mentor)
+@receiver(post_save, sender=ExpertiseTag)
+@receiver(post_delete, sender=ExpertiseTag)
+@receiver(m2m_changed, sender=Mentor.expertise.through)
+def invalidate_mentor_directory(sender, **kwargs):
+    invalidate_page('mentors.html')
+
+
+@receiver(post_save, sender=Mentor)
+@receiver(post_delete, sender=Mentor)
+@receiver(m2m_changed, sender=Mentor.expertise.through)
+def invalidate_mentor_features(sender, **kwargs):
+    invalidate_matching()
+
+
+@receiver(post_save, sender=User)
+def invalidate_mentor_name(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login; don't throw the directory away for those.
+    if instance.user_type == UserTypeChoices.MENTOR and update_fields != frozenset({'last_login'}):
+        invalidate_page('mentors.html')
+        invalidate_matching()
+        # The name and is_active are indexed with the profile.
+        for pk in Mentor.objects.filter(user=instance).values_list('pk', flat=True):
+            search.schedule_reindex(search.MENTOR, pk)
+
+
+@receiver(post_save, sender=Mentor)
+@receiver(post_delete, sender=Mentor)
+def reindex_mentor(sender, instance, **kwargs):
+    search.schedule_reindex(search.MENTOR, instance.pk)
+
+
+@receiver(m2m_changed, sender=Mentor.expertise.through)
+def reindex_mentor_expertise(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            search.schedule_reindex(search.MENTOR, instance.pk)
+        return
+    # From the tag's side pk_set holds the mentors, except on clear(), whose
+    # mentors are only known before it runs.
+    if action == 'pre_clear':
+        pk_set = instance.mentors.values_list('pk', flat=True)
+    elif action not in ('post_add', 'post_remove'):
+        return
+    for pk in pk_set:
+        search.schedule_reindex(search.MENTOR, pk)
+
+
+@receiver(post_save, sender=ExpertiseTag)
+@receiver(pre_delete, sender=ExpertiseTag)
+def reindex_tagged_mentors(sender, instance, created=False, **kwargs):
+    # Tag names are indexed with each mentor that has them.
+    if not created:
+        for pk in instance.mentors.values_list('pk', flat=True):
+            search.schedule_reindex(search.MENTOR, pk)
+
+
+# Counter fields kept in step with each model's rows:
+# (counted model, its lookup, attribute on the row, counter field).
+COUNTERS = {
+    Mentorship: [(Mentor, 'pk', 'mentor_id', 'mentee_count')],
+    MentoringSession: [
+        (Mentor, 'pk', 'mentor_id', 'session_count'),
+        (StudentProfile, 'user_id', 'student_id', 'session_count'),
+    ],
+}
+
+
+def _shift(sender, values, delta):
+    for model, lookup, attribute, field in COUNTERS[sender]:
+        if values.get(attribute) is not None:
+            model.objects.filter(**{lookup: values[attribute]}).update(**{field: F(field) + delta})
+
+
+@receiver(pre_save, sender=Mentorship)
+@receiver(pre_save, sender=MentoringSession)
+def remember_counted_owners(sender, instance, **kwargs):
+    instance._counted_owners = None
+    if not instance._state.adding:
+        instance._counted_owners = sender.objects.filter(pk=instance.pk).values('mentor_id', 'student_id').first()
+
+
+@receiver(post_save, sender=Mentorship)
+@receiver(post_save, sender=MentoringSession)
+def count_saved(sender, instance, created, **kwargs):
+    current = {'mentor_id': instance.mentor_id, 'student_id': instance.student_id}
+    previous = getattr(instance, '_counted_owners', None)
+    if created or previous is None:
+        _shift(sender, current, 1)
+        return
+    # Moved to another mentor or student: only the counters that changed.
+    for key in current:
+        if previous[key] != current[key]:
+            _shift(sender, {key: previous[key]}, -1)
+            _shift(sender, {key: current[key]}, 1)
+
+
+@receiver(post_delete, sender=Mentorship)
+@receiver(post_delete, sender=MentoringSession)
+def count_deleted(sender, instance, **kwargs):
+    _shift(sender, {'mentor_id': instance.mentor_id, 'student_id': instance.student_id}, -1)
+
+
+@receiver(post_save, sender=StudentProfile)
+def count_existing_sessions(sender, instance, created, **kwargs):
+    if created:
+        StudentProfile.objects.filter(pk=instance.pk).refresh_counters()
@@ -1,3 +1,330 @@
+import importlib
+
+from django.apps import apps as django_apps
+from django.core.cache import caches
+from django.core.exceptions import PermissionDenied
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.enums import AvailabilityChoices, UserTypeChoices
+from core.models import User
+from core.tests import remove_seeded_mentors, shared_caches
+from mentor import messaging
+from mentor.matching import encode_mentors, encode_students, match_students, solve, stale_student_ids
+from mentor.models import ExpertiseTag, Mentor, MentoringSession, Mentorship, Message
+from student.models import StudentProfile
+
+
+class MentorDirectoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        remove_seeded_mentors()
+        python = ExpertiseTag.objects.create(name='Python', slug='python')
+        for i in range(30):
+            user = User.objects.create_user(
+                email=f'mentor{i}@example.com',
+                first_name=f'Mentor{i}',
+                password=None,
+                user_type=UserTypeChoices.MENTOR,
+            )
+            mentor = Mentor.objects.create(user=user, department='BSSE' if i % 2 else 'IER', year=4)
+            mentor.expertise.add(python)
+
+    def setUp(self):
+        caches['pages'].clear()
+
+    def test_keyset_pages_cover_every_mentor_once(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {'format': 'json'}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(reverse('mentors'), params).json()
+            seen.extend(row['id'] for row in data['results'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen, reverse=True), seen)
+        self.assertEqual(len(set(seen)), 30)
+
+    def test_query_budget_is_fixed(self):
+        # mentors + user join, expertise prefetch
+        with self.assertNumQueries(2):
+            self.client.get(reverse('mentors'), {'format': 'json', 'department': 'BSSE'})
+        # plus the expertise filter options
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('mentors'))
+        self.assertContains(response, 'Mentor29')
+
+    def test_page_mentors_are_seeded_without_mentees(self):
+        seed = importlib.import_module('mentor.migrations.0006_seed_mentors')
+        seed.seed_mentors(django_apps, None)
+        seed.seed_mentors(django_apps, None)
+        seeded = Mentor.objects.filter(user__email__in=[fields['email'] for fields in seed.MENTORS])
+        self.assertEqual([mentor.capacity for mentor in seeded], [0] * 4)
+        self.assertFalse(any(mentor.user.has_usable_password() for mentor in seeded))
+        self.assertContains(self.client.get(reverse('mentors'), {'department': 'IER'}), 'Amir Ibn Shabir')
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(reverse('mentors'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_directory_page_cache_is_invalidated_by_mentor_changes(self):
+        self.client.get(reverse('mentors'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('mentors'))
+        mentor = Mentor.objects.first()
+        mentor.headline = 'Now mentoring in Rust'
+        mentor.save()
+        self.assertContains(self.client.get(reverse('mentors')), 'Now mentoring in Rust')
+
+
+class MatchingTests(TestCase):
+    def make_mentor(self, name, department, tags=(), capacity=2, **kwargs):
+        user = User.objects.create_user(
+            email=f'{name}@example.com', first_name=name, password=None, user_type=UserTypeChoices.MENTOR,
+        )
+        mentor = Mentor.objects.create(user=user, department=department, capacity=capacity, **kwargs)
+        mentor.expertise.set(tags)
+        return mentor
+
+    def make_student(self, name, department, tags=(), languages=''):
+        user = User.objects.create_user(
+            email=f'{name}@example.com', first_name=name, password=None, user_type=UserTypeChoices.STUDENT,
+        )
+        profile = StudentProfile.objects.create(user=user, department=department, languages=languages)
+        profile.interests.set(tags)
+        return user
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_solve_prefers_best_match_within_capacity(self):
+        mentors = encode_mentors([
+            (1, 'bsse', [10], ['en'], AvailabilityChoices.AVAILABLE, 1),
+            (2, 'ier', [20], ['ur'], AvailabilityChoices.AVAILABLE, 5),
+            (3, 'bsse', [10], ['en'], AvailabilityChoices.UNAVAILABLE, 5),
+        ])
+        students = encode_students([
+            (100, 'bsse', [10], ['en']),
+            (101, 'bsse', [10], ['en']),
+            (102, 'ier', [20, 99], []),
+        ], mentors)
+        assigned, scores = solve(students, mentors)
+        # 100 and 101 tie for mentor 1's single place; the loser falls back to mentor 2.
+        self.assertEqual(sorted(mentors.ids[assigned].tolist()), [1, 2, 2])
+        self.assertEqual(mentors.ids[assigned[2]], 2)
+        self.assertAlmostEqual(float(scores.max()), 1.0, places=5)
+
+    def test_incremental_rematch_only_moves_affected_students(self):
+        python = ExpertiseTag.objects.create(name='Python', slug='python')
+        busy = self.make_mentor('busy', 'BSSE', [python])
+        spare = self.make_mentor('spare', 'BSSE')
+        alice = self.make_student('alice', 'bsse', [python])
+        bob = self.make_student('bob', 'BSSE', [python])
+        self.assertEqual(match_students(), 2)
+        self.assertEqual(set(busy.mentorships.values_list('student_id', flat=True)), {alice.pk, bob.pk})
+
+        carol = self.make_student('carol', 'BSSE', [python])
+        busy.availability = AvailabilityChoices.UNAVAILABLE
+        busy.save()
+        stale = stale_student_ids()
+        self.assertEqual(stale, {alice.pk, bob.pk, carol.pk})
+        match_students(stale)
+        # spare has two places; the strongest matches get them
+        self.assertEqual(Mentorship.objects.filter(mentor=spare).count(), 2)
+        self.assertEqual(Mentorship.objects.count(), 2)
+
+    def test_over_capacity_mentees_are_stale(self):
+        mentor = self.make_mentor('mentor', 'BSSE', capacity=2)
+        students = [self.make_student(f's{i}', 'BSSE') for i in range(2)]
+        match_students()
+        self.assertEqual(stale_student_ids(), set())
+        mentor.capacity = 1
+        mentor.save()
+        self.assertEqual(len(stale_student_ids() & {student.pk for student in students}), 1)
+
+
+    def test_students_who_sign_up_are_matched(self):
+        mentor = self.make_mentor('mentor', 'BSSE')
+        response = self.client.post(reverse('signup'), {
+            'username': 'fresher_1', 'email': 'fresher@example.com', 'user_type': UserTypeChoices.STUDENT,
+            'password': 'Correct-Horse-42', 'confirm_password': 'Correct-Horse-42',
+        })
+        self.assertEqual(response.status_code, 302)
+        student = User.objects.get(email='fresher@example.com')
+        self.assertEqual(stale_student_ids(), {student.pk})
+        self.assertEqual(match_students(), 1)
+        self.assertEqual(student.mentorship.mentor, mentor)
+
+
+@shared_caches()
+class ProfileCounterTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.mentor = Mentor.objects.create(
+            user=User.objects.create_user(email='mentor@example.com', first_name='Ayesha', user_type=UserTypeChoices.MENTOR),
+            department='BSSE',
+        )
+        self.other = Mentor.objects.create(
+            user=User.objects.create_user(email='other@example.com', first_name='Other', user_type=UserTypeChoices.MENTOR),
+            department='BSSE',
+        )
+        self.student = User.objects.create_user(email='student@example.com', first_name='Sana', password='pw')
+        StudentProfile.objects.create(user=self.student, department='BSSE')
+
+    def counts(self):
+        self.mentor.refresh_from_db()
+        self.other.refresh_from_db()
+        return (
+            self.mentor.mentee_count, self.mentor.session_count, self.other.mentee_count,
+            StudentProfile.objects.get(user=self.student).session_count,
+        )
+
+    def test_counters_follow_saves_moves_and_deletes(self):
+        mentorship = Mentorship.objects.create(student=self.student, mentor=self.mentor, score=1)
+        session = MentoringSession.objects.create(mentor=self.mentor, student=self.student, held_at=timezone.now())
+        self.assertEqual(self.counts(), (1, 1, 0, 1))
+
+        mentorship.mentor = self.other
+        mentorship.save()
+        self.assertEqual(self.counts(), (0, 1, 1, 1))
+
+        session.delete()
+        mentorship.delete()
+        self.assertEqual(self.counts(), (0, 0, 0, 0))
+
+    def test_counters_match_recount_after_matching(self):
+        self.other.availability = AvailabilityChoices.UNAVAILABLE
+        self.other.save()
+        match_students()
+        self.assertEqual(self.counts()[0], 1)
+        match_students()
+        self.assertEqual(self.counts()[0], 1)
+        Mentor.objects.update(mentee_count=7)
+        Mentor.objects.refresh_counters()
+        self.assertEqual(self.counts()[:3], (1, 0, 0))
+
+    def test_profile_page_is_one_query(self):
+        Mentorship.objects.create(student=self.student, mentor=self.mentor, score=1)
+        MentoringSession.objects.create(mentor=self.mentor, student=self.student, held_at=timezone.now())
+        self.client.force_login(self.student)
+        self.client.get(reverse('profile'))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('profile'))
+        self.assertContains(response, 'Ayesha')
+        self.assertContains(response, 'Sessions attended')
+
+        self.client.force_login(self.mentor.user)
+        self.client.get(reverse('profile'))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('profile'))
+        self.assertContains(response, 'Mentees')
+
+
+    def test_mentors_who_sign_up_are_listed_and_counted(self):
+        self.client.get(reverse('mentors'), {'format': 'json'})
+        self.client.post(reverse('signup'), {
+            'username': 'new_mentor', 'email': 'new@example.com', 'user_type': UserTypeChoices.MENTOR,
+            'password': 'Correct-Horse-42', 'confirm_password': 'Correct-Horse-42',
+        })
+        mentor = Mentor.objects.get(user__email='new@example.com')
+        listed = self.client.get(reverse('mentors'), {'format': 'json'}).json()['results']
+        self.assertIn(mentor.pk, [row['id'] for row in listed])
+
+        MentoringSession.objects.create(mentor=mentor, student=self.student, held_at=timezone.now())
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.context['mentor_profile'].session_count, 1)
+        self.assertContains(response, 'Mentees')
+
+class MessagingTests(TestCase):
+    def setUp(self):
+        mentor_user = User.objects.create_user(
+            email='mentor@example.com', first_name='Ayesha', password='pw', user_type=UserTypeChoices.MENTOR,
+        )
+        self.mentor = Mentor.objects.create(user=mentor_user, department='BSSE')
+        self.student = User.objects.create_user(email='student@example.com', first_name='Sana', password='pw')
+        Mentorship.objects.create(student=self.student, mentor=self.mentor, score=1)
+        self.thread = messaging.thread_between(self.student, mentor_user)
+
+    def test_only_matched_pairs_can_open_a_thread(self):
+        self.assertEqual(messaging.thread_between(self.mentor.user, self.student), self.thread)
+        stranger = User.objects.create_user(email='stranger@example.com', first_name='Stranger')
+        with self.assertRaises(PermissionDenied):
+            messaging.thread_between(stranger, self.mentor.user)
+
+    def test_unread_counts_are_per_participant(self):
+        student_side = messaging.participation(self.student, self.thread.pk)
+        mentor_side = messaging.participation(self.mentor.user, self.thread.pk)
+        for i in range(3):
+            messaging.send(student_side, f'Question {i}')
+        self.assertEqual(messaging.unread_total(self.mentor.user), 3)
+        self.assertEqual(messaging.unread_total(self.student), 0)
+
+        mentor_side = messaging.participation(self.mentor.user, self.thread.pk)
+        messaging.mark_read(mentor_side)
+        self.assertEqual(messaging.unread_total(self.mentor.user), 0)
+        # Replying also reads everything before the reply.
+        messaging.send(mentor_side, 'Answer')
+        self.assertEqual(messaging.unread_total(self.mentor.user), 0)
+        self.assertEqual(messaging.unread_total(self.student), 1)
+        self.assertEqual(list(Message.objects.order_by('seq').values_list('seq', flat=True)), [1, 2, 3, 4])
+
+    def test_send_cost_does_not_grow_with_the_thread(self):
+        participant = messaging.participation(self.student, self.thread.pk)
+        with self.assertNumQueries(6):  # savepoint, 4 statements, release
+            messaging.send(participant, 'first')
+        for i in range(200):
+            messaging.send(participant, f'message {i}')
+        with self.assertNumQueries(6):
+            messaging.send(participant, 'last')
+
+    def test_history_pages_back_with_a_cursor(self):
+        participant = messaging.participation(self.student, self.thread.pk)
+        for i in range(7):
+            messaging.send(participant, f'message {i}')
+        paginator = messaging.history(self.thread.pk, per_page=3)
+        bodies, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            bodies += [message.body for message in page]
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(bodies, [f'message {i}' for i in reversed(range(7))])
+
+    def test_inbox_pages_past_threads_without_messages(self):
+        threads = [self.thread]
+        for name in ('Bilal', 'Hina'):
+            student = User.objects.create_user(email=f'{name.lower()}@example.com', first_name=name)
+            Mentorship.objects.create(student=student, mentor=self.mentor, score=1)
+            threads.append(messaging.thread_between(self.mentor.user, student))
+        messaging.send(messaging.participation(self.mentor.user, threads[0].pk), 'Welcome')
+
+        paginator = messaging.inbox(self.mentor.user, per_page=1)
+        seen, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            seen += [participant.thread_id for participant in page]
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, [threads[0].pk, threads[2].pk, threads[1].pk])
+
+    def test_thread_view_sends_and_marks_read(self):
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('start-thread', args=[self.mentor.user_id]))
+        self.assertRedirects(response, reverse('thread', args=[self.thread.pk]))
+        response = self.client.post(reverse('thread', args=[self.thread.pk]), {'body': 'Hello!'})
+        self.assertRedirects(response, reverse('thread', args=[self.thread.pk]))
+
+        self.client.force_login(self.mentor.user)
+        self.assertContains(self.client.get(reverse('messages')), 'badge')
+        self.assertContains(self.client.get(reverse('thread', args=[self.thread.pk])), 'Hello!')
+        self.assertEqual(messaging.unread_total(self.mentor.user), 0)
 
-# Create your tests here.
+        stranger = User.objects.create_user(email='stranger@example.com', first_name='Stranger')
+        self.client.force_login(stranger)
+        self.assertEqual(self.client.get(reverse('thread', args=[self.thread.pk])).status_code, 404)
@@ -1,3 +1,13 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import StudentProfile
+
+
+@admin.register(StudentProfile)
+class StudentProfileAdmin(admin.ModelAdmin):
+    list_display = ('user', 'department', 'year', 'session_count')
+    list_filter = ('department',)
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    filter_horizontal = ('interests',)
+    search_fields = ('user__email', 'user__first_name', 'user__last_name', 'department')
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.11 on 2026-10-18 18:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('mentor', '0002_mentor_capacity_mentor_languages_mentorship'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(blank=True, max_length=100, verbose_name='Department')),
+                ('year', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Year')),
+                ('languages', models.CharField(blank=True, help_text='Comma-separated language codes, e.g. en,ur', max_length=100, verbose_name='Languages')),
+                ('interests', models.ManyToManyField(blank=True, related_name='students', to='mentor.expertisetag', verbose_name='Interests')),
+                ('user', models.OneToOneField(limit_choices_to={'user_type': 'STUDENT'}, on_delete=django.db.models.deletion.CASCADE, related_name='student_profile', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentprofile',
+            name='session_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Sessions'),
+        ),
+    ]
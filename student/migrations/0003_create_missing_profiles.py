@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def create_missing_profiles(apps, schema_editor):
+    # Signup did not create profiles before; without one a user is invisible
+    # to the directory and to matching.
+    User = apps.get_model('core', 'User')
+    Mentor = apps.get_model('mentor', 'Mentor')
+    StudentProfile = apps.get_model('student', 'StudentProfile')
+    for user_type, model, related_name in (
+        ('MENTOR', Mentor, 'mentor_profile'),
+        ('STUDENT', StudentProfile, 'student_profile'),
+    ):
+        missing = User.objects.filter(user_type=user_type, **{f'{related_name}__isnull': True})
+        model.objects.bulk_create(
+            (model(user_id=pk) for pk in missing.values_list('pk', flat=True).iterator()), batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_auditevent'),
+        ('mentor', '0004_messaging'),
+        ('student', '0002_studentprofile_session_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_profiles, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,38 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import OuterRef
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+from core.enums import UserTypeChoices
+from mentor.models import ExpertiseTag, MentoringSession, count_subquery
+
+
+class StudentProfileQuerySet(models.QuerySet):
+    def refresh_counters(self):
+        """Recount ``session_count`` from the sessions it summarises."""
+        return self.update(
+            session_count=count_subquery(MentoringSession.objects.filter(student=OuterRef('user')), 'student'),
+        )
+
+
+class StudentProfile(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='student_profile',
+        limit_choices_to={'user_type': UserTypeChoices.STUDENT},
+        verbose_name=_('User'),
+    )
+    department = models.CharField(_('Department'), max_length=100, blank=True)
+    year = models.PositiveSmallIntegerField(_('Year'), null=True, blank=True)
+    interests = models.ManyToManyField(ExpertiseTag, blank=True, related_name='students', verbose_name=_('Interests'))
+    languages = models.CharField(
+        _('Languages'), max_length=100, blank=True, help_text=_('Comma-separated language codes, e.g. en,ur'),
+    )
+    # Denormalised for the profile page; kept in step by mentor.signals.
+    session_count = models.PositiveIntegerField(_('Sessions'), default=0, editable=False)
+
+    objects = StudentProfileQuerySet.as_manager()
+
+    def __str__(self):
+        return str(self.user)